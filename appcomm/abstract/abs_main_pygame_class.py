@@ -13,11 +13,15 @@ class AbsMainPygameListener(ABC):
     @abstractmethod
     def app_handle_update(self) -> bool:
         # 子类必须实现的方法
-        # 循环体内容处理
+        # 循环体内容处理，按 config.UPDATE_RATE 的固定频率调用
         pass
 
     @abstractmethod
-    def app_draw(screen: pygame.surface.Surface):
+    def app_draw(self, screen: pygame.surface.Surface, alpha: float) -> list:
+        # 子类必须实现的方法
+        # 绘制逻辑：alpha 为上一步更新到下一步更新之间的进度 (0~1)，可用于插值位置；
+        # 返回 None 时由子类自己刷新屏幕（pygame.display.flip）；
+        # 返回矩形列表时进入脏矩形模式，主循环只刷新这些区域（空列表表示本帧无变化）
         pass
 
     @abstractmethod
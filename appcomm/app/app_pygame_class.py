@@ -1,5 +1,6 @@
 import pygame
 import sys
+import time
 import appcomm.config_class as config
 from appcomm.abstract.abs_main_pygame_class import *
 
@@ -17,21 +18,46 @@ class _BasePygame:
         
         self.clock = pygame.time.Clock()
     
-    # 主逻辑
+    # 主逻辑：固定时间步长
+    # app_handle_update 按 config.UPDATE_RATE 的固定频率执行，与绘制帧率解耦；
+    # 绘制慢时一帧内补跑多步更新（最多 config.MAX_UPDATE_STEPS 步，超出的积压直接丢弃，避免越追越慢），
+    # 绘制时把 "距离下一步更新的进度" alpha (0~1) 传给 app_draw 用于插值
     def run(self):
+        step = 1.0 / config.UPDATE_RATE
+        # 第一帧绘制前先更新一步
+        accumulator = step
+        previous = time.perf_counter()
         while(self.running):
+            now = time.perf_counter()
+            accumulator += now - previous
+            previous = now
+
             # 处理事件
-            self.  _handle_events()
+            self._handle_events()
 
             # 处理循环体逻辑
-            if self._main_listener.app_handle_update() is False:
-                self.running = False
+            steps = 0
+            while accumulator >= step and self.running:
+                if steps >= config.MAX_UPDATE_STEPS:
+                    accumulator %= step
+                    break
+                if self._main_listener.app_handle_update() is False:
+                    self.running = False
+                accumulator -= step
+                steps += 1
 
             # 处理绘制逻辑
-            self._main_listener.app_draw(self.screen)
-                
+            alpha = min(1.0, accumulator / step)
+            self._present(self._main_listener.app_draw(self.screen, alpha))
+
+            # 限制绘制帧率，config.FPS 为 0 时不限制
             self.clock.tick(config.FPS)
 
+    # 脏矩形模式：只把 app_draw 返回的区域刷新到窗口
+    def _present(self, rects):
+        if rects:
+            pygame.display.update(rects)
+
     # 处理 event 事件
     def _handle_events(self):
          for event in pygame.event.get():
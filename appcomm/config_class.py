@@ -7,7 +7,11 @@ SCREEN_HEIGHT = 600
 # 窗口标题
 WINDOW_TITLE = "星际保卫战"
 
+# 绘制帧率上限（0 为不限制）
 FPS = 60
+# 固定时间步长：逻辑更新频率（次/秒）和每帧最多补跑的更新步数
+UPDATE_RATE = 60
+MAX_UPDATE_STEPS = 5
 
 # --- 颜色定义 (RGB元组) ---
 # 白色 (Red=255, Green=255, Blue=255)
@@ -0,0 +1,76 @@
+# 脏矩形刷新模块
+import pygame
+
+
+# 脏矩形工具类
+# 屏幕上不变的部分预先画在 background 上，每帧只把上一帧画过的区域从 background 恢复，
+# 再画本帧的动态内容，最后把 (上一帧区域 + 本帧区域) 交给 pygame.display.update，
+# 静止为主的画面每帧只需要刷新很小的面积
+class DirtyRectHelper:
+
+    def __init__(self, screen: pygame.surface.Surface, background: pygame.surface.Surface = None):
+        """
+        参数:
+            screen: 显示表面
+            background: 静态背景，None 时取当前屏幕内容的副本
+        """
+        self.screen = screen
+        self.background = background if background is not None else screen.copy()
+        self.screen_rect = screen.get_rect()
+        # 上一帧画过、本帧开始时需要恢复的区域
+        self._previous = []
+        # 本帧画过的区域
+        self._current = []
+        # 本帧从背景恢复、下一帧不必再恢复的区域
+        self._restored = []
+        self._full = True
+
+    def set_background(self, background: pygame.surface.Surface):
+        """替换静态背景（如切换主题），下一帧整屏刷新"""
+        self.background = background
+        self.invalidate()
+
+    def invalidate(self):
+        """下一帧整屏重画、整屏刷新"""
+        self._full = True
+
+    def begin(self):
+        """开始新的一帧：把上一帧画过的区域恢复成背景"""
+        if self._full:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self._previous:
+                self.screen.blit(self.background, rect, rect)
+        self._current = []
+        self._restored = []
+
+    def restore(self, rect):
+        """背景本身在 rect 内发生了变化：把这块背景重新画到屏幕上并记为脏区域"""
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width and rect.height:
+            self.screen.blit(self.background, rect, rect)
+            self._restored.append(rect)
+
+    def add(self, rect):
+        """记录本帧画过的区域（pygame.draw / blit 的返回值可以直接传进来）"""
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width and rect.height:
+            self._current.append(rect)
+
+    def add_all(self, rects):
+        for rect in rects:
+            self.add(rect)
+
+    def end(self) -> list:
+        """
+        结束本帧
+        返回:
+            需要传给 pygame.display.update 的矩形列表
+        """
+        if self._full:
+            self._full = False
+            rects = [self.screen_rect]
+        else:
+            rects = self._previous + self._restored + self._current
+        self._previous = self._current
+        return rects
@@ -0,0 +1,220 @@
+# 分形分块渲染模块
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pygame
+import appcomm.utils.fractal_util as fractal_util
+
+
+# 分块缓存：按内存上限做 LRU 淘汰
+class TileCache:
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._tiles = OrderedDict()
+
+    @staticmethod
+    def _size_of(surface: pygame.surface.Surface) -> int:
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def get(self, key):
+        surface = self._tiles.get(key)
+        if surface is not None:
+            self._tiles.move_to_end(key)
+        return surface
+
+    def put(self, key, surface: pygame.surface.Surface):
+        if key in self._tiles:
+            self.bytes -= self._size_of(self._tiles.pop(key))
+        self._tiles[key] = surface
+        self.bytes += self._size_of(surface)
+        # 超出内存上限时淘汰最久未使用的分块
+        while self.bytes > self.max_bytes and len(self._tiles) > 1:
+            _, old = self._tiles.popitem(last=False)
+            self.bytes -= self._size_of(old)
+
+    def __contains__(self, key):
+        return key in self._tiles
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def clear(self):
+        self._tiles.clear()
+        self.bytes = 0
+
+
+# 分块调度工具类
+# 复平面按 (缩放级别, 分块x, 分块y, 最大迭代次数) 切成固定大小的分块，
+# 在进程池中渲染，结果经共享内存取回并放入 TileCache，平移回看或来回缩放时直接复用
+class FractalTileHelper:
+
+    def __init__(self, width, height, tile_size=100, zoom_base=1.1, workers=None,
+                 cache_bytes=64 * 1024 * 1024):
+        """
+        参数:
+            width, height: 屏幕尺寸（决定复平面的像素比例，与 test_51 的映射一致）
+            tile_size: 分块边长（像素）
+            zoom_base: 缩放级别的底数，zoom = zoom_base ** level
+            workers: 进程数，None 为 CPU 核数，0 表示不开进程、在主进程内逐块渲染
+            cache_bytes: 分块缓存的内存上限（字节）
+        """
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.zoom_base = zoom_base
+        self.workers = workers
+        self.cache = TileCache(cache_bytes)
+        # 最近若干分块的渲染耗时（秒）
+        self.tile_times = deque(maxlen=256)
+
+        self._executor = None
+        self._shm = None
+        self._free_slots = []
+        # key -> (future, slot)
+        self._pending = {}
+        self._visible = []
+        self._scales = None
+
+    # --- 进程池与共享内存 ---
+    def _ensure_pool(self):
+        if self._executor is not None or self.workers == 0:
+            return
+        workers = self.workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        # 每个进程两个槽位，一个在算、一个排队
+        slots = workers * 2
+        slot_bytes = self.tile_size * self.tile_size * 3
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._free_slots = list(range(slots))
+
+    def _slot_array(self, slot):
+        slot_bytes = self.tile_size * self.tile_size * 3
+        return np.ndarray((self.tile_size, self.tile_size, 3), dtype=np.uint8,
+                          buffer=self._shm.buf, offset=slot * slot_bytes)
+
+    def close(self):
+        """关闭进程池并释放共享内存"""
+        if self._executor is not None:
+            for future, _ in self._pending.values():
+                future.cancel()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._pending.clear()
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    # --- 视图与分块坐标 ---
+    def zoom_level(self, zoom) -> int:
+        return round(math.log(zoom) / math.log(self.zoom_base))
+
+    def _layout(self, zoom, x_offset, y_offset):
+        """返回 (缩放级别, x 比例, y 比例, 屏幕左上角的全局像素坐标)"""
+        level = self.zoom_level(zoom)
+        level_zoom = self.zoom_base ** level
+        scale_x = 0.5 * level_zoom * self.width
+        scale_y = 0.5 * level_zoom * self.height
+        # 屏幕原点取整到全局像素网格，分块才能在平移后对齐复用
+        origin_x = round(x_offset * scale_x - self.width / 2)
+        origin_y = round(y_offset * scale_y - self.height / 2)
+        return level, scale_x, scale_y, origin_x, origin_y
+
+    def request(self, zoom, x_offset, y_offset, max_iter):
+        """设置当前视图，缺失的分块按离屏幕中心由近到远提交渲染"""
+        level, scale_x, scale_y, origin_x, origin_y = self._layout(zoom, x_offset, y_offset)
+        size = self.tile_size
+        tx0, ty0 = origin_x // size, origin_y // size
+        tx1 = (origin_x + self.width - 1) // size
+        ty1 = (origin_y + self.height - 1) // size
+
+        visible = []
+        for ty in range(ty0, ty1 + 1):
+            for tx in range(tx0, tx1 + 1):
+                key = (level, tx, ty, max_iter)
+                pos = (tx * size - origin_x, ty * size - origin_y)
+                visible.append((key, pos))
+        # 离屏幕中心近的分块优先渲染
+        center_x = self.width / 2 - size / 2
+        center_y = self.height / 2 - size / 2
+        visible.sort(key=lambda item: (item[1][0] - center_x) ** 2 + (item[1][1] - center_y) ** 2)
+        self._visible = visible
+        self._scales = (scale_x, scale_y)
+
+        # 已经不在屏幕内且尚未开始的任务取消掉，把槽位让给当前视图
+        wanted = {key for key, _ in visible}
+        for key in list(self._pending):
+            future, slot = self._pending[key]
+            if key not in wanted and future.cancel():
+                del self._pending[key]
+                self._free_slots.append(slot)
+
+        self._submit(self._missing(), scale_x, scale_y)
+
+    def _missing(self):
+        return [(key, pos) for key, pos in self._visible
+                if key not in self.cache and key not in self._pending]
+
+    def _submit(self, missing, scale_x, scale_y):
+        self._ensure_pool()
+        if self._executor is None:
+            # 无进程池：每帧只在主进程渲染一块，保持事件循环流畅
+            for key, _ in missing[:1]:
+                level, tx, ty, max_iter = key
+                start = time.perf_counter()
+                rgb = fractal_util.render_tile(self.tile_size, tx, ty, scale_x, scale_y, max_iter)
+                self.tile_times.append(time.perf_counter() - start)
+                self.cache.put(key, pygame.surfarray.make_surface(rgb))
+            return
+        for key, _ in missing:
+            if not self._free_slots:
+                break
+            slot = self._free_slots.pop()
+            level, tx, ty, max_iter = key
+            future = self._executor.submit(fractal_util.render_tile_to_shm, self._shm.name, slot,
+                                           self.tile_size, tx, ty, scale_x, scale_y, max_iter)
+            self._pending[key] = (future, slot)
+
+    def poll(self) -> int:
+        """
+        收取已完成的分块放入缓存，不阻塞
+        返回:
+            本次完成的分块数
+        """
+        finished = 0
+        for key in list(self._pending):
+            future, slot = self._pending[key]
+            if not future.done():
+                continue
+            del self._pending[key]
+            if not future.cancelled():
+                _, seconds = future.result()
+                self.tile_times.append(seconds)
+                self.cache.put(key, pygame.surfarray.make_surface(self._slot_array(slot)))
+                finished += 1
+            self._free_slots.append(slot)
+        if finished and self._visible:
+            # 槽位空出来了，继续提交当前视图剩余的分块
+            self._submit(self._missing(), *self._scales)
+        return finished
+
+    def blit(self, screen: pygame.surface.Surface) -> bool:
+        """
+        把当前视图中已完成的分块合成到屏幕上
+        返回:
+            当前视图是否已全部完成
+        """
+        complete = True
+        for key, pos in self._visible:
+            surface = self.cache.get(key)
+            if surface is None:
+                complete = False
+            else:
+                screen.blit(surface, pos)
+        return complete
@@ -0,0 +1,67 @@
+# 透明叠加层模块
+import pygame
+
+
+# 全屏透明叠加层
+# SRCALPHA 表面只创建一次并跨帧复用；不透明的物体直接画进这一层，半透明的物体
+# （pygame.draw 在 SRCALPHA 表面上是直接替换像素，不做混合）先画到同样复用的草稿层，再 blit 混合进来，
+# 重叠部分的透明度才会叠加；记录本帧画过的包围盒，每帧只清除上一帧画过的区域、只把包围盒内的部分叠加到屏幕一次
+class OverlayLayer:
+
+    def __init__(self, size):
+        """
+        参数:
+            size: 叠加层尺寸 (width, height)，通常与屏幕一致
+        """
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        # 半透明物体的草稿层，画完即混合并清回全透明
+        self._scratch = pygame.Surface(size, pygame.SRCALPHA)
+        self.rect = self.surface.get_rect()
+        self.dirty = None
+        self._previous = None
+
+    def begin(self):
+        """开始新的一帧：把上一帧画过的区域清成全透明"""
+        if self._previous is not None:
+            self.surface.fill((0, 0, 0, 0), self._previous)
+        self._previous = None
+        self.dirty = None
+
+    def mark(self, rect):
+        """把 rect 并入本帧的脏区域（pygame.draw 的返回值可以直接传进来）"""
+        rect = pygame.Rect(rect).clip(self.rect)
+        if not rect.width or not rect.height:
+            return
+        self.dirty = rect if self.dirty is None else self.dirty.union(rect)
+
+    def _target(self, color) -> pygame.surface.Surface:
+        """不透明颜色直接画进叠加层，半透明颜色先画到草稿层"""
+        return self.surface if pygame.Color(color).a == 255 else self._scratch
+
+    def _draw(self, target, rect):
+        """把草稿层上 rect 内的物体按透明度混合进叠加层，并记入脏区域"""
+        if target is self._scratch:
+            rect = rect.clip(self.rect)
+            if rect.width and rect.height:
+                self.surface.blit(self._scratch, rect.topleft, rect)
+                self._scratch.fill((0, 0, 0, 0), rect)
+        self.mark(rect)
+
+    def line(self, color, start, end, width=1):
+        target = self._target(color)
+        self._draw(target, pygame.draw.line(target, color, start, end, width))
+
+    def circle(self, color, center, radius, width=0):
+        target = self._target(color)
+        self._draw(target, pygame.draw.circle(target, color, center, radius, width))
+
+    def composite(self, target: pygame.surface.Surface):
+        """
+        把本帧画过的区域一次性叠加到 target
+        返回:
+            叠加的屏幕区域，本帧什么都没画时返回 None
+        """
+        self._previous = self.dirty
+        if self.dirty is None:
+            return None
+        return target.blit(self.surface, self.dirty.topleft, self.dirty)
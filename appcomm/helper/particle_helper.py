@@ -0,0 +1,268 @@
+# 粒子系统模块
+import math
+import random
+import time
+import numpy as np
+import pygame
+
+
+# 粒子系统：位置、速度、生命、大小、颜色分别存放在预分配的 NumPy 数组中（SoA），
+# 每帧一次向量化积分；死亡粒子的槽位进入空闲栈，新粒子直接复用，不再每帧重建列表
+# 带角速度（spin）的粒子每帧移动后再绕出生中心旋转，速度方向随之旋转，沿半径发射的粒子走螺旋线
+class ParticleSystem:
+
+    def __init__(self, capacity=10000, gravity=(0.0, 0.0), drag=0.0):
+        """
+        参数:
+            capacity: 最大粒子数，满了之后新发射的粒子会被丢弃
+            gravity: 每帧加到速度上的加速度 (ax, ay)
+            drag: 每帧速度衰减比例（0 为不衰减）
+        """
+        self.capacity = capacity
+        self.gravity = np.array(gravity, dtype=np.float32)
+        self.drag = drag
+
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.max_life = np.ones(capacity, dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        # 旋转中心和每帧旋转的角度（弧度），spin 为 0 的粒子不旋转
+        self.origin = np.zeros((capacity, 2), dtype=np.float32)
+        self.spin = np.zeros(capacity, dtype=np.float32)
+        self._spinning = False
+
+        # 空闲槽位栈：_free[:_free_top] 为可用槽位
+        self._free = np.arange(capacity - 1, -1, -1, dtype=np.int32)
+        self._free_top = capacity
+
+    def __len__(self):
+        return self.capacity - self._free_top
+
+    def clear(self):
+        self.alive[:] = False
+        self._free = np.arange(self.capacity - 1, -1, -1, dtype=np.int32)
+        self._free_top = self.capacity
+
+    def spawn(self, x, y, vx, vy, life, size, color, spin=0.0, origin=None) -> np.ndarray:
+        """
+        批量加入粒子，参数可以是标量或长度一致的数组
+        参数:
+            spin: 每帧绕 origin 旋转的角度（弧度）
+            origin: 旋转中心 (x, y)，None 为出生点
+        返回:
+            实际使用的槽位下标（容量不足时少于请求数量）
+        """
+        n = max(np.size(x), np.size(y), np.size(vx), np.size(vy), np.size(life), np.size(size),
+                np.size(color) // 3, np.size(spin))
+        n = min(n, self._free_top)
+        if n <= 0:
+            return np.empty(0, dtype=np.int32)
+        idx = self._free[self._free_top - n:self._free_top].copy()
+        self._free_top -= n
+
+        # 标量直接广播，数组按实际数量截断
+        head = lambda v: v[:n] if np.ndim(v) else v
+        self.pos[idx, 0] = head(x)
+        self.pos[idx, 1] = head(y)
+        self.vel[idx, 0] = head(vx)
+        self.vel[idx, 1] = head(vy)
+        self.life[idx] = head(life)
+        self.max_life[idx] = head(life)
+        self.size[idx] = head(size)
+        color = np.asarray(color, dtype=np.uint8)
+        self.color[idx] = color[:n] if color.ndim == 2 else color
+        self.spin[idx] = head(spin)
+        if origin is None:
+            self.origin[idx] = self.pos[idx]
+        else:
+            self.origin[idx] = origin
+        if np.any(spin):
+            self._spinning = True
+        self.alive[idx] = True
+        return idx
+
+    def update(self, dt=1.0):
+        """向量化积分：先按速度移动，再绕中心旋转、施加重力和阻力，最后回收生命耗尽的槽位"""
+        self.pos += self.vel * dt
+        if self._spinning:
+            self._rotate(dt)
+        self.vel += self.gravity * dt
+        if self.drag:
+            self.vel *= (1.0 - self.drag) ** dt
+        self.life -= dt
+
+        dead = np.flatnonzero(self.alive & (self.life <= 0))
+        if dead.size:
+            self.alive[dead] = False
+            self._free[self._free_top:self._free_top + dead.size] = dead
+            self._free_top += dead.size
+
+    def _rotate(self, dt):
+        """带角速度的存活粒子：相对旋转中心的位置和速度一起旋转 spin * dt"""
+        idx = np.flatnonzero(self.alive & (self.spin != 0))
+        if not idx.size:
+            return
+        angle = self.spin[idx] * dt
+        cos = np.cos(angle)[:, None]
+        sin = np.sin(angle)[:, None]
+        offset = self.pos[idx] - self.origin[idx]
+        vel = self.vel[idx]
+        self.pos[idx] = self.origin[idx] + np.hstack([offset[:, :1] * cos - offset[:, 1:] * sin,
+                                                      offset[:, :1] * sin + offset[:, 1:] * cos])
+        self.vel[idx] = np.hstack([vel[:, :1] * cos - vel[:, 1:] * sin, vel[:, :1] * sin + vel[:, 1:] * cos])
+
+    def life_ratio(self, idx=None) -> np.ndarray:
+        """剩余生命比例（1 为刚出生，0 为即将死亡）"""
+        if idx is None:
+            idx = np.flatnonzero(self.alive)
+        return np.clip(self.life[idx] / self.max_life[idx], 0.0, 1.0)
+
+    def draw(self, surface: pygame.surface.Surface, shrink=False, min_radius=1) -> list:
+        """
+        把存活粒子画成实心圆
+        参数:
+            shrink: True 时半径按剩余生命比例缩小（size * life / max_life，向下取整）
+            min_radius: 最小半径
+        返回:
+            每个粒子实际绘制的矩形（脏矩形刷新用）
+        """
+        idx = np.flatnonzero(self.alive)
+        if not idx.size:
+            return []
+        radius = self.size[idx]
+        if shrink:
+            radius = np.floor(radius * self.life_ratio(idx))
+        radius = np.maximum(min_radius, radius).astype(np.int32)
+        xs = self.pos[idx, 0].astype(np.int32)
+        ys = self.pos[idx, 1].astype(np.int32)
+        # 先剔除完全在画面外的粒子，只有可见粒子进入 Python 循环
+        width, height = surface.get_size()
+        visible = (xs + radius >= 0) & (xs - radius < width) & (ys + radius >= 0) & (ys - radius < height)
+        idx, xs, ys, radius = idx[visible], xs[visible], ys[visible], radius[visible]
+        circle = pygame.draw.circle
+        return [circle(surface, c, (x, y), r)
+                for x, y, r, c in zip(xs.tolist(), ys.tolist(), radius.tolist(), self.color[idx].tolist())]
+
+
+def _uniform(rng, value, n):
+    """value 为标量时原样返回，为 (最小, 最大) 时返回 n 个均匀随机数"""
+    if isinstance(value, (tuple, list)):
+        return rng.uniform(value[0], value[1], n)
+    return value
+
+
+def _randint(rng, value, n):
+    """value 为 (最小, 最大) 时返回 n 个闭区间随机整数，与 random.randint 一致"""
+    if isinstance(value, (tuple, list)):
+        return rng.integers(value[0], value[1], n, endpoint=True)
+    return value
+
+
+# 发射器：用随机范围描述粒子的初始状态，一次调用批量生成
+class ParticleEmitter:
+
+    def __init__(self, system: ParticleSystem, life=60, size=3, color=(255, 255, 255),
+                 speed=None, angle=(0.0, 2 * math.pi), velocity=None, offset=0.0, spin=0.0, seed=None):
+        """
+        参数（标量为固定值，二元组 (最小, 最大) 为随机范围）:
+            life: 生命（帧），整数范围
+            size: 半径，整数范围
+            color: 固定 (r, g, b)，或 ((rmin, rmax), (gmin, gmax), (bmin, bmax)) 每个通道随机
+            speed / angle: 极坐标速度（角度为弧度）
+            velocity: ((vxmin, vxmax), (vymin, vymax)) 直角坐标速度，设置后忽略 speed / angle
+            offset: 出生点沿发射方向偏离发射中心的距离
+            spin: 每帧绕发射中心旋转的角度（弧度），0 为不旋转
+        """
+        self.system = system
+        self.life = life
+        self.size = size
+        self.color = color
+        self.speed = speed
+        self.angle = angle
+        self.velocity = velocity
+        self.offset = offset
+        self.spin = spin
+        self.rng = np.random.default_rng(seed)
+
+    def emit(self, x, y, count=1) -> np.ndarray:
+        """在 (x, y) 处发射 count 个粒子，返回使用的槽位下标"""
+        rng = self.rng
+        if self.velocity is not None:
+            vx = _uniform(rng, self.velocity[0], count)
+            vy = _uniform(rng, self.velocity[1], count)
+            angle = np.arctan2(vy, vx)
+        else:
+            angle = _uniform(rng, self.angle, count)
+            speed = _uniform(rng, self.speed if self.speed is not None else 0.0, count)
+            vx = np.cos(angle) * speed
+            vy = np.sin(angle) * speed
+        offset = _uniform(rng, self.offset, count)
+        px = x + np.cos(angle) * offset
+        py = y + np.sin(angle) * offset
+
+        if isinstance(self.color[0], (tuple, list)):
+            color = np.stack([_randint(rng, channel, count) for channel in self.color], axis=-1)
+        else:
+            color = self.color
+        return self.system.spawn(px, py, vx, vy, _randint(rng, self.life, count),
+                                 _randint(rng, self.size, count), color, _uniform(rng, self.spin, count), (x, y))
+
+
+def benchmark(counts=(1000, 10000, 100000), frames=60, draws=5):
+    """对比逐对象粒子（test_11 的写法）与 ParticleSystem 的每帧更新、绘制耗时"""
+
+    class _ObjectParticle:
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+            self.size = random.randint(2, 5)
+            self.color = (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))
+            self.speed_x = random.uniform(-3, 3)
+            self.speed_y = random.uniform(-3, 3)
+            self.life = random.randint(200, 400)
+
+        def update(self):
+            self.x += self.speed_x
+            self.y += self.speed_y
+            self.life -= 1
+
+        def draw(self, surface):
+            if self.life > 0:
+                pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), self.size)
+
+    surface = pygame.Surface((800, 600))
+    print(f"{'粒子数':>8} | {'对象 更新':>10} {'对象 绘制':>10} | {'SoA 更新':>10} {'SoA 绘制':>10}  (ms/帧)")
+    for count in counts:
+        particles = [_ObjectParticle(400, 300) for _ in range(count)]
+        start = time.perf_counter()
+        for _ in range(frames):
+            particles = [p for p in particles if p.life > 0]
+            for p in particles:
+                p.update()
+        obj_update = (time.perf_counter() - start) / frames
+        start = time.perf_counter()
+        for _ in range(draws):
+            for p in particles:
+                p.draw(surface)
+        obj_draw = (time.perf_counter() - start) / draws
+
+        system = ParticleSystem(count)
+        ParticleEmitter(system, life=(200, 400), size=(2, 5), color=((100, 255),) * 3,
+                        velocity=((-3, 3), (-3, 3))).emit(400, 300, count)
+        start = time.perf_counter()
+        for _ in range(frames):
+            system.update()
+        soa_update = (time.perf_counter() - start) / frames
+        start = time.perf_counter()
+        for _ in range(draws):
+            system.draw(surface)
+        soa_draw = (time.perf_counter() - start) / draws
+
+        print(f"{count:>8} | {obj_update * 1000:10.2f} {obj_draw * 1000:10.2f} | "
+              f"{soa_update * 1000:10.2f} {soa_draw * 1000:10.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,124 @@
+# 光线追踪流水线模块
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import appcomm.utils.ray_util as ray_util
+
+
+# 分块并行 + 帧流水线的光线追踪工具类
+# 每帧按行切成若干任务交给进程池；第 N 帧显示时第 N+1 帧已经在渲染，
+# poll() 从不等待子进程，事件循环每帧最多只在这里花很少的时间
+class RayPipelineHelper:
+
+    def __init__(self, width, height, scene, band_rows=40, workers=None, frames_in_flight=2,
+                 shadows=True):
+        """
+        参数:
+            width, height: 渲染分辨率
+            scene: ray_util.Scene，进程启动时传入一次
+            band_rows: 每个任务渲染的行数
+            workers: 进程数，None 为 CPU 核数，0 表示不开进程、在主进程内按时间预算渲染
+            frames_in_flight: 同时在渲染中的帧数（2 即当前帧 + 下一帧）
+        """
+        self.width = width
+        self.height = height
+        self.scene = scene
+        self.band_rows = band_rows
+        self.frames_in_flight = frames_in_flight
+        self.shadows = shadows
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._executor = None
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 initializer=ray_util.init_worker,
+                                                 initargs=(scene,))
+        # 按提交顺序排列的帧：{"buffer", "futures", "jobs", "remaining"}
+        self._frames = deque()
+
+        # 统计
+        self.tile_times = deque(maxlen=256)
+        self._busy = 0.0
+        self._stats_start = time.perf_counter()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._frames.clear()
+
+    def can_submit(self) -> bool:
+        return len(self._frames) < self.frames_in_flight
+
+    def submit(self, camera, light_position, intensity):
+        """提交一帧；camera / light_position 为三元组或带 x/y/z 的向量"""
+        camera = tuple(ray_util.to_array(camera))
+        light_position = tuple(ray_util.to_array(light_position))
+        frame = {
+            "buffer": np.zeros((self.width, self.height, 3), dtype=np.uint8),
+            "futures": [],
+            "jobs": [],
+            "remaining": 0,
+        }
+        for y0 in range(0, self.height, self.band_rows):
+            y1 = min(y0 + self.band_rows, self.height)
+            args = (self.width, self.height, y0, y1, camera, light_position, intensity, self.shadows)
+            if self._executor is not None:
+                frame["futures"].append(self._executor.submit(ray_util.render_rows, *args))
+            else:
+                frame["jobs"].append(args)
+            frame["remaining"] += 1
+        self._frames.append(frame)
+
+    def _store(self, frame, result):
+        y0, image, seconds = result
+        frame["buffer"][:, y0:y0 + image.shape[1]] = image
+        frame["remaining"] -= 1
+        self.tile_times.append(seconds)
+        self._busy += seconds
+
+    def poll(self, budget=1.0 / 60):
+        """
+        收取已完成的分块，不等待子进程
+        参数:
+            budget: 无进程池时主进程渲染分块的时间预算（秒）
+        返回:
+            最早提交的一帧全部完成时返回其 (width, height, 3) 缓冲，否则 None
+        """
+        if not self._frames:
+            return None
+        if self._executor is not None:
+            for frame in self._frames:
+                pending = []
+                for future in frame["futures"]:
+                    if future.done():
+                        self._store(frame, future.result())
+                    else:
+                        pending.append(future)
+                frame["futures"] = pending
+        else:
+            deadline = time.perf_counter() + budget
+            for frame in self._frames:
+                while frame["jobs"] and time.perf_counter() < deadline:
+                    args = frame["jobs"].pop(0)
+                    self._store(frame, ray_util.render_rows(*args, scene=self.scene))
+
+        # 帧按顺序出队，保证显示顺序与提交顺序一致
+        if self._frames[0]["remaining"] == 0:
+            return self._frames.popleft()["buffer"]
+        return None
+
+    def report(self) -> str:
+        """分块耗时与核心利用率（自上次 report 以来的 忙碌时间 / (墙钟时间 * 进程数)）"""
+        now = time.perf_counter()
+        wall = now - self._stats_start
+        utilization = self._busy / (wall * max(1, self.workers)) if wall > 0 else 0.0
+        self._busy = 0.0
+        self._stats_start = now
+        if self.tile_times:
+            times = np.array(self.tile_times) * 1000
+            tiles = f"分块 平均 {times.mean():.1f} ms / 最大 {times.max():.1f} ms"
+        else:
+            tiles = "分块 -"
+        return f"{tiles} | 核心利用率 {utilization * 100:.0f}%"
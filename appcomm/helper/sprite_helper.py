@@ -0,0 +1,95 @@
+# 精灵缓存模块
+from collections import OrderedDict
+import pygame
+
+
+# 圆形 / 圆环精灵缓存
+# 按量化后的 (半径, 颜色, 透明度, 线宽) 预渲染一次 SRCALPHA 表面并共享，
+# 绘制时只剩一次 blit，不再每个粒子每帧新建 Surface；缓存按 LRU 淘汰
+class SpriteCache:
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, alpha_step=8):
+        """
+        参数:
+            max_bytes: 缓存精灵占用内存的上限（字节）
+            alpha_step: 透明度量化步长，越大缓存命中率越高、渐变越粗
+        """
+        self.max_bytes = max_bytes
+        self.alpha_step = alpha_step
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._sprites = OrderedDict()
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def clear(self):
+        self._sprites.clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self) -> str:
+        return (f"精灵缓存: {len(self._sprites)} 个 / {self.bytes / 1024 / 1024:.1f} MB, "
+                f"命中 {self.hits}, 未命中 {self.misses}, 命中率 {self.hit_rate() * 100:.1f}%")
+
+    @staticmethod
+    def _size_of(sprite: pygame.surface.Surface) -> int:
+        return sprite.get_width() * sprite.get_height() * sprite.get_bytesize()
+
+    def _quantize_alpha(self, alpha) -> int:
+        alpha = int(max(0, min(255, alpha)))
+        if alpha >= 255:
+            return 255
+        return alpha // self.alpha_step * self.alpha_step
+
+    def _get(self, key, render):
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self._sprites.move_to_end(key)
+            return sprite
+        self.misses += 1
+        sprite = render()
+        self._sprites[key] = sprite
+        self.bytes += self._size_of(sprite)
+        # 超出内存上限时淘汰最久未使用的精灵
+        while self.bytes > self.max_bytes and len(self._sprites) > 1:
+            _, old = self._sprites.popitem(last=False)
+            self.bytes -= self._size_of(old)
+        return sprite
+
+    def circle(self, radius, color, alpha=255, width=0) -> pygame.surface.Surface:
+        """
+        获取 (2r, 2r) 的圆形精灵，width > 0 时为圆环
+        返回:
+            共享的 Surface，调用方不要修改它；半径 < 1 时返回 None
+        """
+        radius = int(radius)
+        if radius < 1:
+            return None
+        color = tuple(color[:3])
+        alpha = self._quantize_alpha(alpha)
+        key = ("circle", radius, color, alpha, width)
+
+        def render():
+            sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (*color, alpha), (radius, radius), radius, width)
+            return sprite
+        return self._get(key, render)
+
+    def blit_circle(self, surface: pygame.surface.Surface, center, radius, color, alpha=255, width=0):
+        """以 center 为圆心绘制缓存的圆形精灵"""
+        sprite = self.circle(radius, color, alpha, width)
+        if sprite is not None:
+            r = int(radius)
+            surface.blit(sprite, (int(center[0]) - r, int(center[1]) - r))
+
+
+# 全局共享的缓存实例
+sprite_cache = SpriteCache()
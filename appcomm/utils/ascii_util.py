@@ -0,0 +1,239 @@
+# 彩色 ASCII 艺术（NumPy 向量化实现）
+# 用法示例:
+#   art = image_to_ascii("images/gou.jpeg", 100)
+#   print(art.to_ansi())
+#   python -m appcomm.utils.ascii_util "images/*" out -f html -w 120
+# 整幅图像一次算出每个字符的字符编号和颜色类别，颜色相同的连续字符（游程）用数组差分找出，
+# 再按需输出为纯文本、ANSI 彩色文本、HTML，或一次性插入 Tk 的 Text 组件
+import argparse
+import glob
+import html
+import os
+import time
+import numpy as np
+from PIL import Image
+from appcomm.utils.batch_util import collect_inputs, output_path
+
+# 从暗到亮排列的字符集
+ASCII_CHARS = "@%#*+=-:. "
+
+# 颜色类别：亮度 < 85 为 dark，< 170 为 medium，其余为 light
+COLOR_CLASSES = ("dark", "medium", "light")
+COLOR_THRESHOLDS = (85, 170)
+
+# 各颜色类别在 Tk / ANSI（256 色）/ HTML 中的颜色
+TK_COLORS = {"dark": "gray", "medium": "Orange", "light": "Gainsboro"}
+ANSI_COLORS = {"dark": 244, "medium": 214, "light": 253}
+HTML_COLORS = {"dark": "#808080", "medium": "#FFA500", "light": "#DCDCDC"}
+
+
+def glyph_lut(chars=ASCII_CHARS) -> np.ndarray:
+    """亮度 -> 字符编码的查找表，与逐像素的 int(brightness / 255 * (len - 1)) 完全相同的浮点运算"""
+    index = (np.arange(256) / 255 * (len(chars) - 1)).astype(np.intp)
+    return np.frombuffer(chars.encode("ascii"), dtype=np.uint8)[index]
+
+
+# 亮度 -> 颜色类别编号的查找表
+CLASS_LUT = np.searchsorted(np.array(COLOR_THRESHOLDS), np.arange(256), side="right").astype(np.uint8)
+
+
+# 一幅 ASCII 艺术：chars 为每个位置的字符，classes 为颜色类别编号，都是 (行, 列) 数组
+class AsciiArt:
+
+    def __init__(self, chars: np.ndarray, classes: np.ndarray):
+        self.chars = chars
+        self.classes = classes
+        self.height, self.width = chars.shape
+
+    def lines(self) -> list:
+        """每行的文本"""
+        text = self.chars.tobytes().decode("ascii")
+        return [text[y * self.width:(y + 1) * self.width] for y in range(self.height)]
+
+    def runs(self):
+        """
+        颜色游程，按行优先排列，游程不跨行
+        返回:
+            (行号, 起始列, 结束列, 颜色类别编号) 四个数组
+        """
+        flat = self.classes.ravel()
+        change = np.ones(flat.size, dtype=bool)
+        change[1:] = flat[1:] != flat[:-1]
+        change[::self.width] = True
+        starts = np.flatnonzero(change)
+        ends = np.append(starts[1:], flat.size)
+        rows = starts // self.width
+        # 游程不跨行，结束位置一定和起始位置在同一行
+        return rows, starts - rows * self.width, ends - rows * self.width, flat[starts]
+
+    def blocks(self) -> list:
+        """与 test_05 原来的返回值相同：每行一个 [(文本, 颜色标签), ...] 列表"""
+        lines = self.lines()
+        result = [[] for _ in range(self.height)]
+        for row, start, end, cls in zip(*(a.tolist() for a in self.runs())):
+            result[row].append((lines[row][start:end], COLOR_CLASSES[cls]))
+        return result
+
+    def tag_ranges(self, first_line=1) -> dict:
+        """
+        Tk Text 的标签范围：{颜色标签: ["行.列", "行.列", ...]}，每两个一组
+        参数:
+            first_line: 艺术文本在 Text 中的起始行号
+        """
+        ranges = {name: [] for name in COLOR_CLASSES}
+        for row, start, end, cls in zip(*(a.tolist() for a in self.runs())):
+            ranges[COLOR_CLASSES[cls]] += (f"{row + first_line}.{start}", f"{row + first_line}.{end}")
+        return ranges
+
+    def to_text(self) -> str:
+        return "\n".join(self.lines()) + "\n"
+
+    def _styled_lines(self, open_tag, close_tag, escape=str) -> list:
+        """每行的文本，每个颜色游程包上 open_tag[颜色类别编号] ... close_tag"""
+        lines = self.lines()
+        result = [[] for _ in range(self.height)]
+        for row, start, end, cls in zip(*(a.tolist() for a in self.runs())):
+            result[row].append(open_tag[cls] + escape(lines[row][start:end]) + close_tag)
+        return ["".join(parts) for parts in result]
+
+    def _styled(self, open_tag, close_tag, escape=str) -> str:
+        return "\n".join(self._styled_lines(open_tag, close_tag, escape)) + "\n"
+
+    def ansi_lines(self, colors=None) -> list:
+        """每行的 ANSI 256 色文本"""
+        colors = colors or ANSI_COLORS
+        return self._styled_lines([f"\033[38;5;{colors[name]}m" for name in COLOR_CLASSES], "\033[0m")
+
+    def to_ansi(self, colors=None) -> str:
+        """ANSI 256 色文本，可以直接打印到终端"""
+        return "\n".join(self.ansi_lines(colors)) + "\n"
+
+    def to_html(self, colors=None, background="#000000", title="") -> str:
+        """独立的 HTML 页面"""
+        colors = colors or HTML_COLORS
+        style = "".join(f".{name}{{color:{colors[name]}}}" for name in COLOR_CLASSES)
+        body = self._styled([f'<span class="{name}">' for name in COLOR_CLASSES], "</span>", html.escape)
+        return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+                f"<style>body{{background:{background}}}pre{{font-family:monospace;line-height:1}}{style}</style>"
+                f"</head><body><pre>\n{body}</pre></body></html>\n")
+
+
+def image_to_ascii(image, output_width=68, chars=ASCII_CHARS) -> AsciiArt:
+    """
+    将图像转换为彩色 ASCII 艺术
+    参数:
+        image: 图像路径或 PIL 图像
+        output_width: 输出宽度（字符数），高度按比例计算并除以 2（字符高度约为宽度的两倍）
+    """
+    if isinstance(image, str):
+        image = Image.open(image)
+    width, height = image.size
+    output_height = int(output_width * (height / width) / 2)
+    gray = np.asarray(image.resize((output_width, output_height)).convert("L"))
+    return AsciiArt(glyph_lut(chars)[gray], CLASS_LUT[gray])
+
+
+def insert_into_text(text_widget, art: AsciiArt):
+    """清空 Tk Text 组件并插入 ASCII 艺术：整段文本一次插入，每种颜色标签一次 tag_add"""
+    text_widget.delete("1.0", "end")
+    text_widget.insert("end", art.to_text())
+    for tag, ranges in art.tag_ranges().items():
+        if ranges:
+            text_widget.tag_add(tag, *ranges)
+
+
+# 输出格式 -> (扩展名, 转换函数)
+FORMATS = {
+    "txt": (".txt", lambda art, path: art.to_text()),
+    "ansi": (".ans", lambda art, path: art.to_ansi()),
+    "html": (".html", lambda art, path: art.to_html(title=os.path.basename(path))),
+}
+
+
+def convert_batch(source, output_dir, fmt="html", output_width=100) -> int:
+    """
+    批量转换，source 可以是目录、glob 模式或单个文件
+    返回:
+        成功转换的文件数
+    """
+    ext, render = FORMATS[fmt]
+    os.makedirs(output_dir, exist_ok=True)
+    count = 0
+    start = time.perf_counter()
+    for path in collect_inputs(source):
+        try:
+            art = image_to_ascii(path, output_width)
+        except Exception as e:
+            print(f"  {os.path.basename(path)} 转换失败: {e}")
+            continue
+        with open(output_path(path, output_dir, "ascii", ext), "w", encoding="utf-8") as f:
+            f.write(render(art, path))
+        count += 1
+    seconds = time.perf_counter() - start
+    print(f"完成 {count} 个文件，用时 {seconds:.2f} s")
+    return count
+
+
+def benchmark(pattern="images/*", output_width=200):
+    """对比 test_05 原来的逐像素转换与向量化转换的耗时，并校验结果一致"""
+
+    def _image_to_ascii_loop(image, output_width):
+        width, height = image.size
+        output_height = int(output_width * (height / width) / 2)
+        image = image.resize((output_width, output_height)).convert("L")
+        ascii_art = []
+        for y in range(output_height):
+            line_blocks = []
+            current_color = None
+            current_text = ""
+            for x in range(output_width):
+                brightness = image.getpixel((x, y))
+                char = ASCII_CHARS[int(brightness / 255 * (len(ASCII_CHARS) - 1))]
+                color = "dark" if brightness < 85 else "medium" if brightness < 170 else "light"
+                if color != current_color:
+                    if current_text:
+                        line_blocks.append((current_text, current_color))
+                    current_text = char
+                    current_color = color
+                else:
+                    current_text += char
+            if current_text:
+                line_blocks.append((current_text, current_color))
+            ascii_art.append(line_blocks)
+        return ascii_art
+
+    print(f"宽度 {output_width} 字符")
+    print(f"{'图像':<28} | {'逐像素':>9} {'向量化':>9} {'游程':>9} {'加速比':>7}  一致")
+    for path in sorted(glob.glob(pattern)):
+        try:
+            image = Image.open(path)
+            image.load()
+        except Exception:
+            continue
+        start = time.perf_counter()
+        expected = _image_to_ascii_loop(image, output_width)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        art = image_to_ascii(image, output_width)
+        fast_time = time.perf_counter() - start
+        start = time.perf_counter()
+        blocks = art.blocks()
+        runs_time = time.perf_counter() - start
+
+        print(f"{os.path.basename(path):<28} | {loop_time * 1000:7.1f}ms {fast_time * 1000:7.1f}ms "
+              f"{runs_time * 1000:7.1f}ms {loop_time / (fast_time + runs_time):6.1f}x  {blocks == expected}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量生成彩色 ASCII 艺术")
+    parser.add_argument("source", help="输入目录、glob 模式或单个文件")
+    parser.add_argument("output_dir", help="输出目录")
+    parser.add_argument("-f", "--format", choices=sorted(FORMATS), default="html", help="输出格式")
+    parser.add_argument("-w", "--width", type=int, default=100, help="输出宽度（字符数）")
+    args = parser.parse_args(argv)
+    convert_batch(args.source, args.output_dir, args.format, args.width)
+
+
+if __name__ == "__main__":
+    main()
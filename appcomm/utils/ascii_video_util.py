@@ -0,0 +1,187 @@
+# 终端实时 ASCII 视频
+# 用法示例:
+#   python -m appcomm.utils.ascii_video_util                  # 摄像头
+#   python -m appcomm.utils.ascii_video_util example_video.mp4 -w 120
+# 每帧：cv2.resize 缩到字符网格 → 查找表把亮度映射成字符和颜色类别 → 与上一帧逐行比较，
+# 只用 ANSI 光标定位重写变化了的行。按视频源的帧率播放，处理跟不上时丢帧（视频文件用 grab 跳过，
+# 不解码），不会越播越慢；结束时报告每帧转换耗时
+import argparse
+import shutil
+import sys
+import time
+import cv2
+import numpy as np
+from appcomm.utils.ascii_util import ASCII_CHARS, CLASS_LUT, AsciiArt, glyph_lut
+
+# 视频源没有报告帧率时使用的帧率
+DEFAULT_FPS = 30.0
+
+# ANSI 控制序列
+ENTER_SCREEN = "\033[?1049h\033[?25l\033[2J"  # 切换到备用屏幕、隐藏光标、清屏
+LEAVE_SCREEN = "\033[0m\033[?25h\033[?1049l"  # 恢复颜色、显示光标、回到原屏幕
+
+
+def open_capture(source):
+    """source 为摄像头编号（整数或数字字符串）或视频文件路径"""
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"无法打开视频源 {source}")
+    return cap
+
+
+def grid_size(frame_width, frame_height, columns=None, max_rows=None):
+    """字符网格的 (列数, 行数)：默认铺满终端宽度，字符高度约为宽度的两倍，行数不超过终端高度"""
+    terminal = shutil.get_terminal_size()
+    columns = columns or terminal.columns
+    max_rows = max_rows or terminal.lines - 1
+    rows = max(1, int(columns * frame_height / frame_width / 2))
+    if rows > max_rows:
+        rows = max_rows
+        columns = max(1, int(rows * 2 * frame_width / frame_height))
+    return columns, rows
+
+
+# 把帧转换成 ASCII 并只输出变化了的行
+class AsciiFrameRenderer:
+
+    def __init__(self, columns, rows, color=True, chars=ASCII_CHARS):
+        self.columns = columns
+        self.rows = rows
+        self.color = color
+        self.glyphs = glyph_lut(chars)
+        self._chars = None
+        self._classes = None
+
+    def reset(self):
+        """下一帧整屏重画"""
+        self._chars = None
+
+    def render(self, frame: np.ndarray) -> str:
+        """
+        参数:
+            frame: BGR 或灰度帧
+        返回:
+            需要写到终端的字符串（只包含变化的行）
+        """
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        gray = cv2.resize(gray, (self.columns, self.rows), interpolation=cv2.INTER_AREA)
+        chars = self.glyphs[gray]
+        classes = CLASS_LUT[gray]
+
+        if self._chars is None:
+            changed = np.arange(self.rows)
+        else:
+            diff = chars != self._chars
+            if self.color:
+                diff |= classes != self._classes
+            changed = np.flatnonzero(diff.any(axis=1))
+        self._chars, self._classes = chars, classes
+        if changed.size == 0:
+            return ""
+
+        art = AsciiArt(chars[changed], classes[changed])
+        lines = art.ansi_lines() if self.color else art.lines()
+        return "".join(f"\033[{row + 1};1H{line}" for row, line in zip(changed.tolist(), lines))
+
+
+def play(source=0, columns=None, color=True, max_frames=None, out=None, stats=True) -> dict:
+    """
+    在终端中播放
+    参数:
+        max_frames: 最多显示的帧数，None 为播放到结束
+        out: 输出流，默认 sys.stdout
+        stats: 是否在最后一行显示帧率、转换耗时和丢帧数
+    返回:
+        {"shown": 显示帧数, "dropped": 丢弃帧数, "latency": 每帧转换耗时（秒）的数组, "bytes": 输出字节数}
+    """
+    out = out or sys.stdout
+    cap = open_capture(source)
+    is_file = cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0
+    if not is_file:
+        # 驱动只缓存最新一帧，处理慢时不会读到积压的旧帧
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    fps = cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+    period = 1.0 / fps
+
+    ok, frame = cap.read()
+    if not ok:
+        cap.release()
+        raise ValueError(f"视频源 {source} 没有可读取的帧")
+    renderer = AsciiFrameRenderer(*grid_size(frame.shape[1], frame.shape[0], columns), color=color)
+
+    latency = []
+    dropped = 0
+    written = 0
+    position = 1  # 已经从视频文件中取出的帧数
+    start = time.perf_counter()
+    out.write(ENTER_SCREEN)
+    try:
+        while True:
+            convert_start = time.perf_counter()
+            text = renderer.render(frame)
+            latency.append(time.perf_counter() - convert_start)
+            if stats:
+                recent = latency[-30:]
+                text += (f"\033[{renderer.rows + 1};1H\033[0m\033[K{fps:.0f} fps | 转换 "
+                         f"{sum(recent) / len(recent) * 1000:5.2f} ms | 丢帧 {dropped}")
+            out.write(text)
+            out.flush()
+            written += len(text.encode("utf-8"))
+            if max_frames is not None and len(latency) >= max_frames:
+                break
+
+            if is_file:
+                # 按时间计算此刻应该显示的帧，落后时跳过中间的帧，提前时等待
+                due = int((time.perf_counter() - start) / period) + 1
+                while position < due:
+                    if not cap.grab():
+                        break
+                    position += 1
+                    dropped += 1
+                wait = start + position * period - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                ok, frame = cap.read()
+                position += 1
+            else:
+                # 摄像头按自己的帧率出帧，read 阻塞到下一帧即可
+                ok, frame = cap.read()
+            if not ok:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cap.release()
+        out.write(LEAVE_SCREEN)
+        out.flush()
+
+    latency = np.array(latency)
+    return {"shown": len(latency), "dropped": dropped, "latency": latency, "bytes": written}
+
+
+def report(result, seconds=None):
+    latency = result["latency"] * 1000
+    print(f"显示 {result['shown']} 帧，丢弃 {result['dropped']} 帧，输出 {result['bytes'] / 1024:.0f} KB")
+    if latency.size:
+        print(f"每帧转换耗时: 平均 {latency.mean():.2f} ms，p95 {np.percentile(latency, 95):.2f} ms，"
+              f"最大 {latency.max():.2f} ms")
+    if seconds:
+        print(f"用时 {seconds:.2f} s，{result['shown'] / seconds:.1f} fps")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="终端实时 ASCII 视频")
+    parser.add_argument("source", nargs="?", default="0", help="摄像头编号或视频文件，默认摄像头 0")
+    parser.add_argument("-w", "--width", type=int, default=None, help="字符列数，默认终端宽度")
+    parser.add_argument("-n", "--max-frames", type=int, default=None, help="最多显示的帧数")
+    parser.add_argument("--no-color", action="store_true", help="不使用颜色")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    result = play(args.source, args.width, not args.no_color, args.max_frames)
+    report(result, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# 批量滤镜处理
+# 用法示例:
+#   python -m appcomm.utils.batch_util images out mosaic -p block_size=15
+#   python -m appcomm.utils.batch_util "images/*.jpg" out invert -p enhance_factor=1.2 -w 4
+#   python -m appcomm.utils.batch_util scans out watercolor -e bmp -t 1024    # 超大图像分块处理
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from PIL import Image
+import appcomm.utils.filter_util as filter_util
+import appcomm.utils.path_util as path_util
+import appcomm.utils.tile_util as tile_util
+from appcomm.utils.param_util import parse_params
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".avif", ".tif", ".tiff")
+
+
+def collect_inputs(source: str) -> list:
+    """source 可以是目录（取其中的图像文件）、glob 模式或单个文件"""
+    if path_util.is_dir(source):
+        paths = [path_util.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source)
+    return sorted(p for p in paths if path_util.is_file(p) and p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def output_path(input_path: str, output_dir: str, filter_name: str, ext=None) -> str:
+    """输出文件名：<输出目录>/<原文件名>_<滤镜名>.<扩展名>，ext 为 None 时沿用原扩展名"""
+    stem, source_ext = os.path.splitext(path_util.get_basename(input_path))
+    ext = ext if ext is None or ext.startswith(".") else "." + ext
+    return path_util.join(output_dir, f"{stem}_{filter_name}{ext or source_ext}")
+
+
+def _params_record(filter_name: str, params: dict) -> dict:
+    """记录在输出文件旁 <输出文件>.json 中的处理参数（经过一次 JSON 往返，元组等与读回的结果一致）"""
+    return json.loads(json.dumps({"filter": filter_name, "params": params or {}}, sort_keys=True, default=repr))
+
+
+def _write_params(output: str, filter_name: str, params: dict):
+    with open(output + ".json", "w", encoding="utf-8") as f:
+        json.dump(_params_record(filter_name, params), f, sort_keys=True)
+
+
+def is_up_to_date(input_path: str, output: str, filter_name=None, params=None) -> bool:
+    """
+    输出文件存在、不比输入文件旧，且（给出 filter_name 时）生成它的滤镜参数与本次相同
+    参数记录缺失或无法读取时视为过期
+    """
+    if not path_util.exists(output) or \
+            path_util.get_modify_time(output) < path_util.get_modify_time(input_path):
+        return False
+    if filter_name is None:
+        return True
+    try:
+        with open(output + ".json", encoding="utf-8") as f:
+            return json.load(f) == _params_record(filter_name, params)
+    except (OSError, ValueError):
+        return False
+
+
+def process_file(filter_name: str, input_path: str, output: str, params: dict, tile_size=None):
+    """
+    读取 → 滤镜 → 保存（在子进程中执行），保存后在旁边记录参数
+    参数:
+        tile_size: 不为 None 时用 tile_util 分块处理，峰值内存由块大小决定（此时不受 PIL 像素数上限限制）
+    返回:
+        (输入路径, 像素数, 耗时秒)
+    """
+    start = time.perf_counter()
+    if tile_size:
+        # 分块处理就是为超大图像准备的，允许超过 PIL 像素数上限
+        width, height = tile_util.process_file(input_path, output, filter_name, params, tile_size, allow_huge=True)
+        _write_params(output, filter_name, params)
+        return input_path, width * height, time.perf_counter() - start
+    rgb = np.asarray(Image.open(input_path).convert("RGB"))
+    result = filter_util.FILTERS[filter_name](rgb, **params)
+    Image.fromarray(result).save(output)
+    _write_params(output, filter_name, params)
+    return input_path, rgb.shape[0] * rgb.shape[1], time.perf_counter() - start
+
+
+def run_batch(source, output_dir, filter_name, params=None, workers=None, ext=None, force=False,
+              tile_size=None) -> list:
+    """
+    批量处理，打印每个文件和总体的吞吐量
+    参数:
+        workers: 进程数，None 为 CPU 核数，0 表示在当前进程内逐个处理
+        force: True 时忽略已是最新的输出，全部重新处理（输出比输入旧或参数不同时总会重新处理）
+        tile_size: 分块处理的块大小，None 为整幅处理
+    返回:
+        [(输入路径, 像素数, 耗时秒), ...]
+    """
+    if filter_name not in filter_util.FILTERS:
+        raise ValueError(f"未知滤镜 {filter_name}，可选: {', '.join(filter_util.FILTERS)}")
+    if tile_size and filter_name not in tile_util.TILED_FILTERS:
+        raise ValueError(f"滤镜 {filter_name} 不支持分块处理，可选: {', '.join(tile_util.TILED_FILTERS)}")
+    params = params or {}
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    skipped = 0
+    for path in collect_inputs(source):
+        output = output_path(path, output_dir, filter_name, ext)
+        if not force and is_up_to_date(path, output, filter_name, params):
+            skipped += 1
+        else:
+            jobs.append((path, output))
+    print(f"{filter_name}: {len(jobs)} 个文件待处理，{skipped} 个已是最新")
+
+    results = []
+
+    def report(result):
+        path, pixels, seconds = result
+        results.append(result)
+        print(f"  {path_util.get_basename(path):<32} {pixels / 1e6:6.2f} MP {seconds * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers > 0 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = {executor.submit(process_file, filter_name, path, output, params, tile_size): path
+                       for path, output in jobs}
+            for future in as_completed(futures):
+                try:
+                    report(future.result())
+                except Exception as e:
+                    print(f"  {path_util.get_basename(futures[future])} 处理失败: {e}")
+    else:
+        for path, output in jobs:
+            try:
+                report(process_file(filter_name, path, output, params, tile_size))
+            except Exception as e:
+                print(f"  {path_util.get_basename(path)} 处理失败: {e}")
+    wall = time.perf_counter() - start
+
+    if results and wall > 0:
+        pixels = sum(r[1] for r in results)
+        print(f"完成 {len(results)} 个文件，用时 {wall:.2f} s，{len(results) / wall:.2f} 张/秒，"
+              f"{pixels / 1e6 / wall:.1f} MP/秒")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量图像滤镜")
+    parser.add_argument("source", help="输入目录、glob 模式或单个文件")
+    parser.add_argument("output_dir", help="输出目录")
+    parser.add_argument("filter", choices=sorted(filter_util.FILTERS), help="滤镜名")
+    parser.add_argument("-p", "--param", action="append", metavar="KEY=VALUE", help="滤镜参数，可重复")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="进程数，默认 CPU 核数，0 为单进程")
+    parser.add_argument("-e", "--ext", default=None, help="输出格式扩展名，默认与输入相同")
+    parser.add_argument("-f", "--force", action="store_true", help="忽略已是最新的输出，全部重新处理")
+    parser.add_argument("-t", "--tile-size", type=int, default=None,
+                        help="分块处理的块大小，适合超大图像；输出为 bmp / ppm 时逐块写入")
+    args = parser.parse_args(argv)
+    run_batch(args.source, args.output_dir, args.filter, parse_params(args.param),
+              workers=args.workers, ext=args.ext, force=args.force, tile_size=args.tile_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# 逐帧处理的缓冲区复用
+# 用法示例:
+#   gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=frame_pool.get("gray", frame.shape[:2]))
+# 视频特效每帧都要生成若干整帧大小的中间结果（灰度图、边缘、掩码……），每次新建数组既要分配内存，
+# 新页还要清零、触发缺页。帧的尺寸一般不变，所以按 (名称, 形状, dtype) 把中间数组留下来，下一帧直接
+# 作为 OpenCV 函数的 dst 参数写入。名称区分同一函数中形状相同的不同中间结果。
+# 缓冲区按线程区分（流水线的多个处理线程互不干扰）；从池中取出的数组只在当前帧内有效，
+# 内容是上一帧留下的，需要时自己清零。会交给其他线程或保留下来的结果不要放在池中
+import threading
+import numpy as np
+
+
+# 按 (名称, 形状, dtype) 复用的帧缓冲，每个线程各有一套
+class FramePool:
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # 各线程累计新分配的数组个数和字节数
+        self.allocations = 0
+        self.allocated_bytes = 0
+
+    def _buffers(self) -> dict:
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        return buffers
+
+    def get(self, name, shape, dtype=np.uint8) -> np.ndarray:
+        """取出缓冲区（内容未定义）；尺寸变化时重新分配"""
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        buffers = self._buffers()
+        key = (name, shape, dtype)
+        buffer = buffers.get(key)
+        if buffer is None:
+            # 同名缓冲区换了尺寸（如切换了视频源），旧的不再需要
+            for old in [k for k in buffers if k[0] == name]:
+                del buffers[old]
+            buffer = buffers[key] = np.empty(shape, dtype)
+            with self._lock:
+                self.allocations += 1
+                self.allocated_bytes += buffer.nbytes
+        return buffer
+
+    def zeros(self, name, shape, dtype=np.uint8) -> np.ndarray:
+        """取出并清零"""
+        buffer = self.get(name, shape, dtype)
+        buffer.fill(0)
+        return buffer
+
+    def clear(self):
+        """释放当前线程的全部缓冲区"""
+        self._buffers().clear()
+
+    def nbytes(self) -> int:
+        """当前线程持有的缓冲区总字节数"""
+        return sum(buffer.nbytes for buffer in self._buffers().values())
+
+
+# 各特效共用的缓冲池
+frame_pool = FramePool()
@@ -0,0 +1,306 @@
+# 图像特效输出的内容寻址缓存
+# 用法示例:
+#   effect_cache.fetch(output_path, [input_path], "mosaic", {"block_size": 15}, render, depends=(filter_util,))
+#
+#   @effect_cache.cached("sepia", depends=(filter_util,))      # 只写出文件、没有别的作用的函数
+#   def render_sepia(input_path, output_path, intensity=0.8): ...
+#
+#   python -m appcomm.utils.cache_util stats | clear
+# 缓存键是以下内容的 SHA-256：
+#   输入文件的内容哈希（按 路径 + 修改时间 + 大小 记住，文件不变就不重复计算）、滤镜名、参数、
+#   输出扩展名、代码版本（生成函数和所依赖模块的源码哈希，改了代码自动失效）
+# 命中时把缓存文件复制到输出路径；未命中时运行生成函数，再把输出存入缓存。
+# 所有写入都先写临时文件再 os.replace，多个进程同时运行也不会读到半个文件。
+# 缓存总大小超过上限时按最近使用时间（文件修改时间，命中时刷新）淘汰。
+# 设置环境变量 APPCOMM_NO_CACHE=1 可以整体绕过缓存
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import time
+
+# 默认缓存目录，可用环境变量 APPCOMM_CACHE_DIR 修改
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "appcomm", "effects")
+
+# 默认缓存大小上限（字节）
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# 读文件计算哈希时每次读取的字节数
+_HASH_CHUNK = 1024 * 1024
+
+
+def _atomic_write(path, data: bytes):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _atomic_copy(source, target):
+    directory = os.path.dirname(os.path.abspath(target))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.splitext(target)[1])
+    os.close(fd)
+    try:
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, target)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _source_hash(obj) -> str:
+    """模块、函数的源码哈希；拿不到源码时退化为字节码"""
+    try:
+        source = inspect.getsource(obj).encode("utf-8")
+    except (OSError, TypeError):
+        source = getattr(getattr(obj, "__code__", None), "co_code", repr(obj).encode("utf-8"))
+    return hashlib.sha256(source).hexdigest()
+
+
+def expand_inputs(inputs) -> list:
+    """输入可以是文件或目录（取目录下的全部文件，按名字排序）"""
+    paths = []
+    for path in ([inputs] if isinstance(inputs, str) else inputs):
+        if os.path.isdir(path):
+            paths += sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if os.path.isfile(os.path.join(path, name)))
+        else:
+            paths.append(path)
+    return paths
+
+
+class EffectCache:
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES, enabled=None, by_content=True):
+        """
+        参数:
+            root: 缓存目录，None 时取 APPCOMM_CACHE_DIR 或 DEFAULT_CACHE_DIR
+            enabled: None 时由环境变量 APPCOMM_NO_CACHE 决定
+            by_content: True 按文件内容识别输入；False 只看 路径 + 修改时间 + 大小（更快，但复制、改名后不能命中）
+        """
+        self.root = root or os.environ.get("APPCOMM_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.enabled = os.environ.get("APPCOMM_NO_CACHE", "") in ("", "0") if enabled is None else enabled
+        self.by_content = by_content
+        # 本进程内的统计
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "seconds_saved": 0.0}
+        self._digests = None
+
+    # --- 缓存键 ---
+    def _digest_memo_path(self):
+        return os.path.join(self.root, "digests.json")
+
+    def file_digest(self, path) -> str:
+        """文件内容的 SHA-256；按 (绝对路径, 修改时间, 大小) 记住结果"""
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        if not self.by_content:
+            return f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+        if self._digests is None:
+            try:
+                with open(self._digest_memo_path(), encoding="utf-8") as f:
+                    self._digests = json.load(f)
+            except (OSError, ValueError):
+                self._digests = {}
+        memo = self._digests.get(path)
+        if memo and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+            return memo[2]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                sha.update(chunk)
+        self._digests[path] = [stat.st_mtime_ns, stat.st_size, sha.hexdigest()]
+        _atomic_write(self._digest_memo_path(), json.dumps(self._digests).encode("utf-8"))
+        return sha.hexdigest()
+
+    def key(self, inputs, filter_name, params=None, ext="", version="") -> str:
+        description = {
+            "inputs": [self.file_digest(path) for path in expand_inputs(inputs)],
+            "filter": filter_name,
+            "params": params or {},
+            "ext": ext.lower(),
+            "version": version,
+        }
+        text = json.dumps(description, sort_keys=True, default=repr)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def version(*objects) -> str:
+        """代码版本：各函数 / 模块源码哈希的组合"""
+        return hashlib.sha256("".join(_source_hash(obj) for obj in objects).encode()).hexdigest()[:16]
+
+    def _object_path(self, key, ext):
+        return os.path.join(self.root, "objects", key[:2], key + ext.lower())
+
+    # --- 读写 ---
+    def fetch(self, output_path, inputs, filter_name, params, produce, depends=()) -> bool:
+        """
+        取得 output_path：命中时从缓存复制，否则调用 produce(output_path) 生成后存入缓存
+        参数:
+            inputs: 输入文件 / 目录（或它们的列表）
+            produce: 写出 output_path 的函数；没有写出文件时（如输入有误）不缓存
+            depends: 影响结果的模块或函数，与 produce 一起组成代码版本
+        返回:
+            是否命中缓存
+        """
+        paths = expand_inputs(inputs)
+        if not self.enabled or not paths or not all(os.path.isfile(p) for p in paths):
+            # 缓存关闭或输入不存在时直接运行，由生成函数自己报告错误
+            produce(output_path)
+            return False
+
+        ext = os.path.splitext(output_path)[1]
+        key = self.key(paths, filter_name, params, ext, self.version(produce, *depends))
+        cached = self._object_path(key, ext)
+        if os.path.exists(cached):
+            _atomic_copy(cached, output_path)
+            os.utime(cached)  # 刷新最近使用时间
+            self.stats["hits"] += 1
+            self.stats["seconds_saved"] += self._meta(cached).get("seconds", 0.0)
+            self._record("hits")
+            return True
+
+        self.stats["misses"] += 1
+        self._record("misses")
+        # 生成函数可能自己捕获异常后直接返回，用修改时间区分新写出的文件和上次留下的旧文件
+        before = os.stat(output_path).st_mtime_ns if os.path.isfile(output_path) else None
+        start = time.perf_counter()
+        produce(output_path)
+        seconds = time.perf_counter() - start
+        if os.path.isfile(output_path) and os.stat(output_path).st_mtime_ns != before:
+            _atomic_copy(output_path, cached)
+            _atomic_write(cached + ".json", json.dumps({"filter": filter_name, "seconds": seconds}).encode())
+            self.stats["stores"] += 1
+            self.evict()
+        return False
+
+    def cached(self, filter_name, depends=()):
+        """
+        装饰 f(输入路径, 输出路径, **参数) 形式的特效函数：
+        第一个参数是输入文件或目录，第二个参数是输出路径，其余参数计入缓存键
+        命中时整个函数都不会运行，只适合除了写出输出文件之外没有别的作用（打印、显示结果等）的函数；
+        否则用 fetch 只包住生成输出的那一步
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                values = list(bound.arguments.items())
+                input_path, output_path = values[0][1], values[1][1]
+                params = dict(values[2:])
+                result = []
+
+                def produce(path):
+                    result.append(func(*args, **kwargs))
+
+                if self.fetch(output_path, input_path, filter_name, params, produce, (func,) + tuple(depends)):
+                    print(f"命中缓存: {output_path}")
+                return result[0] if result else None
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _meta(cached) -> dict:
+        """缓存对象的元数据（滤镜名、生成耗时）"""
+        try:
+            with open(cached + ".json", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # --- 统计与淘汰 ---
+    def _stats_path(self):
+        return os.path.join(self.root, "stats.json")
+
+    def totals(self) -> dict:
+        """跨进程累计的命中 / 未命中次数"""
+        try:
+            with open(self._stats_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def _record(self, field):
+        totals = self.totals()
+        totals[field] = totals.get(field, 0) + 1
+        _atomic_write(self._stats_path(), json.dumps(totals).encode("utf-8"))
+
+    def entries(self) -> list:
+        """[(最近使用时间, 大小, 路径), ...]，每个缓存对象一项（大小含其元数据文件）"""
+        result = []
+        objects = os.path.join(self.root, "objects")
+        if not os.path.isdir(objects):
+            return result
+        for directory in os.listdir(objects):
+            for name in os.listdir(os.path.join(objects, directory)):
+                path = os.path.join(objects, directory, name)
+                if name.startswith(".tmp-") or name.endswith(".json"):
+                    continue
+                try:
+                    stat = os.stat(path)
+                    meta_size = os.path.getsize(path + ".json") if os.path.exists(path + ".json") else 0
+                except OSError:
+                    continue
+                result.append((stat.st_mtime, stat.st_size + meta_size, path))
+        return result
+
+    def evict(self):
+        """总大小超过上限时，从最久未使用的对象开始删除"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            for victim in (path, path + ".json"):
+                try:
+                    os.remove(victim)
+                except OSError:
+                    pass
+            total -= size
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def report(self) -> str:
+        entries = self.entries()
+        totals = self.totals()
+        requests = totals.get("hits", 0) + totals.get("misses", 0)
+        rate = totals.get("hits", 0) / requests if requests else 0.0
+        return (f"缓存 {self.root}: {len(entries)} 项，{sum(e[1] for e in entries) / 2 ** 20:.1f} MB"
+                f" / {self.max_bytes / 2 ** 20:.0f} MB；累计命中 {totals.get('hits', 0)}，"
+                f"未命中 {totals.get('misses', 0)}，命中率 {rate:.0%}；本次命中 {self.stats['hits']}，"
+                f"节省 {self.stats['seconds_saved']:.2f} s")
+
+
+# 供各特效脚本共用的缓存
+effect_cache = EffectCache()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="图像特效缓存")
+    parser.add_argument("command", choices=("stats", "clear"))
+    args = parser.parse_args(argv)
+    if args.command == "clear":
+        effect_cache.clear()
+        print(f"已清空 {effect_cache.root}")
+    else:
+        print(effect_cache.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# 卡通化（test_29）：双边滤波平滑颜色 + 自适应阈值轮廓线
+# 用法示例:
+#   cartoon = cartoonize(cv2.imread("images/gou.jpeg"), size=(600, 400))             # 与 test_29 完全相同
+#   cartoon = cartoonize(image, fast=True)                                          # 快速版
+#   python -m appcomm.utils.cartoon_util images/gou.jpeg out/cartoon_fast.jpg --fast
+#   python -m appcomm.utils.cartoon_util --benchmark images/katong.png               # PSNR / 耗时对比
+# 双边滤波的耗时与 像素数 x 邻域直径² 成正比，是整个流程中最慢的一步。快速版先用图像金字塔缩小
+# levels 次（每次宽高减半），在小图上做 passes 次小邻域的双边滤波（缩小一次后直径 5 的邻域约等于原图的 10），
+# 再放大回原尺寸；轮廓线仍在原分辨率上计算，所以线条不会变粗变糊
+import argparse
+import glob
+import os
+import time
+import cv2
+import numpy as np
+
+# 快速版的默认参数：缩小一次，直径 5 的双边滤波做一遍（性能测试中与单次原分辨率滤波最接近；
+# 想要更平的色块可以增加遍数）
+FAST_LEVELS = 1
+FAST_PASSES = 1
+FAST_D = 5
+
+
+def cartoon_edges(image, median_ksize=7, block_size=9, c=2, bgr=True) -> np.ndarray:
+    """轮廓线：灰度 → 中值滤波去噪 → 自适应阈值（线条为黑色），返回三通道"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if bgr else cv2.COLOR_RGB2GRAY)
+    blurred = cv2.medianBlur(gray, median_ksize)
+    edges = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY,
+                                  blockSize=block_size, C=c)
+    return cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
+
+
+def smooth_colors(image, d=9, sigma_color=300, sigma_space=300) -> np.ndarray:
+    """原分辨率上一次双边滤波（test_29 的做法）"""
+    return cv2.bilateralFilter(image, d=d, sigmaColor=sigma_color, sigmaSpace=sigma_space)
+
+
+def smooth_colors_fast(image, levels=FAST_LEVELS, passes=FAST_PASSES, d=FAST_D, sigma_color=300,
+                       sigma_space=300) -> np.ndarray:
+    """
+    金字塔缩小 levels 次 → passes 次直径 d 的双边滤波 → 金字塔放大回原尺寸
+    sigma_space 按缩小倍数同比缩小，保持相对原图的空间尺度
+    """
+    sizes = []
+    small = image
+    for _ in range(levels):
+        sizes.append((small.shape[1], small.shape[0]))
+        small = cv2.pyrDown(small)
+    space = sigma_space / (1 << levels)
+    for _ in range(passes):
+        small = cv2.bilateralFilter(small, d=d, sigmaColor=sigma_color, sigmaSpace=space)
+    for size in reversed(sizes):
+        small = cv2.pyrUp(small, dstsize=size)
+    return small
+
+
+def cartoonize(image, size=None, fast=False, d=9, sigma_color=300, sigma_space=300, median_ksize=7,
+               block_size=9, c=2, levels=FAST_LEVELS, passes=FAST_PASSES, fast_d=FAST_D, bgr=True) -> np.ndarray:
+    """
+    卡通化
+    参数:
+        image: (高, 宽, 3) uint8 数组，默认 BGR（cv2.imread 的结果）；RGB 数组传 bgr=False
+        size: 先缩放到 (宽, 高)，None 为不缩放
+        fast: False 时与 test_29 完全相同；True 时颜色平滑走金字塔快速版（levels、passes、fast_d）
+        d, sigma_color, sigma_space: 双边滤波参数（快速版使用 sigma_color 和按比例缩小的 sigma_space）
+        median_ksize, block_size, c: 轮廓线参数
+    """
+    if size is not None:
+        image = cv2.resize(image, tuple(size))
+    if fast:
+        color_image = smooth_colors_fast(image, levels, passes, fast_d, sigma_color, sigma_space)
+    else:
+        color_image = smooth_colors(image, d, sigma_color, sigma_space)
+    return cv2.bitwise_and(color_image, cartoon_edges(image, median_ksize, block_size, c, bgr))
+
+
+# --- 性能测试 ---
+def psnr(a, b) -> float:
+    mse = np.mean((a.astype(np.float32) - b.astype(np.float32)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def _best_time(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+# 性能测试的快速版参数组合：(levels, passes, fast_d)
+BENCHMARK_VARIANTS = [(1, 1, 5), (1, 2, 5), (1, 3, 5), (1, 2, 7), (2, 2, 5), (2, 3, 5)]
+
+
+def benchmark(input_path="images/katong.png", reference_path="out/cartoon_output.jpg",
+              sizes=((600, 400), (1920, 1280))):
+    """
+    各种快速版参数相对单次双边滤波的耗时和 PSNR
+    参数:
+        input_path: 输入图像；不存在时改用 images/ 下的第一张图片
+        reference_path: test_29 保存的结果，输入图像与它对应时（600x400）一并比较
+        sizes: 测试的尺寸，None 为原图尺寸（尺寸越大，快速版的优势越明显）
+    两种做法的轮廓线相同，被线条涂黑的像素完全一致，会抬高整幅图的 PSNR，所以同时给出颜色层（双边滤波结果）的 PSNR
+    """
+    image = cv2.imread(input_path)
+    compare_saved = image is not None and os.path.exists(reference_path)
+    if image is None:
+        candidates = [p for p in sorted(glob.glob("images/*")) if cv2.imread(p) is not None]
+        print(f"找不到 {input_path}，改用 {candidates[0]}（不与 {reference_path} 比较）")
+        input_path = candidates[0]
+        image = cv2.imread(input_path)
+    saved = cv2.imread(reference_path) if compare_saved else None
+
+    for size in sizes:
+        resized = cv2.resize(image, size) if size else image
+        height, width = resized.shape[:2]
+        print(f"{input_path} {width}x{height}")
+        reference_time, reference = _best_time(lambda: cartoonize(resized))
+        reference_colors = smooth_colors(resized)
+        line = f"  {'单次双边滤波 d=9':<24} {reference_time * 1000:8.1f} ms"
+        if saved is not None and saved.shape == reference.shape:
+            # 保存的是 JPEG，有压缩误差；同时给出单次滤波结果本身相对它的 PSNR 作为上限参考
+            line += f"  相对 {os.path.basename(reference_path)} {psnr(reference, saved):5.2f} dB"
+        print(line)
+        for levels, passes, fast_d in BENCHMARK_VARIANTS:
+            seconds, result = _best_time(lambda: cartoonize(resized, fast=True, levels=levels, passes=passes,
+                                                            fast_d=fast_d))
+            line = (f"  {f'金字塔 {levels} 级 {passes} 遍 d={fast_d}':<24} {seconds * 1000:8.1f} ms"
+                    f"  {reference_time / seconds:5.1f}x  PSNR {psnr(result, reference):5.2f} dB"
+                    f"  颜色层 {psnr(smooth_colors_fast(resized, levels, passes, fast_d), reference_colors):5.2f} dB")
+            if saved is not None and saved.shape == result.shape:
+                line += f"  相对 {os.path.basename(reference_path)} {psnr(result, saved):5.2f} dB"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="卡通化")
+    parser.add_argument("input", nargs="?", default="images/katong.png", help="输入图像")
+    parser.add_argument("output", nargs="?", default="out/cartoon_output.jpg", help="输出图像")
+    parser.add_argument("--size", type=int, nargs=2, metavar=("宽", "高"), default=None, help="先缩放到指定尺寸")
+    parser.add_argument("--fast", action="store_true", help="使用金字塔快速版")
+    parser.add_argument("--levels", type=int, default=FAST_LEVELS, help="快速版缩小次数")
+    parser.add_argument("--passes", type=int, default=FAST_PASSES, help="快速版双边滤波遍数")
+    parser.add_argument("--benchmark", action="store_true", help="性能测试：input 为输入图像，output 为 test_29 保存的结果")
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        benchmark(args.input, args.output)
+        return
+    image = cv2.imread(args.input)
+    if image is None:
+        raise SystemExit(f"无法读取 {args.input}")
+    start = time.perf_counter()
+    result = cartoonize(image, args.size, args.fast, levels=args.levels, passes=args.passes)
+    print(f"用时 {(time.perf_counter() - start) * 1000:.1f} ms")
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    cv2.imwrite(args.output, result)
+
+
+if __name__ == "__main__":
+    main()
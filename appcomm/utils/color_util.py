@@ -0,0 +1,297 @@
+# 逐像素颜色变换引擎
+# 亮度 / 对比度 / 反色 / 棕褐色等运算不逐个生成整幅中间图，而是先编译成
+#   q = LUT_pre[p]                        颜色矩阵之前的逐通道运算合成一张查找表
+#   s = clip(M @ [q, 1])                  颜色矩阵（3x4 仿射，连续的矩阵合并为一个）
+#   s = s + w * (s - x)，x 为 p 或 q       可选：按强度与变换输入或矩阵输入混合
+#   out = LUT_post[s]                     颜色矩阵之后的逐通道运算合成另一张查找表
+# 再按行带一次遍历 uint8 数据写入输出缓冲（可以是输入本身），中间量只有一个行带大小；
+# 每一步的裁剪和截断方式都与 PIL 一致，与逐步处理的差别只来自 float32 舍入
+import multiprocessing
+import time
+import cv2
+import numpy as np
+from PIL import Image, ImageEnhance, ImageOps
+from appcomm.utils.memory_util import PeakMemory
+
+# 每次处理的行数
+BAND_ROWS = 64
+
+SEPIA_MATRIX = np.array([[0.393, 0.769, 0.189],
+                         [0.349, 0.686, 0.168],
+                         [0.272, 0.534, 0.131]], dtype=np.float32)
+
+_IDENTITY = np.hstack([np.eye(3, dtype=np.float32), np.zeros((3, 1), dtype=np.float32)])
+
+
+def _blend(a, b, alpha):
+    """Image.blend 的语义：a + alpha * (b - a)，float32 计算后裁剪并向零截断"""
+    mixed = (np.asarray(b, dtype=np.float32) - np.asarray(a, dtype=np.float32)) * np.float32(alpha) + a
+    return np.clip(mixed, 0, 255).astype(np.uint8)
+
+
+def _luma_sum(band: np.ndarray) -> int:
+    """行带灰度值之和，灰度转换交给 PIL，保证与 image.convert("L") 逐像素一致"""
+    histogram = Image.fromarray(band).convert("L").histogram()
+    return sum(value * count for value, count in enumerate(histogram))
+
+
+def luminance_mean(rgb: np.ndarray) -> int:
+    """与 ImageStat.Stat(image.convert("L")).mean 取整后一致的平均亮度，按行带累加"""
+    total = sum(_luma_sum(rgb[y0:y0 + BAND_ROWS]) for y0 in range(0, rgb.shape[0], BAND_ROWS))
+    return int(total / (rgb.shape[0] * rgb.shape[1]) + 0.5)
+
+
+# 编译后的变换
+class _Compiled:
+
+    def __init__(self, pre=None, matrix=None, mix=None, post=None):
+        """
+        参数:
+            pre / post: (256, 3) uint8 查找表或 None
+            matrix: (3, 4) float32 或 None
+            mix: (强度, 是否与变换输入混合) 或 None
+        """
+        self.pre = pre
+        self.matrix = matrix
+        self.mix = mix
+        self.post = post
+
+    @staticmethod
+    def _lookup(lut, band, out):
+        return cv2.LUT(band, lut.reshape(256, 1, 3), dst=out)
+
+    def band(self, band: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """变换一个 (行, 宽, 3) uint8 行带，out 为 None 时返回新数组"""
+        if out is None:
+            out = np.empty_like(band)
+        q = band
+        if self.pre is not None:
+            q = self._lookup(self.pre, band, np.empty_like(band) if self.mix else out)
+        if self.matrix is not None:
+            s = cv2.transform(q.astype(np.float32), self.matrix)
+            np.clip(s, 0, 255, out=s)
+            if self.mix is not None:
+                # 先像 astype(uint8) 一样截断，再按 Image.blend 的方式混合
+                np.floor(s, out=s)
+                weight, with_source = self.mix
+                other = (band if with_source else q).astype(np.float32)
+                s -= other
+                s *= np.float32(weight)
+                s += other
+                np.clip(s, 0, 255, out=s)
+            out[...] = s
+            q = out
+        if self.post is not None:
+            self._lookup(self.post, q, out)
+        elif q is not out:
+            out[...] = q
+        return out
+
+
+def _channel_op(lut, op, mean=None):
+    """在查找表上执行一步逐通道运算（与 PIL 逐步截断一致）"""
+    kind = op[0]
+    if kind == "brightness":
+        return _blend(0, lut, op[1])
+    if kind == "contrast":
+        return _blend(mean, lut, op[1])
+    return 255 - lut
+
+
+def _is_identity(lut) -> bool:
+    return np.array_equal(lut, np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1))
+
+
+# 颜色变换：链式添加运算，apply() 时编译并一次遍历
+class ColorTransform:
+
+    def __init__(self):
+        self.ops = []
+
+    def __len__(self):
+        return len(self.ops)
+
+    # --- 逐通道运算 ---
+    def brightness(self, factor):
+        """ImageEnhance.Brightness"""
+        self.ops.append(("brightness", factor))
+        return self
+
+    def contrast(self, factor, mean=None):
+        """ImageEnhance.Contrast；mean 为 None 时在 apply() 时取该步输入的平均亮度"""
+        self.ops.append(("contrast", factor, mean))
+        return self
+
+    def invert(self):
+        """ImageOps.invert"""
+        self.ops.append(("invert",))
+        return self
+
+    # --- 颜色矩阵 ---
+    def matrix(self, matrix, bias=(0.0, 0.0, 0.0)):
+        """out = clip(matrix @ rgb + bias)"""
+        self.ops.append(("matrix", np.asarray(matrix, dtype=np.float32), np.asarray(bias, dtype=np.float32)))
+        return self
+
+    def sepia(self, intensity=1.0, source=False):
+        """
+        棕褐色矩阵，intensity < 1 时按比例混合
+        参数:
+            source: False 与这一步的输入混合，True 与整个变换的输入混合（test_28 的做法）
+        """
+        self.matrix(SEPIA_MATRIX)
+        if intensity < 1.0:
+            self.ops.append(("mix", intensity, source))
+        return self
+
+    # --- 编译 ---
+    def compile(self, rgb: np.ndarray = None) -> _Compiled:
+        """
+        编译成 查找表 + 3x4 矩阵 + 查找表
+        参数:
+            rgb: 输入图像，只在对比度需要计算平均亮度时使用
+        """
+        identity = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+        compiled = _Compiled(pre=identity.copy())
+        for op in self.ops:
+            kind = op[0]
+            if kind in ("brightness", "contrast", "invert"):
+                mean = op[2] if kind == "contrast" else None
+                if kind == "contrast" and mean is None:
+                    mean = self._mean_through(rgb, compiled)
+                if compiled.matrix is None:
+                    compiled.pre = _channel_op(compiled.pre, op, mean)
+                else:
+                    compiled.post = _channel_op(identity if compiled.post is None else compiled.post, op, mean)
+            elif kind == "matrix":
+                if compiled.mix is not None or compiled.post is not None:
+                    raise ValueError("颜色矩阵之后已有混合或逐通道运算，请拆成两个 ColorTransform")
+                a, b = op[1], op[2]
+                m = _IDENTITY if compiled.matrix is None else compiled.matrix
+                compiled.matrix = np.hstack([a @ m[:, :3], (a @ m[:, 3] + b)[:, None]]).astype(np.float32)
+            else:  # mix
+                if compiled.matrix is None or compiled.mix is not None or compiled.post is not None:
+                    raise ValueError("混合只能紧跟在颜色矩阵之后")
+                compiled.mix = (op[1], op[2])
+
+        if _is_identity(compiled.pre):
+            compiled.pre = None
+        if compiled.post is not None and _is_identity(compiled.post):
+            compiled.post = None
+        return compiled
+
+    @staticmethod
+    def _mean_through(rgb, compiled) -> int:
+        """按行带把目前已编译的部分作用到输入上，求其平均亮度"""
+        if rgb is None:
+            raise ValueError("对比度需要输入图像来计算平均亮度")
+        partial = _Compiled(compiled.pre, compiled.matrix, compiled.mix, compiled.post)
+        total = 0
+        for y0 in range(0, rgb.shape[0], BAND_ROWS):
+            total += _luma_sum(partial.band(rgb[y0:y0 + BAND_ROWS]))
+        return int(total / (rgb.shape[0] * rgb.shape[1]) + 0.5)
+
+    def apply(self, rgb: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        按行带一次遍历
+        参数:
+            rgb: (高, 宽, 3) uint8 数组
+            out: 输出缓冲（可以是 rgb 本身），None 时新建
+        """
+        compiled = self.compile(rgb)
+        if out is None:
+            out = np.empty_like(rgb)
+        for y0 in range(0, rgb.shape[0], BAND_ROWS):
+            compiled.band(rgb[y0:y0 + BAND_ROWS], out[y0:y0 + BAND_ROWS])
+        return out
+
+
+# --- 性能测试 ---
+def _sepia_reference(img, intensity, contrast, brightness):
+    """test_28 原来的 create_sepia_effect"""
+    sepia_img = img.copy()
+    if contrast != 1.0:
+        sepia_img = ImageEnhance.Contrast(sepia_img).enhance(contrast)
+    if brightness != 1.0:
+        sepia_img = ImageEnhance.Brightness(sepia_img).enhance(brightness)
+    pixels = np.array(sepia_img)
+    r, g, b = pixels[:, :, 0], pixels[:, :, 1], pixels[:, :, 2]
+    new_r = np.clip(0.393 * r + 0.769 * g + 0.189 * b, 0, 255).astype(np.uint8)
+    new_g = np.clip(0.349 * r + 0.686 * g + 0.168 * b, 0, 255).astype(np.uint8)
+    new_b = np.clip(0.272 * r + 0.534 * g + 0.131 * b, 0, 255).astype(np.uint8)
+    sepia_result = Image.fromarray(np.dstack((new_r, new_g, new_b)))
+    if intensity < 1.0:
+        return Image.blend(img, sepia_result, intensity)
+    return sepia_result
+
+
+def _invert_reference(img, enhance_factor):
+    """test_25 原来的 create_color_invert"""
+    inverted_image = ImageOps.invert(img)
+    if enhance_factor != 1.0:
+        inverted_image = ImageEnhance.Contrast(inverted_image).enhance(enhance_factor)
+    return inverted_image
+
+
+def _sepia_transform(intensity, contrast, brightness):
+    transform = ColorTransform()
+    if contrast != 1.0:
+        transform.contrast(contrast)
+    if brightness != 1.0:
+        transform.brightness(brightness)
+    return transform.sepia(intensity, source=True)
+
+
+def _measure(path, case, repeat, queue):
+    """在独立进程中运行，返回 (单次耗时, 峰值私有内存增量 MB, 结果)"""
+    img = Image.open(path).convert("RGB")
+    rgb = np.array(img)
+    buffer = np.empty_like(rgb)
+    name, params = case
+    with PeakMemory() as peak:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            if name == "sepia_pil":
+                result = np.asarray(_sepia_reference(img, *params))
+            elif name == "sepia_fused":
+                result = _sepia_transform(*params).apply(rgb, buffer)
+            elif name == "invert_pil":
+                result = np.asarray(_invert_reference(img, *params))
+            else:
+                result = ColorTransform().invert().contrast(params[0]).apply(rgb, buffer)
+        seconds = (time.perf_counter() - start) / repeat
+    queue.put((seconds, peak.mb, result))
+
+
+def benchmark(path="images/gou2-2.jpg", repeat=5):
+    """对比 test_28 / test_25 原来的逐步处理与融合变换的耗时、峰值内存增量和误差（每种情况一个新进程）"""
+    context = multiprocessing.get_context("spawn")
+
+    def run(case):
+        queue = context.Queue()
+        process = context.Process(target=_measure, args=(path, case, repeat, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        return result
+
+    size = Image.open(path).size
+    print(f"{path} {size[0]}x{size[1]}")
+    print(f"{'':<28} | {'逐步处理':>16} | {'融合变换':>16} | 最大误差  PSNR")
+    cases = [
+        ("棕褐色 强度0.8 对比1.2", "sepia", (0.8, 1.2, 1.0)),
+        ("棕褐色 强度1.0 对比1.5 亮度1.3", "sepia", (1.0, 1.5, 1.3)),
+        ("反色 对比1.2", "invert", (1.2,)),
+    ]
+    for label, name, params in cases:
+        slow_time, slow_peak, expected = run((name + "_pil", params))
+        fast_time, fast_peak, result = run((name + "_fused", params))
+        diff = np.abs(expected.astype(np.int16) - result).max()
+        mse = np.mean((expected.astype(np.float32) - result) ** 2)
+        psnr = "  inf" if mse == 0 else f"{10 * np.log10(255 ** 2 / mse):5.1f}"
+        print(f"{label:<28} | {slow_time * 1000:6.1f}ms {slow_peak:5.1f}MB | "
+              f"{fast_time * 1000:6.1f}ms {fast_peak:5.1f}MB | {diff:6d}  {psnr}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,164 @@
+# 惰性滤镜图
+# 用法示例:
+#   graph = FilterGraph("images/meizhao2.jpg").watercolor().sepia(0.8).contrast(1.1)
+#   graph.save("out/meizhao2_vintage.jpg")
+# 链式调用只记录节点，run() 时才读图并一次执行完：
+#   - 相邻的逐像素运算（亮度 / 对比度 / 反色 / 棕褐色）编译成一个 ColorTransform，按行带一次遍历完成
+#   - 每个节点声明自己的数据形式（PIL 图像或 NumPy 数组），只在形式变化时才转换
+import numpy as np
+from PIL import Image, ImageFilter
+import appcomm.utils.filter_util as filter_util
+from appcomm.utils.color_util import ColorTransform
+
+# 逐像素运算：名字 -> ColorTransform 的方法名
+POINT_OPS = {
+    "brightness": "brightness",
+    "contrast": "contrast",
+    "invert": "invert",
+    "sepia": "sepia",
+}
+
+# 整图运算：名字 -> (函数, 数据形式 "pil" / "array")
+IMAGE_OPS = {
+    "blur": (lambda img, radius=2: img.filter(ImageFilter.GaussianBlur(radius=radius)), "pil"),
+    "watercolor_base": (filter_util.watercolor_base_image, "pil"),
+    "dreamy": (filter_util.dreamy_blur_image, "pil"),
+    "mosaic": (filter_util.mosaic, "array"),
+    "cartoon": (filter_util.cartoon, "array"),
+}
+
+
+def register(name, func, domain="array"):
+    """注册自定义整图节点，func(图像, **参数) 接收并返回 domain 形式的 RGB 图像"""
+    IMAGE_OPS[name] = (func, domain)
+
+
+def _to_domain(value, domain):
+    if domain == "pil":
+        return value if isinstance(value, Image.Image) else Image.fromarray(value)
+    return np.asarray(value) if isinstance(value, Image.Image) else value
+
+
+# 惰性滤镜图：每次链式调用返回新的图，原图不变，可以复用同一条链处理多张图像
+class FilterGraph:
+
+    def __init__(self, source=None, nodes=()):
+        """
+        参数:
+            source: 图像路径、PIL 图像或 (高, 宽, 3) uint8 数组，也可以在 run() 时再给
+        """
+        self.source = source
+        self.nodes = tuple(nodes)
+        # 上一次 run() 中 PIL 与数组之间的转换次数
+        self.conversions = 0
+
+    def then(self, name, **params) -> "FilterGraph":
+        if name not in POINT_OPS and name not in IMAGE_OPS:
+            raise ValueError(f"未知节点 {name}")
+        return FilterGraph(self.source, self.nodes + ((name, params),))
+
+    # --- 逐像素节点 ---
+    def brightness(self, factor):
+        return self.then("brightness", factor=factor)
+
+    def contrast(self, factor):
+        return self.then("contrast", factor=factor)
+
+    def invert(self):
+        return self.then("invert")
+
+    def sepia(self, intensity=1.0):
+        return self.then("sepia", intensity=intensity)
+
+    # --- 整图节点 ---
+    def blur(self, radius=2):
+        return self.then("blur", radius=radius)
+
+    def mosaic(self, block_size=10):
+        return self.then("mosaic", block_size=block_size)
+
+    def watercolor(self, blur_radius=5, color_boost=1.5):
+        # 水彩的最后两步（提亮、增强对比度）是逐像素运算，拆出来与后续节点融合
+        return self.then("watercolor_base", blur_radius=blur_radius, color_boost=color_boost) \
+            .brightness(1.1).contrast(1.2)
+
+    def dreamy(self, blur_radius=10):
+        return self.then("dreamy", blur_radius=blur_radius)
+
+    def cartoon(self, **params):
+        return self.then("cartoon", **params)
+
+    # --- 执行 ---
+    def plan(self) -> list:
+        """
+        把节点分成阶段：[("point", [(名字, 参数), ...]) | ("image", 名字, 参数), ...]
+        相邻逐像素运算合并为一个阶段；一个 ColorTransform 只容纳一次颜色矩阵，第二个棕褐色另起一个阶段
+        """
+        stages = []
+        for name, params in self.nodes:
+            if name in POINT_OPS:
+                same_stage = stages and stages[-1][0] == "point" and \
+                    not (name == "sepia" and any(op == "sepia" for op, _ in stages[-1][1]))
+                if same_stage:
+                    stages[-1][1].append((name, params))
+                else:
+                    stages.append(("point", [(name, params)]))
+            else:
+                stages.append(("image", name, params))
+        return stages
+
+    def explain(self) -> str:
+        lines = []
+        for stage in self.plan():
+            if stage[0] == "point":
+                lines.append("融合: " + " → ".join(name for name, _ in stage[1]))
+            else:
+                lines.append(f"{IMAGE_OPS[stage[1]][1]}: {stage[1]}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _run_point(rgb: np.ndarray, ops, owned) -> np.ndarray:
+        transform = ColorTransform()
+        for name, params in ops:
+            getattr(transform, POINT_OPS[name])(**params)
+        # 自己产生的中间结果直接原地覆盖，否则写入新缓冲
+        return transform.apply(rgb, rgb if owned and rgb.flags.writeable else None)
+
+    def run(self, source=None) -> np.ndarray:
+        """读取输入并执行整张图，返回 (高, 宽, 3) 的 RGB uint8 数组"""
+        source = self.source if source is None else source
+        if source is None:
+            raise ValueError("没有输入图像")
+        if isinstance(source, str):
+            value = Image.open(source).convert("RGB")
+        elif isinstance(source, Image.Image):
+            value = source.convert("RGB")
+        else:
+            value = source
+        owned = False
+        self.conversions = 0
+
+        for stage in self.plan():
+            if stage[0] == "point":
+                domain = "array"
+            else:
+                func, domain = IMAGE_OPS[stage[1]]
+            converted = _to_domain(value, domain)
+            if converted is not value:
+                self.conversions += 1
+                owned = False
+            value = converted
+
+            if stage[0] == "point":
+                value = self._run_point(value, stage[1], owned)
+            else:
+                value = func(value, **stage[2])
+            owned = True
+
+        result = _to_domain(value, "array")
+        if result is not value:
+            self.conversions += 1
+        return result
+
+    def save(self, output_path, source=None):
+        Image.fromarray(self.run(source)).save(output_path)
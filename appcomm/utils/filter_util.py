@@ -0,0 +1,152 @@
+# 图像滤镜工具（NumPy 向量化实现）
+import glob
+import os
+import time
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter
+from appcomm.utils import cartoon_util
+from appcomm.utils.color_util import ColorTransform
+
+
+def mosaic(rgb: np.ndarray, block_size=10) -> np.ndarray:
+    """
+    马赛克：每个 block_size x block_size 方块填充为方块内像素的平均颜色（向下取整，与逐像素累加一致）
+    右侧和底部不足一块的边缘方块只对实际存在的像素求平均
+    参数:
+        rgb: (高, 宽, 通道) uint8 数组
+    返回:
+        同尺寸的 uint8 数组
+    """
+    b = int(block_size)
+    height, width = rgb.shape[:2]
+    rows = -(-height // b)
+    cols = -(-width // b)
+    # 补零到整块后先把每个行块内的 b 行相加（连续内存上的整行累加，最快），
+    # 再把每 b 列相加，得到 (行块, 列块, 通道) 的总和
+    padded = rgb
+    if rows * b != height or cols * b != width:
+        padded = np.zeros((rows * b, cols * b) + rgb.shape[2:], dtype=rgb.dtype)
+        padded[:height, :width] = rgb
+    channels = rgb.shape[2:]
+    row_dtype = np.uint16 if b * 255 < 65536 else np.uint32
+    row_sums = padded.reshape((rows, b, cols * b) + channels).sum(axis=1, dtype=row_dtype)
+    sums = row_sums.reshape((rows, cols, b) + channels).sum(axis=2, dtype=np.uint32)
+
+    # 每块的实际像素数：只有最后一行块 / 最后一列块可能不足 b
+    block_h = np.full(rows, b, dtype=np.uint32)
+    block_w = np.full(cols, b, dtype=np.uint32)
+    block_h[-1] = height - (rows - 1) * b
+    block_w[-1] = width - (cols - 1) * b
+    counts = np.outer(block_h, block_w)
+    if rgb.ndim == 3:
+        counts = counts[:, :, None]
+    averages = (sums // counts).astype(np.uint8)
+
+    # 展开回像素尺寸，再裁掉补零部分
+    return np.repeat(np.repeat(averages, b, axis=0), b, axis=1)[:height, :width]
+
+
+def color_invert(rgb: np.ndarray, enhance_factor=1.0, out=None) -> np.ndarray:
+    """颜色反转（负片），enhance_factor != 1 时再增强对比度（test_25），两步合成一张查找表"""
+    transform = ColorTransform().invert()
+    if enhance_factor != 1.0:
+        transform.contrast(enhance_factor)
+    return transform.apply(rgb, out)
+
+
+def watercolor_base_image(img: Image.Image, blur_radius=5, color_boost=1.5) -> Image.Image:
+    """水彩画的前半段：模糊 → 增强颜色 → 叠加边缘（不含最后的提亮和对比度）"""
+    img_blurred = img.filter(ImageFilter.GaussianBlur(radius=blur_radius))
+    img_enhanced = ImageEnhance.Color(img_blurred).enhance(color_boost)
+    img_edges = img.filter(ImageFilter.FIND_EDGES).convert("L").filter(ImageFilter.EDGE_ENHANCE)
+    return Image.blend(img_enhanced, img_edges.convert("RGB"), alpha=0.2)
+
+
+def watercolor_image(img: Image.Image, blur_radius=5, color_boost=1.5) -> Image.Image:
+    """水彩画：模糊 → 增强颜色 → 叠加边缘 → 提亮 → 增强对比度（test_27），PIL 图像进出"""
+    img_final = watercolor_base_image(img, blur_radius, color_boost)
+    img_final = ImageEnhance.Brightness(img_final).enhance(1.1)
+    return ImageEnhance.Contrast(img_final).enhance(1.2)
+
+
+def watercolor(rgb: np.ndarray, blur_radius=5, color_boost=1.5) -> np.ndarray:
+    return np.asarray(watercolor_image(Image.fromarray(rgb), blur_radius, color_boost))
+
+
+def dreamy_blur_image(img: Image.Image, blur_radius=10) -> Image.Image:
+    """梦幻模糊：高斯模糊后与 20% 的半透明白色覆盖层混合（test_22_2），PIL 图像进出"""
+    blurred_img = img.filter(ImageFilter.GaussianBlur(radius=blur_radius))
+    overlay = Image.new("RGBA", blurred_img.size, (255, 255, 255, 50))
+    return Image.blend(blurred_img.convert("RGBA"), overlay, 0.2).convert("RGB")
+
+
+def dreamy_blur(rgb: np.ndarray, blur_radius=10) -> np.ndarray:
+    return np.asarray(dreamy_blur_image(Image.fromarray(rgb), blur_radius))
+
+
+def cartoon(rgb: np.ndarray, size=None, d=9, sigma_color=300, sigma_space=300, median_ksize=7,
+            block_size=9, c=2, fast=False, levels=1, passes=1) -> np.ndarray:
+    """
+    卡通化：双边滤波平滑颜色，自适应阈值提取轮廓线，两者按位与（test_29）
+    参数:
+        size: 先缩放到 (宽, 高)，None 为不缩放
+        fast: 颜色平滑改在金字塔缩小 levels 次的图上做 passes 遍，见 cartoon_util
+    """
+    return cartoon_util.cartoonize(rgb, size, fast, d, sigma_color, sigma_space, median_ksize, block_size, c,
+                                   levels=levels, passes=passes, bgr=False)
+
+
+# 可按名字调用的滤镜：输入输出都是 (高, 宽, 3) 的 RGB uint8 数组，关键字参数为各滤镜自己的参数
+FILTERS = {
+    "invert": color_invert,
+    "mosaic": mosaic,
+    "watercolor": watercolor,
+    "dreamy": dreamy_blur,
+    "cartoon": cartoon,
+}
+
+
+def benchmark(pattern="images/*", block_size=15):
+    """对比逐像素马赛克（test_26 原来的写法）与 mosaic 的耗时，并校验结果一致"""
+
+    def _mosaic_loop(img, block_size):
+        width, height = img.size
+        mosaic_img = Image.new("RGB", (width, height))
+        for y in range(0, height, block_size):
+            for x in range(0, width, block_size):
+                box = (x, y, min(x + block_size, width), min(y + block_size, height))
+                pixels = list(img.crop(box).getdata())
+                count = len(pixels)
+                r = sum(p[0] for p in pixels) // count
+                g = sum(p[1] for p in pixels) // count
+                b = sum(p[2] for p in pixels) // count
+                for i in range(x, min(x + block_size, width)):
+                    for j in range(y, min(y + block_size, height)):
+                        mosaic_img.putpixel((i, j), (r, g, b))
+        return mosaic_img
+
+    print(f"{'图像':<28} {'尺寸':>11} | {'逐像素':>9} {'向量化':>9} {'加速比':>8}  一致")
+    for path in sorted(glob.glob(pattern)):
+        if not os.path.isfile(path):
+            continue
+        try:
+            img = Image.open(path).convert("RGB")
+        except Exception:
+            continue
+        rgb = np.asarray(img)
+
+        start = time.perf_counter()
+        expected = np.asarray(_mosaic_loop(img, block_size))
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = mosaic(rgb, block_size)
+        fast_time = time.perf_counter() - start
+
+        size = f"{img.width}x{img.height}"
+        print(f"{os.path.basename(path):<28} {size:>11} | {loop_time * 1000:7.0f}ms {fast_time * 1000:7.1f}ms "
+              f"{loop_time / fast_time:7.0f}x  {np.array_equal(expected, result)}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,205 @@
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+# 曼德布罗特分形的数组化逃逸时间计算
+# 整帧（或整块）坐标一次性作为 complex128 数组迭代，只保留尚未逃逸的点
+
+
+def make_plane(width, height, zoom, x_offset, y_offset, step=1, rows=None):
+    """
+    生成屏幕像素到复平面的坐标网格，映射方式与 test_51 的 draw_mandelbrot 一致
+    参数:
+        width, height: 屏幕尺寸
+        zoom, x_offset, y_offset: 缩放与平移参数
+        step: 采样步长，>1 时只计算每 step 个像素中的一个（粗预览）
+        rows: 可选 (y0, y1)，只生成这一段行
+    返回:
+        形状为 (列数, 行数) 的 complex128 数组，x 为第一维，方便直接交给 surfarray
+    """
+    y0, y1 = rows if rows is not None else (0, height)
+    xs = np.arange(0, width, step, dtype=np.float64)
+    ys = np.arange(y0, y1, step, dtype=np.float64)
+    real = (xs - width / 2) / (0.5 * zoom * width) + x_offset
+    imag = (ys - height / 2) / (0.5 * zoom * height) + y_offset
+    return real[:, None] + 1j * imag[None, :]
+
+
+def escape_time(c, max_iter):
+    """
+    数组化的逃逸时间迭代 z = z^2 + c
+    参数:
+        c: complex128 数组
+        max_iter: 最大迭代次数
+    返回:
+        与 c 同形状的 float64 平滑迭代值，集合内的点为 -1
+    """
+    shape = c.shape
+    c = c.ravel()
+    smooth = np.full(c.shape, -1.0)
+
+    # 主心形和周期 2 圆盘内的点必定在集合内，直接跳过迭代
+    x, y = c.real, c.imag
+    q = (x - 0.25) ** 2 + y * y
+    inside = (q * (q + (x - 0.25)) <= 0.25 * y * y) | ((x + 1) ** 2 + y * y <= 0.0625)
+
+    idx = np.flatnonzero(~inside)
+    cc = c[idx]
+    z = np.zeros_like(cc)
+    for i in range(max_iter):
+        if idx.size == 0:
+            break
+        z = z * z + cc
+        mag2 = z.real * z.real + z.imag * z.imag
+        escaped = mag2 > 4.0
+        if escaped.any():
+            # 平滑着色: i + 1 - log(log2(|z|))
+            abs_z = np.sqrt(mag2[escaped])
+            smooth[idx[escaped]] = i + 1 - np.log(np.log2(abs_z))
+            # 只保留仍未逃逸的点，后续迭代量随之减少
+            alive = ~escaped
+            idx = idx[alive]
+            cc = cc[alive]
+            z = z[alive]
+    return smooth.reshape(shape)
+
+
+def smooth_to_rgb(smooth, max_iter):
+    """
+    平滑迭代值转换为 RGB，等价于 colorsys.hsv_to_rgb(smooth / max_iter, 1, 1)
+    参数:
+        smooth: escape_time 的结果
+        max_iter: 最大迭代次数
+    返回:
+        形状为 smooth.shape + (3,) 的 uint8 数组，集合内的点为黑色
+    """
+    h = smooth / max_iter
+    # 与 colorsys 相同：i = int(h * 6) 向零取整，再对 6 取模
+    sector = np.trunc(h * 6.0)
+    f = h * 6.0 - sector
+    sector = np.mod(sector, 6).astype(np.int8)
+    p = np.zeros_like(f)
+    q = 1.0 - f
+    t = f
+    v = np.ones_like(f)
+
+    r = np.choose(sector, (v, q, p, p, t, v))
+    g = np.choose(sector, (t, v, v, q, p, p))
+    b = np.choose(sector, (p, p, t, v, v, q))
+    rgb = (np.stack((r, g, b), axis=-1) * 255).astype(np.uint8)
+    rgb[smooth < 0] = 0
+    return rgb
+
+
+def render_mandelbrot(width, height, zoom, x_offset, y_offset, max_iter, step=1, rows=None):
+    """
+    渲染一帧（或一段行）的颜色数组
+    返回:
+        形状为 (列数, 行数, 3) 的 uint8 数组
+    """
+    c = make_plane(width, height, zoom, x_offset, y_offset, step, rows)
+    return smooth_to_rgb(escape_time(c, max_iter), max_iter)
+
+
+class ProgressiveMandelbrot:
+    """
+    渐进式渲染器：视图变化后先出粗预览，再逐级细化
+    每次 step() 只在时间预算内推进一部分，调用方可以在两次之间处理事件
+    """
+
+    # 由粗到细的采样步长
+    levels = (8, 4, 2, 1)
+    # 每次 step() 处理的行数
+    band_rows = 40
+
+    def __init__(self, width, height, levels=None):
+        self.width = width
+        self.height = height
+        if levels is not None:
+            self.levels = tuple(levels)
+        # (W, H, 3) 的帧缓冲，可直接 pygame.surfarray.blit_array
+        self.buffer = np.zeros((width, height, 3), dtype=np.uint8)
+        self.view = None
+        self._jobs = []
+
+    def reset(self, zoom, x_offset, y_offset, max_iter):
+        """视图参数变化时调用，重新从最粗一级开始"""
+        view = (zoom, x_offset, y_offset, max_iter)
+        if view == self.view:
+            return
+        self.view = view
+        self._jobs = []
+        for level in self.levels:
+            # 粗级别计算量很小，整帧一次完成；细级别按行分段
+            band = self.height if level >= 4 else self.band_rows
+            for y0 in range(0, self.height, band):
+                self._jobs.append((level, y0, min(y0 + band, self.height)))
+        self._jobs.reverse()
+
+    def done(self) -> bool:
+        return not self._jobs
+
+    def step(self, budget=1.0 / 30) -> bool:
+        """
+        在 budget 秒内尽量推进渲染
+        返回:
+            本次是否更新了缓冲区
+        """
+        if not self._jobs:
+            return False
+        zoom, x_offset, y_offset, max_iter = self.view
+        deadline = time.perf_counter() + budget
+        while self._jobs:
+            level, y0, y1 = self._jobs.pop()
+            rgb = render_mandelbrot(self.width, self.height, zoom, x_offset, y_offset,
+                                    max_iter, level, (y0, y1))
+            if level > 1:
+                # 粗预览：每个采样点放大为 level x level 的色块
+                rgb = np.repeat(np.repeat(rgb, level, axis=0), level, axis=1)
+            self.buffer[:, y0:y1] = rgb[:self.width, :y1 - y0]
+            # 一个级别完成后先交给调用方显示，保证预览能及时出现
+            next_level = self._jobs[-1][0] if self._jobs else None
+            if next_level != level or time.perf_counter() >= deadline:
+                break
+        return True
+
+
+# --- 分块渲染（供进程池调用，模块本身不含任何窗口/pygame 副作用） ---
+
+# 子进程内已附加的共享内存，避免每个分块重复打开
+_attached_shm = {}
+
+
+def tile_plane(tile_size, tile_x, tile_y, scale_x, scale_y):
+    """
+    分块 (tile_x, tile_y) 对应的复平面网格
+    全局像素坐标 g 与复平面的关系为 real = gx / scale_x, imag = gy / scale_y，
+    与屏幕位置无关，所以平移后同一个分块可以直接复用
+    """
+    gx = tile_x * tile_size + np.arange(tile_size, dtype=np.float64)
+    gy = tile_y * tile_size + np.arange(tile_size, dtype=np.float64)
+    return (gx / scale_x)[:, None] + 1j * (gy / scale_y)[None, :]
+
+
+def render_tile(tile_size, tile_x, tile_y, scale_x, scale_y, max_iter):
+    """渲染单个分块，返回 (tile_size, tile_size, 3) 的 uint8 数组"""
+    c = tile_plane(tile_size, tile_x, tile_y, scale_x, scale_y)
+    return smooth_to_rgb(escape_time(c, max_iter), max_iter)
+
+
+def render_tile_to_shm(shm_name, slot, tile_size, tile_x, tile_y, scale_x, scale_y, max_iter):
+    """
+    进程池任务：渲染分块并写入共享内存的第 slot 个槽位，避免结果经 pickle 回传
+    返回:
+        (slot, 耗时秒数)
+    """
+    start = time.perf_counter()
+    shm = _attached_shm.get(shm_name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _attached_shm[shm_name] = shm
+    slot_bytes = tile_size * tile_size * 3
+    out = np.ndarray((tile_size, tile_size, 3), dtype=np.uint8,
+                     buffer=shm.buf, offset=slot * slot_bytes)
+    out[...] = render_tile(tile_size, tile_x, tile_y, scale_x, scale_y, max_iter)
+    return slot, time.perf_counter() - start
@@ -0,0 +1,271 @@
+# 流式 GIF 生成
+# 用法示例:
+#   build_gif(sorted(glob.glob("images/niao/*.png")), "out/niao.gif", frame_duration=100, resize_width=200)
+#   python -m appcomm.utils.gif_util images/niao out/niao.gif -d 100 -w 200 --dedupe 2
+# 做法:
+#   - 先抽样若干帧算出一个全局调色板（每帧各自量化既慢，调色板还会逐帧跳变）
+#   - 解码、缩放、按全局调色板量化在进程池中进行，主进程按顺序取回结果，
+#     同一时间只有 workers * 2 帧在途，内存不随帧数增长
+#   - 每帧只写与上一帧不同的矩形区域，逐帧直接写入文件，不在内存中攒整段动画
+#   - 可选：与上一帧相同或几乎相同的帧不单独写出，把显示时间并到上一帧
+import argparse
+import glob
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import GifImagePlugin, Image
+from appcomm.utils.memory_util import PeakMemory
+
+# 抽样计算全局调色板的帧数
+PALETTE_SAMPLES = 16
+
+# 抽样帧缩小到这个宽度再拼在一起计算调色板
+PALETTE_SAMPLE_WIDTH = 160
+
+
+def frame_size(path, resize_width):
+    """按第一帧的宽高比计算输出尺寸（只读文件头，不解码）"""
+    with Image.open(path) as img:
+        width, height = img.size
+    return resize_width, int(resize_width * height / width)
+
+
+def load_frame(path, size) -> Image.Image:
+    """打开一帧，转为 RGB 并用 LANCZOS 缩放到 size"""
+    with Image.open(path) as img:
+        return img.convert("RGB").resize(size, Image.Resampling.LANCZOS)
+
+
+def global_palette(paths, size, samples=PALETTE_SAMPLES, colors=256) -> Image.Image:
+    """
+    从均匀抽样的帧计算全局调色板
+    返回:
+        P 模式的调色板图像，可直接用作 Image.quantize(palette=...)
+    """
+    picks = sorted(set(np.linspace(0, len(paths) - 1, min(samples, len(paths))).astype(int)))
+    sample_size = (min(PALETTE_SAMPLE_WIDTH, size[0]), max(1, size[1] * min(PALETTE_SAMPLE_WIDTH, size[0]) // size[0]))
+    sheet = Image.new("RGB", (sample_size[0], sample_size[1] * len(picks)))
+    for i, index in enumerate(picks):
+        sheet.paste(load_frame(paths[index], size).resize(sample_size, Image.Resampling.BOX), (0, i * sample_size[1]))
+    # 中位切分的结果再做几轮 k-means 细化，渐变较多的画面误差明显更小
+    return sheet.quantize(colors, method=Image.Quantize.MEDIANCUT, kmeans=3)
+
+
+# 子进程中的调色板和抖动方式，由进程池的 initializer 设置，避免每个任务都传一遍
+_worker_palette = None
+_worker_dither = Image.Dither.NONE
+
+
+def _init_worker(palette_bytes, dither):
+    global _worker_palette, _worker_dither
+    _worker_palette = Image.new("P", (1, 1))
+    _worker_palette.putpalette(palette_bytes)
+    _worker_dither = Image.Dither.FLOYDSTEINBERG if dither else Image.Dither.NONE
+
+
+def _quantize_frame(path, size) -> np.ndarray:
+    """子进程：解码 → 缩放 → 按全局调色板量化，返回调色板索引数组"""
+    frame = load_frame(path, size)
+    return np.asarray(frame.quantize(palette=_worker_palette, dither=_worker_dither))
+
+
+# 逐帧写入的 GIF 编码器：所有帧共用文件头中的全局调色板
+class GifStreamWriter:
+
+    def __init__(self, path, size, palette: Image.Image, loop=0):
+        self.size = size
+        self.palette_bytes = palette.getpalette()
+        self.file = open(path, "wb")
+        header_image = self._image(np.zeros((size[1], size[0]), dtype=np.uint8))
+        header, _ = GifImagePlugin.getheader(header_image, info={"loop": loop})
+        for chunk in header:
+            self.file.write(chunk)
+        self._previous = None
+        self.frames = 0
+
+    def _image(self, indices: np.ndarray) -> Image.Image:
+        image = Image.fromarray(indices, "P")
+        image.putpalette(self.palette_bytes)
+        return image
+
+    def write(self, indices: np.ndarray, duration):
+        """
+        写入一帧
+        参数:
+            indices: (高, 宽) 调色板索引
+            duration: 显示时间（毫秒），GIF 以 10 毫秒为单位
+        """
+        x0, y0 = 0, 0
+        region = indices
+        if self._previous is not None:
+            # 只写与上一帧不同的矩形，其余部分保留上一帧的内容（disposal=1）
+            changed = indices != self._previous
+            rows = np.flatnonzero(changed.any(axis=1))
+            cols = np.flatnonzero(changed.any(axis=0))
+            if rows.size == 0:
+                rows = cols = np.array([0])
+            y0, x0 = rows[0], cols[0]
+            region = indices[y0:rows[-1] + 1, x0:cols[-1] + 1]
+        for chunk in GifImagePlugin.getdata(self._image(np.ascontiguousarray(region)), offset=(int(x0), int(y0)),
+                                            duration=duration, disposal=1):
+            self.file.write(chunk)
+        self._previous = indices
+        self.frames += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.write(b";")
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _iter_frames(paths, size, palette, workers, dither):
+    """按顺序产出每帧的调色板索引；进程池中最多有 workers * 2 个任务在途"""
+    if workers == 0:
+        _init_worker(palette.getpalette(), dither)
+        for path in paths:
+            yield _quantize_frame(path, size)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(palette.getpalette(), dither)) as executor:
+        pending = deque()
+        paths = iter(paths)
+        while True:
+            while len(pending) < workers * 2:
+                path = next(paths, None)
+                if path is None:
+                    break
+                pending.append(executor.submit(_quantize_frame, path, size))
+            if not pending:
+                return
+            yield pending.popleft().result()
+
+
+def build_gif(paths, output_path, frame_duration=100, resize_width=200, loop=0, workers=None,
+              dedupe=0, dither=False, samples=PALETTE_SAMPLES) -> dict:
+    """
+    把一组帧图像写成循环 GIF
+    参数:
+        paths: 按播放顺序排列的帧图像路径
+        frame_duration: 每帧显示时间（毫秒）
+        resize_width: 输出宽度，高度按第一帧的宽高比计算，所有帧缩放到同一尺寸
+        workers: 进程数，None 为 CPU 核数，0 表示在当前进程内处理
+        dedupe: None 不去重；0 只合并完全相同的相邻帧（与 PIL save_all 的默认行为相同）；
+                大于 0 时合并平均每通道差值不超过它的相邻帧
+        dither: 是否使用 Floyd-Steinberg 抖动（减少色带，但文件更大）
+    返回:
+        {"frames": 输入帧数, "written": 写出帧数}
+    """
+    if not paths:
+        raise ValueError("没有帧图像")
+    size = frame_size(paths[0], resize_width)
+    palette = global_palette(paths, size, samples)
+    colors = np.array(palette.getpalette()[:768], dtype=np.int16).reshape(-1, 3)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+
+    with GifStreamWriter(output_path, size, palette, loop) as writer:
+        held, held_duration = None, 0
+        for indices in _iter_frames(paths, size, palette, workers, dither):
+            if held is not None and dedupe is not None:
+                if dedupe == 0:
+                    same = np.array_equal(indices, held)
+                else:
+                    same = np.abs(colors[indices] - colors[held]).mean() <= dedupe
+                if same:
+                    held_duration += frame_duration
+                    continue
+            # 当前帧与上一帧不同，上一帧的显示时间已确定，可以写出
+            if held is not None:
+                writer.write(held, held_duration)
+            held, held_duration = indices, frame_duration
+        writer.write(held, held_duration)
+    return {"frames": len(paths), "written": writer.frames}
+
+
+# --- 性能测试 ---
+def _save_all_reference(paths, output_path, frame_duration, resize_width):
+    """test_30 原来的做法：全部帧缩放后放在列表里，一次 save(save_all=True)"""
+    frames = []
+    for path in paths:
+        img = Image.open(path).convert("RGB")
+        width, height = img.size
+        frames.append(img.resize((resize_width, int(resize_width * height / width)), Image.Resampling.LANCZOS))
+    frames[0].save(output_path, save_all=True, append_images=frames[1:], duration=frame_duration, loop=0)
+
+
+def _measure(func, args, options, queue):
+    with PeakMemory() as peak:
+        start = time.perf_counter()
+        func(*args, **options)
+        seconds = time.perf_counter() - start
+    queue.put((seconds, peak.mb))
+
+
+def benchmark(frames=120, size=(1200, 676), resize_width=400, workdir=None):
+    """
+    生成一段平移的合成动画（每 3 帧重复一次），对比原做法与流式生成的耗时、峰值内存增量和文件大小
+    （单进程运行，只比较编码方式本身）
+    """
+    workdir = workdir or tempfile.mkdtemp()
+    yy, xx = np.mgrid[0:size[1], 0:size[0]]
+    paths = []
+    for i in range(frames):
+        shift = (i // 3) * 8
+        rgb = np.stack([(xx + shift) % 256, (yy + shift // 2) % 256, (xx + yy) % 256], axis=-1).astype(np.uint8)
+        path = os.path.join(workdir, f"{i:04d}.png")
+        Image.fromarray(rgb).save(path)
+        paths.append(path)
+
+    context = multiprocessing.get_context("spawn")
+    cases = [
+        ("save_all（原做法）", _save_all_reference, {}),
+        ("流式", build_gif, {"workers": 0, "dedupe": None}),
+        ("流式 + 去重", build_gif, {"workers": 0}),
+    ]
+    print(f"{frames} 帧 {size[0]}x{size[1]} -> 宽 {resize_width}")
+    for i, (label, func, options) in enumerate(cases):
+        output_path = os.path.join(workdir, f"out_{i}.gif")
+        queue = context.Queue()
+        process = context.Process(target=_measure,
+                                  args=(func, (paths, output_path, 100, resize_width), options, queue))
+        process.start()
+        seconds, peak = queue.get()
+        process.join()
+        with Image.open(output_path) as gif:
+            written = gif.n_frames
+        print(f"  {label:<16} {seconds:6.2f} s  峰值内存增量 {peak:6.1f} MB  "
+              f"{os.path.getsize(output_path) / 1024:7.0f} KB  {written} 帧")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="流式 GIF 生成")
+    parser.add_argument("input", help="帧图像目录（jpg / png，按文件名排序）或 glob 模式")
+    parser.add_argument("output", help="输出 GIF 路径")
+    parser.add_argument("-d", "--duration", type=int, default=100, help="每帧显示时间（毫秒）")
+    parser.add_argument("-w", "--width", type=int, default=200, help="输出宽度")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认 CPU 核数，0 为单进程")
+    parser.add_argument("--dedupe", type=float, default=0,
+                        help="合并相同或相近的相邻帧：0（默认）为完全相同，大于 0 为允许的平均每通道差值，负数不合并")
+    parser.add_argument("--dither", action="store_true", help="使用 Floyd-Steinberg 抖动")
+    args = parser.parse_args(argv)
+    if os.path.isdir(args.input):
+        paths = sorted(glob.glob(os.path.join(args.input, "*.jpg")) + glob.glob(os.path.join(args.input, "*.png")))
+    else:
+        paths = sorted(glob.glob(args.input))
+    start = time.perf_counter()
+    result = build_gif(paths, args.output, args.duration, args.width, workers=args.workers,
+                       dedupe=None if args.dedupe < 0 else args.dedupe, dither=args.dither)
+    print(f"{result['frames']} 帧输入，写出 {result['written']} 帧，用时 {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# 内存占用测量（性能测试用，仅 Linux）
+import threading
+
+
+def anonymous_rss() -> int:
+    """
+    进程私有内存（KB）
+    内存映射文件的页属于页缓存，可被系统回收，不计入；读不到 /proc 时返回 0
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+# 私有内存峰值增量：另开线程定时采样 anonymous_rss
+# 与 resource.getrusage 的 ru_maxrss 不同，它不会继承父进程的峰值，也不统计内存映射文件
+# 用法:
+#   with PeakMemory() as peak:
+#       work()
+#   print(peak.mb)
+class PeakMemory:
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._done = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, anonymous_rss())
+
+    def __enter__(self):
+        self.baseline = self.peak = anonymous_rss()
+        self._done.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, anonymous_rss())
+
+    @property
+    def mb(self) -> float:
+        """峰值增量（MB）"""
+        return (self.peak - self.baseline) / 1024
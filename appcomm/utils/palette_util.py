@@ -0,0 +1,226 @@
+# 视频帧的调色板量化（卡通效果的颜色数缩减）
+# 用法示例:
+#   quantizer = PaletteQuantizer(num_colors=7)
+#   cartoon = quantizer.quantize(frame)      # 每帧调用，调色板跨帧复用
+#   python -m appcomm.utils.palette_util     # 与逐帧全像素 k-means 对比的性能测试
+# 做法:
+#   - 调色板只在抽样像素（约 SAMPLE_PIXELS 个）上用 k-means 拟合，之后各帧沿用同一组中心
+#   - 每帧在同一组抽样像素上计算 8x8x8 颜色直方图，与拟合时的直方图比较，
+#     差异（总变差距离，0 ~ 1）超过阈值才重新拟合，画面内容没有明显变化时调色板保持不变，也不会闪烁
+#   - 像素到最近中心的分配用 32x32x32 的查找表完成：每通道取高 5 位拼成下标，直接查出颜色，
+#     查找表在拟合后按每个格子的中心点计算一次
+import argparse
+import time
+import cv2
+import numpy as np
+from appcomm.utils.buffer_util import frame_pool
+
+# 拟合调色板、计算直方图时抽样的像素数
+SAMPLE_PIXELS = 16384
+
+# 颜色直方图每通道的格数
+HISTOGRAM_BINS = 8
+
+# 默认的重新拟合阈值（直方图总变差距离）
+DRIFT_THRESHOLD = 0.2
+
+# 查找表每通道的位数
+LUT_BITS = 5
+
+# 每通道 8 位 -> 高 LUT_BITS 位（cv2.LUT 比 numpy 移位快）
+_SHIFT_LUT = (np.arange(256) >> (8 - LUT_BITS)).astype(np.uint8)
+
+
+def _sample(frame: np.ndarray, pixels=SAMPLE_PIXELS) -> np.ndarray:
+    """等间隔抽样约 pixels 个像素，返回 (n, 3) 的连续数组"""
+    height, width = frame.shape[:2]
+    step = max(1, int(np.sqrt(height * width / pixels)))
+    return np.ascontiguousarray(frame[step // 2::step, step // 2::step]).reshape(-1, 3)
+
+
+def color_histogram(pixels: np.ndarray, bins=HISTOGRAM_BINS) -> np.ndarray:
+    """(n, 3) uint8 像素的归一化三维颜色直方图（展平）"""
+    hist = cv2.calcHist([pixels.reshape(-1, 1, 3)], [0, 1, 2], None, [bins] * 3, [0, 256] * 3).ravel()
+    return hist / max(hist.sum(), 1.0)
+
+
+def histogram_drift(a: np.ndarray, b: np.ndarray) -> float:
+    """两个归一化直方图的总变差距离：0 为完全相同，1 为没有重叠"""
+    return 0.5 * float(np.abs(a - b).sum())
+
+
+def lut_index(frame: np.ndarray) -> np.ndarray:
+    """每个像素在查找表中的下标（新建数组；PaletteQuantizer.apply 把同样的下标写进缓冲池）"""
+    high = cv2.LUT(frame, _SHIFT_LUT).astype(np.uint16)
+    return (high[..., 0] << 2 * LUT_BITS) | (high[..., 1] << LUT_BITS) | high[..., 2]
+
+
+def palette_lut(centers: np.ndarray, bits=LUT_BITS) -> np.ndarray:
+    """
+    每个颜色格子中心点最近的调色板颜色
+    返回:
+        (2 ** (3 * bits), 3) uint8，下标为 (c0 << 2 * bits) | (c1 << bits) | c2，c 为各通道的高 bits 位
+    """
+    levels = 1 << bits
+    values = (np.arange(levels, dtype=np.float32) + 0.5) * (256 / levels)
+    grid = np.stack(np.meshgrid(values, values, values, indexing="ij"), axis=-1).reshape(-1, 3)
+    centers = centers.astype(np.float32)
+    distance = (grid * grid).sum(axis=1, keepdims=True) - 2 * grid @ centers.T + (centers * centers).sum(axis=1)
+    return np.clip(np.rint(centers), 0, 255).astype(np.uint8)[distance.argmin(axis=1)]
+
+
+# 跨帧复用的 k-means 调色板
+class PaletteQuantizer:
+
+    def __init__(self, num_colors=7, drift_threshold=DRIFT_THRESHOLD, attempts=3, iterations=20):
+        """
+        参数:
+            num_colors: 调色板颜色数
+            drift_threshold: 直方图差异超过它时重新拟合；0 表示每帧都拟合
+            attempts / iterations: 每次拟合的 k-means 尝试次数和最大迭代次数（只在抽样像素上运行）
+        """
+        self.num_colors = num_colors
+        self.drift_threshold = drift_threshold
+        self.attempts = attempts
+        self.iterations = iterations
+        # (调色板中心, 查找表, 拟合时的直方图) 作为一个整体替换，其他线程读到的总是一致的一组
+        self._state = None
+        self.fits = 0
+        self.frames = 0
+        self.drift = 0.0
+
+    @property
+    def centers(self):
+        return None if self._state is None else self._state[0]
+
+    @property
+    def lut(self):
+        """当前调色板的查找表（按 lut_index 的下标取颜色），还没有调色板时为 None"""
+        return None if self._state is None else self._state[1]
+
+    def fit(self, pixels: np.ndarray, histogram=None):
+        """在 (n, 3) uint8 抽样像素上拟合调色板并重建查找表"""
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, self.iterations, 0.5)
+        k = min(self.num_colors, len(pixels))
+        # k-means++ 的初始中心取自 OpenCV 的全局随机数；固定种子，同样的像素总是得到同样的调色板
+        cv2.setRNGSeed(0)
+        _, _, centers = cv2.kmeans(np.float32(pixels), k, None, criteria, self.attempts, cv2.KMEANS_PP_CENTERS)
+        if histogram is None:
+            histogram = color_histogram(pixels)
+        self._state = (centers, palette_lut(centers), histogram)
+        self.fits += 1
+
+    def load(self, centers: np.ndarray):
+        """
+        固定使用给定的调色板中心（如由另一个进程按帧顺序决定），之后 update 不再重新拟合；
+        中心与当前相同时不重建查找表
+        """
+        state = self._state
+        if state is None or not np.array_equal(state[0], centers):
+            self._state = (centers, palette_lut(centers), None)
+
+    def update(self, frame: np.ndarray) -> bool:
+        """按需重新拟合：还没有调色板或颜色分布偏离超过阈值时拟合，返回是否拟合"""
+        state = self._state
+        if state is not None and state[2] is None:
+            # load 固定的调色板
+            return False
+        pixels = _sample(frame)
+        histogram = color_histogram(pixels)
+        self.drift = 1.0 if state is None else histogram_drift(histogram, state[2])
+        # 阈值为 0 时每帧都拟合（画面完全相同时 drift 也是 0，不能只比较大小）
+        if state is None or self.drift_threshold <= 0 or self.drift > self.drift_threshold:
+            self.fit(pixels, histogram)
+            return True
+        return False
+
+    def apply(self, frame: np.ndarray, out=None, pool=frame_pool) -> np.ndarray:
+        """用当前调色板量化 BGR 帧（不更新调色板）；中间数组取自缓冲池"""
+        lut = self._state[1]
+        shape = frame.shape[:2]
+        high = cv2.LUT(frame, _SHIFT_LUT, dst=pool.get("palette_high", frame.shape))
+        # 下标直接用 intp，np.take 不必再转换一遍
+        index = pool.get("palette_index", shape, np.intp)
+        channel = pool.get("palette_channel", shape, np.intp)
+        np.left_shift(high[..., 0], 2 * LUT_BITS, out=index, dtype=np.intp)
+        np.left_shift(high[..., 1], LUT_BITS, out=channel, dtype=np.intp)
+        index |= channel
+        index |= high[..., 2]
+        if out is None:
+            out = np.empty_like(frame)
+        # mode="raise"（默认）时 out 总是先写到临时数组再复制；下标一定在范围内，用 clip 直接写入
+        np.take(lut, index, axis=0, out=out, mode="clip")
+        return out
+
+    def quantize(self, frame: np.ndarray, out=None, pool=frame_pool) -> np.ndarray:
+        """更新调色板（按需）并量化一帧"""
+        self.update(frame)
+        self.frames += 1
+        return self.apply(frame, out, pool)
+
+
+# --- 性能测试 ---
+def kmeans_quantize(frame, num_colors=7):
+    """test_24 原来的做法：每帧在全部像素上运行 k-means（10 次尝试，最多 200 次迭代）"""
+    pixels = np.float32(frame.reshape(-1, 3))
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 200, 0.1)
+    _, labels, centers = cv2.kmeans(pixels, num_colors, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+    return np.uint8(centers)[labels.flatten()].reshape(frame.shape)
+
+
+def _psnr(a, b) -> float:
+    mse = np.mean((a.astype(np.float32) - b.astype(np.float32)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def synthetic_clip(frames, size):
+    """平移的彩色渐变与色块，中途切换一次场景（检验重新拟合）"""
+    yy, xx = np.mgrid[0:size[1], 0:size[0]].astype(np.float32)
+    for i in range(frames):
+        scene = i >= frames // 2
+        shift = i * 6.0
+        b = 127 + 120 * np.sin((xx + shift) / 90.0 + (2.0 if scene else 0.0))
+        g = 127 + 120 * np.sin((yy - shift) / 70.0)
+        r = 127 + 120 * np.cos((xx + yy) / (110.0 if scene else 150.0))
+        frame = np.dstack([b, g, r]).astype(np.uint8)
+        cv2.circle(frame, (int(shift) % size[0], size[1] // 2), size[1] // 5, (30, 200, 240) if scene else (200, 40, 40), -1)
+        yield cv2.medianBlur(frame, 7)
+
+
+def benchmark(frames=40, size=(640, 480), num_colors=7, reference_frames=5):
+    """
+    对比逐帧全像素 k-means 与跨帧复用调色板的每帧耗时和量化误差（PSNR，量化结果相对输入帧）
+    全像素 k-means 很慢，只在前 reference_frames 帧和场景切换后的 reference_frames 帧上运行
+    """
+    quantizer = PaletteQuantizer(num_colors)
+    reference_times, reference_psnr = [], []
+    fast_times, fast_psnr, paired_psnr = [], [], []
+    for i, frame in enumerate(synthetic_clip(frames, size)):
+        start = time.perf_counter()
+        result = quantizer.quantize(frame)
+        fast_times.append(time.perf_counter() - start)
+        fast_psnr.append(_psnr(result, frame))
+        if i < reference_frames or frames // 2 <= i < frames // 2 + reference_frames:
+            start = time.perf_counter()
+            expected = kmeans_quantize(frame, num_colors)
+            reference_times.append(time.perf_counter() - start)
+            reference_psnr.append(_psnr(expected, frame))
+            paired_psnr.append(fast_psnr[-1])
+    print(f"{frames} 帧 {size[0]}x{size[1]}，{num_colors} 色，重新拟合 {quantizer.fits} 次")
+    print(f"  全像素 k-means:  每帧 {np.mean(reference_times) * 1000:8.1f} ms  PSNR {np.mean(reference_psnr):5.2f} dB"
+          f"（{len(reference_times)} 帧）")
+    print(f"  复用调色板:      每帧 {np.mean(fast_times) * 1000:8.1f} ms  PSNR {np.mean(paired_psnr):5.2f} dB"
+          f"（同一批帧），全部帧 {np.mean(fast_psnr):5.2f} dB")
+    print(f"  加速比 {np.mean(reference_times) / np.mean(fast_times):.0f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="调色板量化性能测试")
+    parser.add_argument("-n", "--frames", type=int, default=40, help="帧数")
+    parser.add_argument("-k", "--colors", type=int, default=7, help="颜色数")
+    args = parser.parse_args(argv)
+    benchmark(args.frames, num_colors=args.colors)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+# 命令行参数解析（各工具的 -p KEY=VALUE 选项共用，不依赖任何图像处理模块）
+import ast
+
+
+def parse_params(items) -> dict:
+    """把 ["key=value", ...] 解析为参数字典，value 按 Python 字面量解析（失败时当作字符串）"""
+    params = {}
+    for item in items or []:
+        key, _, value = item.partition("=")
+        try:
+            params[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            params[key] = value
+    return params
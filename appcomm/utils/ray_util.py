@@ -0,0 +1,359 @@
+import time
+from types import SimpleNamespace
+import numpy as np
+
+# 批量光线投射：整帧主光线作为 (H, W, 3) 数组，一次完成求交和 Lambert 着色
+# 场景对象沿用 test_52 的 Sphere / Light（属性带 x/y/z 的向量即可）
+
+
+def to_array(v) -> np.ndarray:
+    """Vector3（或任意带 x/y/z 属性的对象、三元组）转为 float64 数组"""
+    if hasattr(v, "x"):
+        return np.array((v.x, v.y, v.z), dtype=np.float64)
+    return np.asarray(v, dtype=np.float64)
+
+
+_ray_cache = {}
+
+
+def primary_rays(width, height) -> np.ndarray:
+    """
+    生成整帧归一化的主光线方向，映射方式与 test_52 的 trace_ray 一致
+    返回:
+        形状为 (height, width, 3) 的数组；同一分辨率只计算一次
+    """
+    key = (width, height)
+    rays = _ray_cache.get(key)
+    if rays is None:
+        aspect_ratio = width / height
+        px = (2 * (np.arange(width) + 0.5) / width - 1) * aspect_ratio
+        py = 1 - 2 * (np.arange(height) + 0.5) / height
+        rays = np.empty((height, width, 3))
+        rays[..., 0] = px[None, :]
+        rays[..., 1] = py[:, None]
+        rays[..., 2] = 1.0
+        rays /= np.linalg.norm(rays, axis=-1, keepdims=True)
+        _ray_cache[key] = rays
+    return rays
+
+
+def ray_columns(dirs):
+    """
+    光线方向按分量拆成一维数组，并预先算好倒数（包围盒求交用）
+    返回:
+        (三个方向分量, 三个倒数分量)
+    """
+    d = [np.ascontiguousarray(dirs[:, i]) for i in range(3)]
+    with np.errstate(divide='ignore'):
+        inv = [1.0 / np.where(d[i] == 0, 1e-12, d[i]) for i in range(3)]
+    return d, inv
+
+
+_column_cache = {}
+
+
+def primary_columns(width, height, rows=None):
+    """整帧（或 rows 指定的一段行）主光线的 ray_columns 结果，只计算一次"""
+    key = (width, height, rows)
+    columns = _column_cache.get(key)
+    if columns is None:
+        y0, y1 = rows if rows is not None else (0, height)
+        columns = ray_columns(primary_rays(width, height)[y0:y1].reshape(-1, 3))
+        _column_cache[key] = columns
+    return columns
+
+
+# 自交偏移，避免阴影光线打中出发点所在的表面
+EPSILON = 1e-4
+
+
+class Scene:
+    """
+    多物体场景：球体放进层次包围盒（BVH），平面数量少、无法包围，单独逐个求交
+    物体编号：球体按传入顺序为 0..N-1，平面紧随其后
+    构建后只保存 NumPy 数组，可以直接 pickle 传给子进程
+    """
+
+    # 叶子节点最多容纳的球体数
+    leaf_size = 4
+
+    def __init__(self, spheres=(), planes=()):
+        """
+        参数:
+            spheres: Sphere 列表（center / radius / color）
+            planes: 平面列表（point / normal / color）
+        """
+        spheres, planes = list(spheres), list(planes)
+        self.n_spheres = len(spheres)
+        self.n_planes = len(planes)
+        self.centers = np.array([to_array(s.center) for s in spheres]).reshape(-1, 3)
+        self.radii = np.array([s.radius for s in spheres], dtype=np.float64)
+        self.plane_points = np.array([to_array(p.point) for p in planes]).reshape(-1, 3)
+        normals = np.array([to_array(p.normal) for p in planes]).reshape(-1, 3)
+        self.plane_normals = normals / np.linalg.norm(normals, axis=-1, keepdims=True) if len(normals) else normals
+        self.colors = np.array([o.color[:3] for o in spheres + planes],
+                               dtype=np.float64).reshape(-1, 3)
+        self._build()
+
+    # --- BVH 构建 ---
+    def _build(self):
+        """按最长轴中位数递归二分，结果展开为扁平数组便于批量遍历"""
+        self.order = np.arange(self.n_spheres)
+        self.node_min, self.node_max = [], []
+        self.node_left, self.node_right = [], []
+        self.node_start, self.node_count = [], []
+        if self.n_spheres:
+            lo = self.centers - self.radii[:, None]
+            hi = self.centers + self.radii[:, None]
+            self._build_node(lo, hi, 0, self.n_spheres)
+        self.node_min = np.array(self.node_min).reshape(-1, 3)
+        self.node_max = np.array(self.node_max).reshape(-1, 3)
+        # 叶子内的球体按 order 重排，遍历时连续切片即可
+        self.leaf_centers = self.centers[self.order]
+        self.leaf_radii = self.radii[self.order]
+
+    def _build_node(self, lo, hi, start, end) -> int:
+        node = len(self.node_min)
+        idx = self.order[start:end]
+        self.node_min.append(lo[idx].min(axis=0))
+        self.node_max.append(hi[idx].max(axis=0))
+        self.node_left.append(-1)
+        self.node_right.append(-1)
+        self.node_start.append(start)
+        self.node_count.append(end - start)
+        if end - start <= self.leaf_size:
+            return node
+
+        centers = self.centers[idx]
+        axis = int(np.argmax(centers.max(axis=0) - centers.min(axis=0)))
+        self.order[start:end] = idx[np.argsort(centers[:, axis], kind='stable')]
+        mid = (start + end) // 2
+        self.node_count[node] = 0
+        self.node_left[node] = self._build_node(lo, hi, start, mid)
+        self.node_right[node] = self._build_node(lo, hi, mid, end)
+        return node
+
+    # --- 求交 ---
+    @staticmethod
+    def _sphere_t(ox, oy, oz, dx, dy, dz, center, radius) -> np.ndarray:
+        """光线（按分量拆开的一维数组）与单个球体求交，返回最近的正交点 t，未命中为 inf"""
+        cx, cy, cz = ox - center[0], oy - center[1], oz - center[2]
+        a = dx * dx + dy * dy + dz * dz
+        b = 2.0 * (cx * dx + cy * dy + cz * dz)
+        c = cx * cx + cy * cy + cz * cz - radius * radius
+        disc = b * b - 4 * a * c
+        t = np.full(disc.shape, np.inf)
+        hit = disc >= 0
+        if hit.any():
+            sq = np.sqrt(disc[hit])
+            near = (-b[hit] - sq) / (2.0 * a[hit])
+            far = (-b[hit] + sq) / (2.0 * a[hit])
+            near = np.where(near > EPSILON, near, far)
+            near[~(near > EPSILON)] = np.inf
+            t[hit] = near
+        return t
+
+    def intersect(self, origins, dirs, t_max=None, any_hit=False, columns=None):
+        """
+        批量求最近交点
+        参数:
+            origins: (3,) 或 (n, 3) 光线起点
+            dirs: (n, 3) 光线方向
+            t_max: 可选 (n,) 最远距离（阴影光线为到光源的距离）
+            any_hit: True 时命中任意物体即停止该光线的遍历（阴影测试）
+            columns: 可选，dirs 对应的 ray_columns 结果（主光线可复用缓存）
+        返回:
+            (t, obj_id)，未命中的 t 为 inf、obj_id 为 -1
+        """
+        n = len(dirs)
+        origins = np.asarray(origins, dtype=np.float64)
+        t_best = np.full(n, np.inf) if t_max is None else np.array(t_max, dtype=np.float64)
+        id_best = np.full(n, -1, dtype=np.int64)
+
+        # 平面
+        for j in range(self.n_planes):
+            normal = self.plane_normals[j]
+            denom = dirs @ normal
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = ((self.plane_points[j] - origins) @ normal) / denom
+            t[~(t > EPSILON)] = np.inf
+            closer = t < t_best
+            t_best[closer] = t[closer]
+            id_best[closer] = self.n_spheres + j
+
+        if not len(self.node_min):
+            return t_best, id_best
+
+        # 按分量拆成一维数组（SoA），节点内的运算都是逐元素的，避免 (n, 3) 数组上的轴归约
+        # 所有光线共用一个起点（主光线）时分量直接用标量
+        shared = origins.ndim == 1
+        o = list(origins) if shared else [np.ascontiguousarray(origins[:, i]) for i in range(3)]
+        d, inv = columns if columns is not None else ray_columns(dirs)
+
+        # BVH：整批光线一起向下遍历，每个节点只保留命中包围盒且可能更近的光线
+        stack = [(0, None)]
+        while stack:
+            node, idx = stack.pop()
+            if any_hit and idx is not None:
+                idx = idx[id_best[idx] < 0]
+            lo, hi = self.node_min[node], self.node_max[node]
+            t_enter = np.zeros(n if idx is None else idx.size)
+            t_exit = t_best if idx is None else t_best[idx]
+            for i in range(3):
+                oi = o[i] if idx is None or shared else o[i][idx]
+                ii = inv[i] if idx is None else inv[i][idx]
+                t0 = (lo[i] - oi) * ii
+                t1 = (hi[i] - oi) * ii
+                t_enter = np.maximum(t_enter, np.minimum(t0, t1))
+                t_exit = np.minimum(t_exit, np.maximum(t0, t1))
+            keep = np.flatnonzero(t_enter <= t_exit)
+            idx = keep if idx is None else idx[keep]
+            if not idx.size:
+                continue
+
+            count = self.node_count[node]
+            if count:
+                start = self.node_start[node]
+                rays = (o if shared else [a[idx] for a in o]) + [a[idx] for a in d]
+                for k in range(start, start + count):
+                    t = self._sphere_t(*rays, self.leaf_centers[k], self.leaf_radii[k])
+                    closer = t < t_best[idx]
+                    t_best[idx[closer]] = t[closer]
+                    id_best[idx[closer]] = self.order[k]
+            else:
+                stack.append((self.node_right[node], idx))
+                stack.append((self.node_left[node], idx))
+        return t_best, id_best
+
+    def normals(self, points, ids, dirs) -> np.ndarray:
+        """交点处的单位法线；平面法线朝向光线来的一侧"""
+        n_spheres = self.n_spheres
+        if not self.n_planes:
+            return (points - np.take(self.centers, ids, axis=0)) / np.take(self.radii, ids)[:, None]
+        # 球体与平面的参数拼成一张表，按 ids 一次取出，避免布尔掩码分组
+        centers = np.concatenate((self.centers, np.zeros((self.n_planes, 3))))
+        radii = np.concatenate((self.radii, np.ones(self.n_planes)))
+        plane_normals = np.concatenate((np.zeros((n_spheres, 3)), self.plane_normals))
+        is_sphere = (ids < n_spheres)[:, None]
+        sphere_n = (points - np.take(centers, ids, axis=0)) / np.take(radii, ids)[:, None]
+        plane_n = np.take(plane_normals, ids, axis=0)
+        facing = np.einsum('ij,ij->i', plane_n, dirs) < 0
+        plane_n = np.where(facing[:, None], plane_n, -plane_n)
+        return np.where(is_sphere, sphere_n, plane_n)
+
+
+def render(width, height, camera, scene, light, shadows=True, rows=None) -> np.ndarray:
+    """
+    渲染一帧
+    参数:
+        camera: 相机位置（Vector3）
+        scene: Scene，或 Sphere 列表（自动包装为 Scene）
+        light: Light，漫反射系数为 max(0, n·l) * intensity
+        shadows: 是否向光源发射阴影光线
+        rows: 可选 (y0, y1)，只渲染这一段行（分块并行渲染用）
+    返回:
+        形状为 (width, 行数, 3) 的 uint8 数组，可直接 pygame.surfarray.blit_array
+    """
+    if not isinstance(scene, Scene):
+        scene = Scene(scene)
+    origin = to_array(camera)
+    y0, y1 = rows if rows is not None else (0, height)
+    dirs = primary_rays(width, height)[y0:y1].reshape(-1, 3)
+    t_near, hit_id = scene.intersect(origin, dirs, columns=primary_columns(width, height, rows))
+
+    # 逐像素漫反射系数，未命中的像素保持 0
+    shade = np.zeros(len(dirs))
+    hit = np.flatnonzero(hit_id >= 0)
+    if hit.size:
+        # 只对命中的像素做着色（np.take 比花式索引快得多）
+        ids = np.take(hit_id, hit)
+        hit_dirs = np.take(dirs, hit, axis=0)
+        points = origin + np.take(t_near, hit)[:, None] * hit_dirs
+        normals = scene.normals(points, ids, hit_dirs)
+        to_light = to_array(light.position) - points
+        light_dist = np.sqrt(np.einsum('ij,ij->i', to_light, to_light))
+        light_dirs = to_light / light_dist[:, None]
+        diffuse = np.maximum(0, np.einsum('ij,ij->i', normals, light_dirs)) * light.intensity
+
+        if shadows:
+            # 只有朝向光源的点才需要阴影光线
+            lit = np.flatnonzero(diffuse > 0)
+            _, blocker = scene.intersect(np.take(points, lit, axis=0) + np.take(normals, lit, axis=0) * EPSILON,
+                                         np.take(light_dirs, lit, axis=0),
+                                         t_max=np.take(light_dist, lit), any_hit=True)
+            diffuse[lit[blocker >= 0]] = 0
+        shade[hit] = diffuse
+
+    # 颜色表前面补一行黑色给未命中的像素，整帧一次取色
+    colors = np.concatenate((np.zeros((1, 3)), scene.colors))
+    image = np.take(colors, hit_id + 1, axis=0) * shade[:, None]
+    # 与 int() 一致向零截断，并限制在 0-255
+    image = np.clip(image, 0, 255).astype(np.uint8)
+    return image.reshape(y1 - y0, width, 3).transpose(1, 0, 2)
+
+
+# --- 分块并行渲染（供进程池调用） ---
+
+# 子进程内的场景，由进程池 initializer 设置一次，任务只传相机和光源
+_worker_scene = None
+
+
+def init_worker(scene):
+    global _worker_scene
+    _worker_scene = scene
+
+
+def render_rows(width, height, y0, y1, camera, light_position, intensity, shadows=True, scene=None):
+    """
+    进程池任务：渲染 [y0, y1) 这一段行
+    参数:
+        camera, light_position: 三元组
+        scene: 为 None 时使用 init_worker 设置的场景
+    返回:
+        (y0, (width, y1 - y0, 3) 的颜色数组, 耗时秒数)
+    """
+    start = time.perf_counter()
+    light = SimpleNamespace(position=light_position, intensity=intensity)
+    image = render(width, height, camera, scene if scene is not None else _worker_scene, light, shadows, (y0, y1))
+    return y0, image, time.perf_counter() - start
+
+
+def benchmark(counts=(1, 100, 10000), width=320, height=240, seed=0):
+    """
+    BVH 求交性能测试：随机球体场景下每秒处理的主光线数
+    球体数 <= 100 时同时给出逐个求交（不建 BVH）的结果作对比
+    """
+    rng = np.random.default_rng(seed)
+    dirs = primary_rays(width, height).reshape(-1, 3)
+    origin = np.array((0.0, 0.0, -5.0))
+    vec = lambda p: SimpleNamespace(x=p[0], y=p[1], z=p[2])
+    results = []
+    for count in counts:
+        # 球体散布在相机前方的立方体内，半径随数量缩小，让画面覆盖率大致相当
+        centers = rng.uniform((-4, -3, 2), (4, 3, 10), size=(count, 3))
+        radius = 1.5 / max(1, count) ** (1 / 3)
+        spheres = [SimpleNamespace(center=vec(c), radius=radius, color=(255, 0, 0)) for c in centers]
+
+        start = time.perf_counter()
+        scene = Scene(spheres)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        scene.intersect(origin, dirs)
+        bvh_rate = dirs.shape[0] / (time.perf_counter() - start)
+
+        line = f"{count:>6} 个球体: 构建 {build * 1000:7.1f} ms, BVH {bvh_rate / 1e6:6.2f} M 光线/秒"
+        if count <= 100:
+            start = time.perf_counter()
+            rays = [np.full(len(dirs), origin[i]) for i in range(3)] + [dirs[:, i] for i in range(3)]
+            t_best = np.full(len(dirs), np.inf)
+            for center, radius in zip(scene.centers, scene.radii):
+                np.minimum(t_best, Scene._sphere_t(*rays, center, radius), out=t_best)
+            brute_rate = dirs.shape[0] / (time.perf_counter() - start)
+            line += f", 逐个求交 {brute_rate / 1e6:6.2f} M 光线/秒"
+        print(line)
+        results.append((count, bvh_rate))
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
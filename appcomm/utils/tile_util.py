@@ -0,0 +1,313 @@
+# 超大图像的分块流式滤镜
+# 用法示例:
+#   python -m appcomm.utils.tile_util scan.ppm scan_watercolor.bmp watercolor -p blur_radius=5
+#   python -m appcomm.utils.tile_util pano.bmp pano_mosaic.ppm mosaic -p block_size=15 -t 2048
+# 整幅读入的做法峰值内存是图像大小的好几倍（原图、模糊图、边缘图、混合结果……）。这里按块处理：
+#   - 输入为未压缩格式（PPM / BMP / 未压缩 TIFF / .npy）时直接内存映射文件，只读取当前块
+#   - 每块四周多读 halo 像素（按模糊半径、边缘卷积核大小确定），处理后裁掉 halo 写入输出，
+#     块内每个像素都能看到完整的邻域，结果与整幅处理一致
+#   - 输出为 PPM / BMP / .npy 时同样内存映射，逐块写入；其他格式先写临时 .npy，最后整幅转存
+#   - 对比度要用整幅图像的平均亮度：第一遍累加每块结果的亮度和，第二遍对输出逐块套用查找表
+# 峰值内存由块大小决定，与图像大小无关
+import argparse
+import contextlib
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+import appcomm.utils.filter_util as filter_util
+from appcomm.utils.color_util import ColorTransform, _luma_sum
+from appcomm.utils.memory_util import PeakMemory
+from appcomm.utils.param_util import parse_params
+
+# 默认块大小（像素）
+TILE_SIZE = 1024
+
+
+@contextlib.contextmanager
+def allow_huge_images(allow=True):
+    """
+    with 块内取消 PIL 的像素数上限（解压炸弹保护），退出时恢复原值
+    超大扫描件 / 全景图会超过默认上限；只在明确要处理超大图像的地方使用，allow 为 False 时什么都不做
+    """
+    if not allow:
+        yield
+        return
+    previous = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        yield
+    finally:
+        Image.MAX_IMAGE_PIXELS = previous
+
+
+# 行优先存放的 RGB 栅格：包装一块 (行数, 行字节数) 的内存映射，
+# 兼容 BMP 的 BGR 通道顺序、4 字节行对齐和自下而上的行顺序
+class Raster:
+
+    def __init__(self, rows: np.ndarray, width: int, bgr=False, bottom_up=False):
+        self.rows = rows
+        self.width = width
+        self.height = rows.shape[0]
+        self.shape = (self.height, width, 3)
+        self.bgr = bgr
+        self.bottom_up = bottom_up
+
+    def _rows(self, y0, y1):
+        if self.bottom_up:
+            return self.rows[self.height - y1:self.height - y0][::-1]
+        return self.rows[y0:y1]
+
+    def read(self, y0, y1, x0, x1) -> np.ndarray:
+        """读出 [y0, y1) x [x0, x1) 区域，返回连续的 RGB uint8 数组"""
+        block = self._rows(y0, y1)[:, x0 * 3:x1 * 3].reshape(y1 - y0, x1 - x0, 3)
+        if self.bgr:
+            block = block[:, :, ::-1]
+        return np.ascontiguousarray(block)
+
+    def write(self, y0, x0, tile: np.ndarray):
+        y1, x1 = y0 + tile.shape[0], x0 + tile.shape[1]
+        if self.bgr:
+            tile = tile[:, :, ::-1]
+        self._rows(y0, y1)[:, x0 * 3:x1 * 3] = tile.reshape(tile.shape[0], -1)
+
+    def flush(self):
+        if isinstance(self.rows, np.memmap):
+            self.rows.flush()
+
+
+def open_raster(path: str, allow_huge=False) -> Raster:
+    """
+    打开输入图像
+    .npy 与单块未压缩的 RGB 图像（PPM、24 位 BMP、未压缩 TIFF）直接内存映射，
+    其他格式（JPEG、PNG 等）无法按块解码，只能整幅解码到内存
+    allow_huge 为 True 时允许超过 PIL 像素数上限的图像
+    """
+    if path.lower().endswith(".npy"):
+        array = np.load(path, mmap_mode="r")
+        return Raster(array.reshape(array.shape[0], -1), array.shape[1])
+
+    with allow_huge_images(allow_huge), Image.open(path) as img:
+        tile = img.tile[0] if len(img.tile) == 1 else None
+        if img.mode == "RGB" and tile is not None and tile[0] == "raw":
+            args = tile[3] if isinstance(tile[3], tuple) else (tile[3], 0, 1)
+            rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+            width, height = img.size
+            stride = stride or width * 3
+            if rawmode in ("RGB", "BGR") and tile[1] == (0, 0, width, height):
+                rows = np.memmap(path, dtype=np.uint8, mode="r", offset=tile[2], shape=(height, stride))
+                return Raster(rows[:, :width * 3], width, bgr=rawmode == "BGR", bottom_up=orientation < 0)
+        array = np.asarray(img.convert("RGB"))
+    return Raster(array.reshape(array.shape[0], -1), array.shape[1])
+
+
+def _write_header(path, header: bytes, size: int):
+    with open(path, "wb") as f:
+        f.write(header)
+        f.truncate(len(header) + size)
+
+
+def create_raster(path: str, width: int, height: int) -> Raster:
+    """
+    创建可逐块写入的输出文件（.npy、.ppm、.bmp），内容由内存映射写入
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        array = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(height, width, 3))
+        return Raster(array.reshape(height, width * 3), width)
+    if ext == ".ppm":
+        header = f"P6\n{width} {height}\n255\n".encode("ascii")
+        _write_header(path, header, width * height * 3)
+        rows = np.memmap(path, dtype=np.uint8, mode="r+", offset=len(header), shape=(height, width * 3))
+        return Raster(rows, width)
+    if ext == ".bmp":
+        stride = (width * 3 + 3) & ~3
+        size = stride * height
+        header = b"BM" + np.array([54 + size, 0, 54], dtype="<u4").tobytes() + \
+            np.array([40, width, height], dtype="<i4").tobytes() + \
+            np.array([1, 24], dtype="<u2").tobytes() + \
+            np.array([0, size, 2835, 2835, 0, 0], dtype="<u4").tobytes()
+        _write_header(path, header, size)
+        rows = np.memmap(path, dtype=np.uint8, mode="r+", offset=len(header), shape=(height, stride))
+        return Raster(rows[:, :width * 3], width, bgr=True, bottom_up=True)
+    raise ValueError(f"不支持逐块写入的格式 {ext}，可用 .npy / .ppm / .bmp")
+
+
+def tiles(height, width, tile_size=TILE_SIZE, align=1):
+    """按行优先产生 (y0, y1, x0, x1)，块大小取 align 的整数倍，保证对齐的块（如马赛克方块）不会被切开"""
+    step = max(align, tile_size // align * align)
+    for y0 in range(0, height, step):
+        for x0 in range(0, width, step):
+            yield y0, min(y0 + step, height), x0, min(x0 + step, width)
+
+
+# --- 各滤镜的分块方案 ---
+# 返回 (块处理函数, halo, 对齐, 对比度因子)
+#   块处理函数: RGB 数组进出
+#   halo: 块四周需要多读的像素数
+#   对齐: 块大小必须是它的整数倍
+#   对比度因子: 不为 None 时在所有块处理完之后按整幅平均亮度增强对比度
+
+def gaussian_halo(radius) -> int:
+    """
+    PIL 的 GaussianBlur 由三次盒式模糊近似，每次的盒半径约为 sqrt(4 * radius ^ 2 + 1) / 2，
+    三次叠加后影响范围不超过 3 * radius + 3 个像素
+    """
+    return int(math.ceil(3 * radius)) + 3
+
+
+def _invert_plan(enhance_factor=1.0):
+    return ColorTransform().invert().apply, 0, 1, (enhance_factor if enhance_factor != 1.0 else None)
+
+
+def _mosaic_plan(block_size=10):
+    return (lambda rgb: filter_util.mosaic(rgb, block_size)), 0, int(block_size), None
+
+
+def _watercolor_plan(blur_radius=5, color_boost=1.5):
+    def process(rgb):
+        img = filter_util.watercolor_base_image(Image.fromarray(rgb), blur_radius, color_boost)
+        return ColorTransform().brightness(1.1).apply(np.asarray(img))
+
+    # FIND_EDGES 与 EDGE_ENHANCE 都是 3x3 卷积，各需要 1 像素
+    return process, max(gaussian_halo(blur_radius), 2), 1, 1.2
+
+
+def _dreamy_plan(blur_radius=10):
+    return (lambda rgb: filter_util.dreamy_blur(rgb, blur_radius)), gaussian_halo(blur_radius), 1, None
+
+
+TILED_FILTERS = {
+    "invert": _invert_plan,
+    "mosaic": _mosaic_plan,
+    "watercolor": _watercolor_plan,
+    "dreamy": _dreamy_plan,
+}
+
+
+def process_raster(source: Raster, target: Raster, filter_name, params=None, tile_size=TILE_SIZE):
+    """把 source 逐块处理后写入 target（两者尺寸相同，可以是内存映射）"""
+    if filter_name not in TILED_FILTERS:
+        raise ValueError(f"滤镜 {filter_name} 不支持分块处理，可选: {', '.join(TILED_FILTERS)}")
+    func, halo, align, contrast = TILED_FILTERS[filter_name](**(params or {}))
+    height, width = source.shape[:2]
+
+    luma_total = 0
+    for y0, y1, x0, x1 in tiles(height, width, tile_size, align):
+        # 多读 halo，图像边缘处不足的部分不补，与整幅处理时的边缘行为一致
+        hy0, hy1 = max(0, y0 - halo), min(height, y1 + halo)
+        hx0, hx1 = max(0, x0 - halo), min(width, x1 + halo)
+        result = func(source.read(hy0, hy1, hx0, hx1))
+        result = result[y0 - hy0:y1 - hy0, x0 - hx0:x1 - hx0]
+        if contrast is not None:
+            luma_total += _luma_sum(result)
+        target.write(y0, x0, result)
+
+    if contrast is not None:
+        # 第二遍：整幅平均亮度已知，对比度只是一张查找表，直接在输出上原地处理
+        transform = ColorTransform().contrast(contrast, int(luma_total / (height * width) + 0.5))
+        for y0, y1, x0, x1 in tiles(height, width, tile_size):
+            target.write(y0, x0, transform.apply(target.read(y0, y1, x0, x1)))
+    target.flush()
+
+
+def process_file(input_path, output_path, filter_name, params=None, tile_size=TILE_SIZE, allow_huge=False):
+    """
+    分块处理一个文件
+    输出为 .npy / .ppm / .bmp 时逐块写入；其他格式先写到同目录的临时 .npy，最后整幅交给 PIL 保存
+    参数:
+        allow_huge: True 时允许超过 PIL 像素数上限的输入图像
+    返回:
+        图像尺寸 (宽, 高)
+    """
+    source = open_raster(input_path, allow_huge)
+    height, width = source.shape[:2]
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext in (".npy", ".ppm", ".bmp"):
+        process_raster(source, create_raster(output_path, width, height), filter_name, params, tile_size)
+        return width, height
+
+    fd, temp_path = tempfile.mkstemp(suffix=".npy", dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        target = create_raster(temp_path, width, height)
+        process_raster(source, target, filter_name, params, tile_size)
+        del target
+        Image.fromarray(np.load(temp_path, mmap_mode="r")).save(output_path)
+    finally:
+        os.remove(temp_path)
+    return width, height
+
+
+# --- 性能测试 ---
+def _measure(mode, path, output_path, filter_name, params, queue):
+    """在独立进程中运行，报告耗时和私有内存峰值增量（MB）"""
+    with PeakMemory() as peak:
+        start = time.perf_counter()
+        if mode == "whole":
+            with allow_huge_images():
+                rgb = np.asarray(Image.open(path).convert("RGB"))
+            Image.fromarray(filter_util.FILTERS[filter_name](rgb, **params)).save(output_path)
+        else:
+            process_file(path, output_path, filter_name, params, allow_huge=True)
+        seconds = time.perf_counter() - start
+    queue.put((seconds, peak.mb))
+
+
+def benchmark(width=12000, height=8000, filters=None, workdir=None):
+    """
+    生成一张 width x height 的 BMP，对比整幅处理与分块处理的耗时、私有内存峰值增量，并校验结果一致
+    """
+    filters = filters or {"invert": {"enhance_factor": 1.2}, "mosaic": {"block_size": 15},
+                          "watercolor": {}, "dreamy": {}}
+    workdir = workdir or tempfile.mkdtemp()
+    path = os.path.join(workdir, "large.bmp")
+    source = create_raster(path, width, height)
+    # 平滑渐变 + 噪声，避免纯色图让模糊和边缘检测失去意义
+    rng = np.random.default_rng(0)
+    for y0, y1, x0, x1 in tiles(height, width):
+        yy, xx = np.mgrid[y0:y1, x0:x1]
+        base = np.stack([xx * 255 // width, yy * 255 // height, (xx + yy) % 256], axis=-1)
+        noise = rng.integers(0, 40, base.shape)
+        source.write(y0, x0, np.clip(base + noise, 0, 255).astype(np.uint8))
+    source.flush()
+    del source
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{width}x{height}（{width * height * 3 / 2 ** 20:.0f} MB）")
+    print(f"{'滤镜':<12} | {'整幅':>18} | {'分块':>18} | 一致")
+    for filter_name, params in filters.items():
+        row = []
+        for mode in ("whole", "tiled"):
+            output_path = os.path.join(workdir, f"{filter_name}_{mode}.bmp")
+            queue = context.Queue()
+            process = context.Process(target=_measure,
+                                      args=(mode, path, output_path, filter_name, params, queue))
+            process.start()
+            seconds, peak = queue.get()
+            process.join()
+            row.append(f"{seconds:6.2f} s {peak:7.0f} MB")
+        with allow_huge_images():
+            same = np.array_equal(np.asarray(Image.open(os.path.join(workdir, f"{filter_name}_whole.bmp"))),
+                                  np.asarray(Image.open(os.path.join(workdir, f"{filter_name}_tiled.bmp"))))
+        print(f"{filter_name:<12} | {row[0]:>18} | {row[1]:>18} | {same}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="超大图像分块滤镜")
+    parser.add_argument("input", help="输入图像，PPM / BMP / 未压缩 TIFF / .npy 可内存映射")
+    parser.add_argument("output", help="输出图像，.npy / .ppm / .bmp 逐块写入")
+    parser.add_argument("filter", choices=sorted(TILED_FILTERS), help="滤镜名")
+    parser.add_argument("-p", "--param", action="append", metavar="KEY=VALUE", help="滤镜参数，可重复")
+    parser.add_argument("-t", "--tile-size", type=int, default=TILE_SIZE, help="块大小（像素）")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    process_file(args.input, args.output, args.filter, parse_params(args.param), args.tile_size, allow_huge=True)
+    print(f"完成，用时 {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
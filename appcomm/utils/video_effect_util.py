@@ -0,0 +1,463 @@
+# 视频帧特效（边缘检测 / 素描）与离线渲染
+# 用法示例:
+#   result = edge_effect(frame, mode=2, threshold1=80)
+#   result = sketch_effect(frame, mode=3, palette=PaletteQuantizer())
+#   render_video("in.mp4", "out.mp4", "sketch", {"mode": 1, "blur_size": 9}, workers=4)
+#   python -m appcomm.utils.video_effect_util in.mp4 out.mp4 -e edge -p mode=2 -p threshold1=80
+#   python -m appcomm.utils.video_effect_util --benchmark 1000   # 缓冲区复用的耗时 / 内存对比
+# test_23 / test_24 的交互程序调用同样的函数。离线渲染不开窗口：主进程按顺序解码，
+# 连续的若干帧打成一批交给进程池，最多 workers * 2 批在途，结果按原顺序写入 cv2.VideoWriter。
+# 卡通素描的调色板依赖之前的帧，由主进程按顺序决定，随帧发给子进程，结果与单进程逐帧处理相同。
+# 特效的中间结果都取自 buffer_util 的缓冲池，作为 OpenCV 函数的 dst 写入，逐帧处理时不再新建整帧数组；
+# 结果写入调用方给的 out（不给时新建一个，交给其他线程显示的结果不能被下一帧覆盖）
+import argparse
+import os
+import random
+import time
+import tracemalloc
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+from appcomm.utils.buffer_util import frame_pool
+from appcomm.utils.memory_util import PeakMemory
+from appcomm.utils.palette_util import PaletteQuantizer, lut_index
+from appcomm.utils.param_util import parse_params
+
+# 卡通素描中值滤波的核大小（调色板在中值滤波后的画面上拟合）
+CARTOON_MEDIAN_KSIZE = 7
+
+# 离线渲染时每批的帧数
+BATCH_FRAMES = 8
+
+# 输出扩展名 -> 编码器
+FOURCC = {".mp4": "mp4v", ".m4v": "mp4v", ".mov": "mp4v", ".avi": "MJPG", ".mkv": "XVID"}
+
+
+def _scale_lut(factor) -> np.ndarray:
+    """v -> round(v * factor) 的查找表，代替与整帧浮点数组相乘"""
+    return np.clip(np.rint(np.arange(256) * factor), 0, 255).astype(np.uint8)
+
+
+# 浮雕核
+EMBOSS_KERNEL = np.array([[-2, -1, 0], [-1, 1, 1], [0, 1, 2]])
+
+
+def edge_effect(frame, mode=0, threshold1=100, threshold2=200, show_original=False, edge_color=(255, 255, 255),
+                out=None, pool=frame_pool):
+    """
+    Canny 边缘检测特效（test_23）
+    参数:
+        mode: 0 普通边缘, 1 彩色边缘, 2 霓虹边缘, 3 随机边缘
+        show_original: 是否把边缘叠加在原始画面上
+        out: 写入结果的数组（与 frame 同形状），None 时新建
+        pool: 中间结果的缓冲池
+    """
+    shape = frame.shape[:2]
+    result = np.empty_like(frame) if out is None else out
+    # 叠加原始画面时边缘先画在中间缓冲区里
+    edge_frame = pool.get("edge_frame", frame.shape) if show_original else result
+
+    # 转换为灰度图
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.get("gray", shape))
+
+    # 使用Canny算法进行边缘检测
+    edges = cv2.Canny(gray, threshold1, threshold2, edges=pool.get("edges", shape))
+
+    # 根据特效模式处理边缘
+    if mode == 0:  # 普通边缘
+        # 黑色背景上的边缘颜色：Canny 的结果只有 0 和 255，扩展为三通道后与边缘颜色按位与即可
+        cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR, dst=edge_frame)
+        cv2.bitwise_and(edge_frame, tuple(edge_color) + (0,), dst=edge_frame)
+
+    elif mode == 1:  # 彩色边缘
+        # 将边缘检测结果扩展为三通道
+        edges_color = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR, dst=pool.get("edges_bgr", frame.shape))
+        # 使用原始图像的颜色作为边缘颜色
+        cv2.bitwise_and(frame, edges_color, dst=edge_frame)
+
+    elif mode == 2:  # 霓虹边缘
+        # 生成随机霓虹颜色
+        neon_color = (random.randint(150, 255),
+                      random.randint(150, 255),
+                      random.randint(150, 255))
+        # 将边缘绘制为霓虹颜色
+        neon = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR, dst=pool.get("edges_bgr", frame.shape))
+        cv2.bitwise_and(neon, neon_color + (0,), dst=neon)
+
+        # 添加模糊效果增强霓虹感
+        cv2.GaussianBlur(neon, (5, 5), 0, dst=edge_frame)
+
+    else:  # 随机边缘
+        # 黑色背景
+        edge_frame.fill(0)
+        # 为每个边缘像素随机分配颜色（只为边缘像素生成随机数，边缘通常只占画面很小一部分）
+        mask = np.greater(edges, 0, out=pool.get("edge_mask", shape, np.bool_))
+        edge_frame[mask] = np.random.randint(0, 256, (np.count_nonzero(mask), 3), dtype=np.uint8)
+
+    # 如果需要显示原始画面，则将边缘叠加在原始画面上
+    if show_original:
+        cv2.addWeighted(frame, 0.7, edge_frame, 1.0, 0, dst=result)
+    return result
+
+
+def sketch_effect(frame, mode=0, blur_size=7, edge_strength=255, invert=False, show_original=False, palette=None,
+                  out=None, pool=frame_pool):
+    """
+    素描特效（test_24）
+    参数:
+        mode: 0 铅笔素描, 1 彩色素描, 2 浮雕素描, 3 卡通素描
+        blur_size: 高斯模糊核大小（奇数）
+        palette: 卡通素描的 PaletteQuantizer，跨帧复用；None 时每次新建（单张图片）
+        out: 写入结果的数组（与 frame 同形状），None 时新建
+        pool: 中间结果的缓冲池
+    """
+    # 确保帧不为空
+    if frame is None or frame.size == 0:
+        return None
+    shape = frame.shape[:2]
+    result = np.empty_like(frame) if out is None else out
+
+    # 转换为灰度图
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.get("gray", shape))
+
+    # 应用高斯模糊减少噪点
+    blurred = cv2.GaussianBlur(gray, (blur_size, blur_size), 0, dst=pool.get("blurred", shape))
+
+    # 根据素描模式处理图像
+    if mode == 0:  # 铅笔素描
+        # 计算灰度图像的反转
+        if invert:
+            inverted_blurred = cv2.bitwise_not(blurred, dst=blurred)
+        else:
+            inverted_blurred = blurred
+
+        # 创建铅笔素描效果
+        sketch = cv2.divide(gray, inverted_blurred, scale=256.0, dst=pool.get("sketch", shape))
+
+        # 调整边缘强度（在单通道上查表，再转换回BGR格式）
+        if edge_strength < 255:
+            cv2.LUT(sketch, _scale_lut(edge_strength / 255.0), dst=sketch)
+        cv2.cvtColor(sketch, cv2.COLOR_GRAY2BGR, dst=result)
+
+    elif mode == 1:  # 彩色素描
+        # 应用双边滤波保留边缘同时平滑颜色
+        color_sketch = cv2.bilateralFilter(frame, 9, 75, 75, dst=pool.get("smooth", frame.shape))
+
+        # 创建边缘掩码
+        edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                      cv2.THRESH_BINARY_INV, 11, 2, dst=pool.get("mask", shape))
+
+        # 将边缘掩码转换为三通道
+        edges = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR, dst=pool.get("mask_bgr", frame.shape))
+
+        # 合并彩色和平滑效果
+        cv2.bitwise_and(color_sketch, edges, dst=result)
+
+    elif mode == 2:  # 浮雕素描
+        # 应用浮雕效果
+        embossed = cv2.filter2D(gray, -1, EMBOSS_KERNEL, dst=pool.get("embossed", shape))
+
+        # 调整亮度
+        cv2.add(embossed, 128, dst=embossed)
+
+        # 转换回BGR格式
+        cv2.cvtColor(embossed, cv2.COLOR_GRAY2BGR, dst=result)
+
+    else:  # 卡通素描
+        # 应用中值滤波减少噪点
+        median_filtered = cv2.medianBlur(frame, CARTOON_MEDIAN_KSIZE, dst=pool.get("median", frame.shape))
+
+        # 创建边缘掩码
+        edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                      cv2.THRESH_BINARY_INV, 9, 2, dst=pool.get("mask", shape))
+
+        # 应用颜色量化减少颜色数量，增强卡通效果
+        cartoon = (palette or PaletteQuantizer(num_colors=7)).quantize(median_filtered,
+                                                                        out=pool.get("cartoon", frame.shape))
+
+        # 将边缘掩码转换为三通道
+        edges = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR, dst=pool.get("mask_bgr", frame.shape))
+
+        # 合并卡通和平滑效果
+        cv2.bitwise_and(cartoon, edges, dst=result)
+
+    # 如果需要显示原始画面，则将素描效果叠加在原始画面上
+    if show_original:
+        # 调整透明度
+        alpha = 0.5
+        cv2.addWeighted(frame, alpha, result, 1 - alpha, 0, dst=result)
+
+    return result
+
+
+# 特效名 -> 函数
+EFFECTS = {"edge": edge_effect, "sketch": sketch_effect}
+
+
+# --- 离线渲染 ---
+class _SketchPaletteSchedule:
+    """卡通素描：在主进程中按帧顺序更新调色板，返回每帧应使用的调色板中心"""
+
+    def __init__(self, params):
+        self.active = params.get("mode", 0) == 3
+        self.palette = PaletteQuantizer(num_colors=7)
+
+    def __call__(self, frame):
+        if not self.active:
+            return None
+        self.palette.update(cv2.medianBlur(frame, CARTOON_MEDIAN_KSIZE))
+        return self.palette.centers
+
+
+# 子进程中的特效和参数，由进程池的 initializer 设置
+_worker_effect = None
+_worker_params = {}
+_worker_palette = None
+
+
+def _init_worker(effect, params):
+    global _worker_effect, _worker_params, _worker_palette
+    _worker_effect = EFFECTS[effect]
+    _worker_params = dict(params)
+    _worker_palette = PaletteQuantizer(num_colors=7)
+
+
+def _render_batch(frames, centers):
+    """子进程：对一批连续的帧应用特效；centers 为各帧的调色板中心（不需要时为 None）"""
+    results = []
+    for frame, center in zip(frames, centers):
+        params = _worker_params
+        if center is not None:
+            _worker_palette.load(center)
+            params = dict(params, palette=_worker_palette)
+        results.append(_worker_effect(frame, **params))
+    return results
+
+
+def _batches(cap, schedule, batch_frames):
+    """按顺序读出 (帧列表, 调色板中心列表) 批次"""
+    while True:
+        frames, centers = [], []
+        while len(frames) < batch_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+            centers.append(schedule(frame))
+        if not frames:
+            return
+        yield frames, centers
+
+
+def _rendered(batches, effect, params, workers):
+    """按原顺序产出渲染结果；进程池中最多有 workers * 2 批在途"""
+    if workers == 0:
+        _init_worker(effect, params)
+        for frames, centers in batches:
+            yield from _render_batch(frames, centers)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(effect, params)) as executor:
+        pending = deque()
+        while True:
+            while len(pending) < workers * 2:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                pending.append(executor.submit(_render_batch, *batch))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def render_video(input_path, output_path, effect="edge", params=None, workers=None, fourcc=None,
+                 batch_frames=BATCH_FRAMES, progress=True) -> dict:
+    """
+    对视频的每一帧应用特效并写出新视频（不需要窗口）
+    参数:
+        effect: EFFECTS 中的特效名
+        params: 特效参数，如 {"mode": 2, "threshold1": 80}
+        workers: 进程数，None 为 CPU 核数，0 表示在当前进程内处理
+        fourcc: 四字符编码，None 时按输出扩展名选择
+    返回:
+        {"frames": 帧数, "seconds": 用时, "fps": 每秒处理帧数}
+    """
+    if effect not in EFFECTS:
+        raise ValueError(f"未知特效 {effect}，可选: {', '.join(sorted(EFFECTS))}")
+    params = dict(params or {})
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise ValueError(f"无法打开视频 {input_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    fourcc = fourcc or FOURCC.get(os.path.splitext(output_path)[1].lower(), "mp4v")
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+
+    writer = None
+    count = 0
+    start = time.perf_counter()
+    try:
+        schedule = _SketchPaletteSchedule(params) if effect == "sketch" else (lambda frame: None)
+        for result in _rendered(_batches(cap, schedule, batch_frames), effect, params, workers):
+            if writer is None:
+                height, width = result.shape[:2]
+                writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+                if not writer.isOpened():
+                    raise ValueError(f"无法创建输出视频 {output_path}（编码器 {fourcc}）")
+            writer.write(result)
+            count += 1
+            if progress and count % 100 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  {count}/{total or '?'} 帧，{count / elapsed:.1f} fps")
+    finally:
+        cap.release()
+        if writer is not None:
+            writer.release()
+    seconds = time.perf_counter() - start
+    return {"frames": count, "seconds": seconds, "fps": count / seconds if seconds > 0 else 0.0}
+
+
+# --- 性能测试 ---
+def _edge_effect_reference(frame, mode=0, threshold1=100, threshold2=200, show_original=False,
+                           edge_color=(255, 255, 255)):
+    """不复用缓冲区的原实现：每帧新建灰度图、边缘、整帧背景等数组"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    edges = cv2.Canny(gray, threshold1, threshold2)
+    if mode == 0:
+        edge_frame = np.zeros_like(frame)
+        edge_frame[edges > 0] = edge_color
+    elif mode == 1:
+        edge_frame = cv2.bitwise_and(frame, cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR))
+    elif mode == 2:
+        edge_frame = np.zeros_like(frame)
+        edge_frame[edges > 0] = (random.randint(150, 255), random.randint(150, 255), random.randint(150, 255))
+        edge_frame = cv2.GaussianBlur(edge_frame, (5, 5), 0)
+    else:
+        edge_frame = np.zeros_like(frame)
+        mask = edges > 0
+        edge_frame[mask] = np.random.randint(0, 256, (np.count_nonzero(mask), 3), dtype=np.uint8)
+    if show_original:
+        return cv2.addWeighted(frame, 0.7, edge_frame, 1.0, 0)
+    return edge_frame
+
+
+def _sketch_effect_reference(frame, mode=0, blur_size=7, edge_strength=255, invert=False, show_original=False,
+                             palette=None):
+    """不复用缓冲区的原实现：边缘强度用整帧 float64 数组相乘"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    blurred = cv2.GaussianBlur(gray, (blur_size, blur_size), 0)
+    if mode == 0:
+        sketch = cv2.divide(gray, 255 - blurred if invert else blurred, scale=256.0)
+        result = cv2.cvtColor(sketch, cv2.COLOR_GRAY2BGR)
+        if edge_strength < 255:
+            result = cv2.multiply(result, np.ones_like(result) * (edge_strength / 255.0), dtype=cv2.CV_8U)
+    elif mode == 1:
+        edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+        result = cv2.bitwise_and(cv2.bilateralFilter(frame, 9, 75, 75), cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR))
+    elif mode == 2:
+        embossed = cv2.add(cv2.filter2D(gray, -1, EMBOSS_KERNEL), 128)
+        result = cv2.cvtColor(embossed, cv2.COLOR_GRAY2BGR)
+    else:
+        median_filtered = cv2.medianBlur(frame, CARTOON_MEDIAN_KSIZE)
+        edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 9, 2)
+        palette.update(median_filtered)
+        cartoon = palette.lut[lut_index(median_filtered)]
+        result = cv2.bitwise_and(cartoon, cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR))
+    if show_original:
+        result = cv2.addWeighted(frame, 0.5, result, 0.5, 0)
+    return result
+
+
+# 性能测试的用例：(名称, 特效, 参数)
+BENCHMARK_CASES = [
+    ("edge 普通", "edge", {"mode": 0}),
+    ("edge 彩色+原图", "edge", {"mode": 1, "show_original": True}),
+    ("edge 霓虹", "edge", {"mode": 2}),
+    ("edge 随机", "edge", {"mode": 3}),
+    ("sketch 铅笔 强度128", "sketch", {"mode": 0, "edge_strength": 128}),
+    ("sketch 彩色", "sketch", {"mode": 1}),
+    ("sketch 浮雕", "sketch", {"mode": 2}),
+    ("sketch 卡通", "sketch", {"mode": 3}),
+]
+
+
+def _measure_effect(func, frames, count, params, out=None):
+    """返回 (每帧毫秒, 每帧临时内存峰值 MB, 私有内存峰值增量 MB)"""
+    params = dict(params)
+    if params.get("mode") == 3 and func in (sketch_effect, _sketch_effect_reference):
+        params["palette"] = PaletteQuantizer(num_colors=7)
+    if out is not None:
+        params["out"] = out
+    func(frames[0], **params)  # 预热（缓冲区在这里分配）
+    with PeakMemory() as peak:
+        start = time.perf_counter()
+        for i in range(count):
+            func(frames[i % len(frames)], **params)
+        seconds = time.perf_counter() - start
+    # 单帧内同时存在的临时数组总大小（tracemalloc 会拖慢分配，与计时分开测）
+    tracemalloc.start()
+    transient = []
+    for i in range(min(count, 20)):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        func(frames[i % len(frames)], **params)
+        transient.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return seconds / count * 1000, np.mean(transient) / 2 ** 20, peak.mb
+
+
+def benchmark(frames=1000, size=(640, 480), cases=None):
+    """
+    对每个特效模式处理 frames 帧，对比每帧新建数组的原实现与复用缓冲区（结果写入同一个 out）的实现：
+    每帧耗时、每帧临时内存峰值、私有内存峰值增量，以及缓冲池在整个过程中新分配的数组个数
+    """
+    from appcomm.utils.palette_util import synthetic_clip
+    clip = list(synthetic_clip(16, size))
+    out = np.empty_like(clip[0])
+    print(f"{size[0]}x{size[1]}，每种模式 {frames} 帧")
+    print(f"{'模式':<18} | {'原实现 ms':>9} {'临时 MB':>8} {'峰值 MB':>8} | {'复用 ms':>8} {'临时 MB':>8} "
+          f"{'峰值 MB':>8} {'新分配':>6}")
+    for label, effect, params in cases or BENCHMARK_CASES:
+        reference = {"edge": _edge_effect_reference, "sketch": _sketch_effect_reference}[effect]
+        old = _measure_effect(reference, clip, frames, params)
+        before = frame_pool.allocations
+        new = _measure_effect(EFFECTS[effect], clip, frames, params, out)
+        print(f"{label:<18} | {old[0]:9.2f} {old[1]:8.2f} {old[2]:8.1f} | {new[0]:8.2f} {new[1]:8.2f} "
+              f"{new[2]:8.1f} {frame_pool.allocations - before:6d}")
+
+
+def main(argv=None, effect=None):
+    """
+    命令行入口
+    参数:
+        effect: 固定特效名（test_23 / test_24 调用时给出），None 时由 -e 选择
+    """
+    parser = argparse.ArgumentParser(description="视频特效离线渲染")
+    parser.add_argument("input", nargs="?", help="输入视频")
+    parser.add_argument("output", nargs="?", help="输出视频（.mp4 / .avi / .mkv）")
+    if effect is None:
+        parser.add_argument("-e", "--effect", choices=sorted(EFFECTS), default="edge", help="特效")
+    parser.add_argument("-m", "--mode", type=int, default=0, help="特效模式 0-3")
+    parser.add_argument("-p", "--param", action="append", metavar="KEY=VALUE",
+                        help="其他特效参数，可重复，如 threshold1=80、blur_size=9")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="进程数，默认 CPU 核数，0 为单进程")
+    parser.add_argument("--fourcc", default=None, help="四字符编码，默认按输出扩展名选择")
+    parser.add_argument("--benchmark", type=int, nargs="?", const=1000, default=None, metavar="帧数",
+                        help="缓冲区复用的耗时 / 内存对比（默认 1000 帧），不渲染视频")
+    args = parser.parse_args(argv)
+    if args.benchmark is not None:
+        benchmark(args.benchmark)
+        return
+    if args.input is None or args.output is None:
+        parser.error("需要输入视频和输出视频")
+    effect = effect or args.effect
+    params = dict(parse_params(args.param), mode=args.mode)
+    result = render_video(args.input, args.output, effect, params, args.workers, args.fourcc)
+    print(f"{effect} 模式 {args.mode}: {result['frames']} 帧，用时 {result['seconds']:.2f} s，"
+          f"{result['fps']:.1f} fps -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
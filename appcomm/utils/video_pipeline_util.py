@@ -0,0 +1,358 @@
+# 实时视频特效的 采集 → 处理 → 显示 三级流水线
+# 用法示例:
+#   pipeline = FramePipeline(capture_reader(cap), effect.apply_edge_effect)
+#   with pipeline:
+#       while not pipeline.finished:
+#           item = pipeline.get()
+#           if item is not None:
+#               cv2.imshow("窗口", item.result)
+#               cv2.waitKey(1)
+#               pipeline.shown(item)
+#   print(pipeline.stats.report())
+#   python -m appcomm.utils.video_pipeline_util          # 串行与流水线对比的性能测试
+# 采集线程只负责读帧，处理线程只负责套特效，显示留在主线程（OpenCV 的窗口函数只能在主线程调用）。
+# 各级之间是有界队列：下游来不及取时丢掉最旧的帧，总是处理、显示最新的画面，延迟不会越积越大。
+# OpenCV 的读帧和大部分滤镜在 C++ 中执行时会释放 GIL，所以线程就能让读帧与处理重叠
+import argparse
+import queue
+import threading
+import time
+from collections import deque
+import cv2
+import numpy as np
+
+# 视频源没有报告帧率时使用的帧率
+DEFAULT_FPS = 30.0
+
+# 统计最近多少帧的延迟和帧率
+HISTORY = 120
+
+# 各级的名称，依次为：读帧耗时、在队列中等待处理的时间、特效耗时、显示耗时、从读到帧到显示完成的时间
+STAGES = ("采集", "排队", "处理", "显示", "端到端")
+
+
+def put_latest(q: queue.Queue, item) -> int:
+    """
+    放入 item；队列已满时丢掉最旧的项再放
+    返回:
+        丢掉的项数
+    """
+    dropped = 0
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                pass
+
+
+def capture_reader(cap, realtime=True):
+    """
+    把 cv2.VideoCapture 包装成采集线程使用的读取函数 read() -> (ok, frame)
+    参数:
+        realtime: 视频文件是否按源帧率读取（否则采集线程会以解码速度读完整个文件，绝大部分帧被丢弃）
+    """
+    if cap.get(cv2.CAP_PROP_FRAME_COUNT) <= 0:
+        # 摄像头：驱动只缓存最新一帧，read 阻塞到下一帧即可
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap.read
+    if not realtime:
+        return cap.read
+    period = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS)
+    due = [None]
+
+    def read():
+        now = time.perf_counter()
+        if due[0] is None:
+            due[0] = now
+        elif now < due[0]:
+            time.sleep(due[0] - now)
+        due[0] = max(due[0] + period, now - period)  # 落后太多时不追赶，避免连续突发读帧
+        return cap.read()
+    return read
+
+
+# 一帧在流水线中的记录
+class PipelineFrame:
+    __slots__ = ("seq", "frame", "result", "captured", "started", "processed", "received")
+
+    def __init__(self, seq, frame, captured):
+        self.seq = seq
+        self.frame = frame
+        self.result = None
+        self.captured = captured    # 读到帧的时间
+        self.started = None         # 开始处理的时间
+        self.processed = None       # 处理完成的时间
+        self.received = None        # 显示端取到的时间
+
+
+# 各级延迟（最近 HISTORY 帧）与计数；所有线程都会写入，用一把锁保护
+class PipelineStats:
+
+    def __init__(self, history=HISTORY):
+        self._lock = threading.Lock()
+        self.samples = {stage: deque(maxlen=history) for stage in STAGES}
+        self._shown_times = deque(maxlen=history)
+        self.counts = {"captured": 0, "processed": 0, "shown": 0, "dropped_capture": 0, "dropped_display": 0}
+        self.start = time.perf_counter()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counts[name] += n
+
+    def mark_shown(self, when):
+        with self._lock:
+            self.counts["shown"] += 1
+            self._shown_times.append(when)
+
+    def mean_ms(self, stage) -> float:
+        with self._lock:
+            values = list(self.samples[stage])
+        return sum(values) / len(values) * 1000 if values else 0.0
+
+    def fps(self) -> float:
+        """最近显示的帧的实际帧率（按显示完成的时间计算）"""
+        with self._lock:
+            times = list(self._shown_times)
+        if len(times) < 2 or times[-1] <= times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def overlay(self) -> str:
+        """叠加在画面上的简短文字（只用 ASCII，cv2.putText 不支持中文）"""
+        return (f"FPS: {self.fps():.1f}  cap {self.mean_ms('采集'):.0f} / proc {self.mean_ms('处理'):.0f} / "
+                f"e2e {self.mean_ms('端到端'):.0f} ms")
+
+    def report(self) -> str:
+        seconds = time.perf_counter() - self.start
+        counts = dict(self.counts)
+        lines = [f"采集 {counts['captured']} 帧，处理 {counts['processed']} 帧，显示 {counts['shown']} 帧；"
+                 f"丢弃 {counts['dropped_capture']}（等待处理）+ {counts['dropped_display']}（等待显示）帧",
+                 f"平均 {counts['shown'] / seconds if seconds > 0 else 0:.1f} fps，最近 {self.fps():.1f} fps"]
+        lines.append("最近各级平均耗时: " + "，".join(f"{stage} {self.mean_ms(stage):.1f} ms" for stage in STAGES))
+        return "\n".join(lines)
+
+
+# 采集线程 + 处理线程；显示由调用方在主线程完成
+class FramePipeline:
+
+    def __init__(self, read, process, workers=1, history=HISTORY):
+        """
+        参数:
+            read: 读取函数 read() -> (ok, frame)，ok 为假时流水线结束（如视频播放完）
+            process: 特效函数 process(frame) -> result，在处理线程中调用
+            workers: 处理线程数；多于 1 个时结果可能乱序到达，显示端会丢掉比已显示帧更旧的结果
+        """
+        self.read = read
+        self.process = process
+        self.workers = workers
+        self.stats = PipelineStats(history)
+        # 每个处理线程最多有一帧在等待；显示端只保留最新的一帧
+        self._frames = queue.Queue(maxsize=workers)
+        self._results = queue.Queue(maxsize=1)
+        self._stop = threading.Event()
+        self._capture_done = threading.Event()
+        self._threads = []
+        self._running_workers = 0
+        self._workers_lock = threading.Lock()
+        self._last_shown = -1
+        self.error = None
+
+    # --- 线程 ---
+    def _capture(self):
+        seq = 0
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                ok, frame = self.read()
+                now = time.perf_counter()
+                if not ok or frame is None:
+                    break
+                self.stats.record("采集", now - start)
+                self.stats.count("captured")
+                dropped = put_latest(self._frames, PipelineFrame(seq, frame, now))
+                if dropped:
+                    self.stats.count("dropped_capture", dropped)
+                seq += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self._capture_done.set()
+
+    def _work(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    item = self._frames.get(timeout=0.05)
+                except queue.Empty:
+                    if self._capture_done.is_set():
+                        break
+                    continue
+                item.started = time.perf_counter()
+                item.result = self.process(item.frame)
+                item.processed = time.perf_counter()
+                self.stats.record("排队", item.started - item.captured)
+                self.stats.record("处理", item.processed - item.started)
+                self.stats.count("processed")
+                dropped = put_latest(self._results, item)
+                if dropped:
+                    self.stats.count("dropped_display", dropped)
+        except Exception as e:
+            self.error = e
+            self._stop.set()
+        finally:
+            with self._workers_lock:
+                self._running_workers -= 1
+
+    # --- 控制 ---
+    def start(self):
+        self._running_workers = self.workers
+        self._threads = [threading.Thread(target=self._capture, daemon=True)]
+        self._threads += [threading.Thread(target=self._work, daemon=True) for _ in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def finished(self) -> bool:
+        """读取结束（或出错）且所有结果都已取走"""
+        with self._workers_lock:
+            running = self._running_workers
+        return (self._stop.is_set() or (self._capture_done.is_set() and running == 0)) and self._results.empty()
+
+    # --- 显示端（主线程） ---
+    def get(self, timeout=0.01):
+        """
+        取最新的处理结果；超时或只有过时的结果时返回 None
+        处理线程中的异常在这里重新抛出
+        """
+        if self.error is not None:
+            raise self.error
+        try:
+            item = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if item.seq < self._last_shown:
+            self.stats.count("dropped_display")
+            return None
+        item.received = time.perf_counter()
+        return item
+
+    def shown(self, item):
+        """调用方显示完 item（imshow + waitKey）后调用，记录显示耗时和端到端延迟"""
+        now = time.perf_counter()
+        self._last_shown = item.seq
+        self.stats.record("显示", now - item.received)
+        self.stats.record("端到端", now - item.captured)
+        self.stats.mark_shown(now)
+
+
+# --- 性能测试 ---
+def _synthetic_camera(size, fps, frames):
+    """
+    模拟摄像头：每隔 1/fps 秒出一帧，read 阻塞到下一帧出现（与真实摄像头一样，读帧时间就是 I/O 等待）；
+    处理慢、错过的帧不会积压，直接被新帧覆盖
+    """
+    # 预先生成几帧循环使用，读帧本身不占 CPU
+    yy, xx = np.mgrid[0:size[1], 0:size[0]]
+    pool = [np.dstack([(xx + i * 4) % 256, (yy + i * 4) % 256, (xx ^ yy) % 256]).astype(np.uint8) for i in range(8)]
+    period = 1.0 / fps
+    state = {"n": 0, "start": None, "last": -1}
+
+    def read():
+        if state["n"] >= frames:
+            return False, None
+        now = time.perf_counter()
+        if state["start"] is None:
+            state["start"] = now
+        index = max(state["last"] + 1, int((now - state["start"]) / period) + 1)
+        wait = state["start"] + index * period - now
+        if wait > 0:
+            time.sleep(wait)
+        state["last"] = index
+        state["n"] += 1
+        return True, pool[index % len(pool)].copy()
+    return read
+
+
+def _edge_effect(frame):
+    """与 test_23 霓虹边缘相当的计算量"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    edges = cv2.Canny(gray, 100, 200)
+    result = np.zeros_like(frame)
+    result[edges > 0] = (200, 255, 180)
+    return cv2.GaussianBlur(result, (5, 5), 0)
+
+
+def _color_sketch_effect(frame):
+    """与 test_24 彩色素描相当的计算量（双边滤波较慢，单帧处理时间接近或超过一帧的间隔）"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    smooth = cv2.bilateralFilter(frame, 9, 75, 75)
+    edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
+    return cv2.bitwise_and(smooth, cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR))
+
+
+# 性能测试使用的特效
+EFFECTS = {"edge": _edge_effect, "sketch": _color_sketch_effect}
+
+
+def benchmark(frames=150, size=(1280, 720), fps=30.0, workers=1, effect="edge"):
+    """
+    模拟 fps 帧率的摄像头，对比串行循环与流水线的实际显示帧率和端到端延迟（不开窗口，显示为空操作）
+    """
+    process = EFFECTS[effect]
+    print(f"{size[0]}x{size[1]} 模拟摄像头 {fps:.0f} fps，{frames} 帧，特效 {effect}")
+
+    read = _synthetic_camera(size, fps, frames)
+    latency = []
+    start = time.perf_counter()
+    while True:
+        ok, frame = read()
+        if not ok:
+            break
+        captured = time.perf_counter()
+        process(frame)
+        latency.append(time.perf_counter() - captured)
+    seconds = time.perf_counter() - start
+    print(f"  串行:   {len(latency) / seconds:5.1f} fps，读到帧到显示 {np.mean(latency) * 1000:5.1f} ms")
+
+    pipeline = FramePipeline(_synthetic_camera(size, fps, frames), process, workers)
+    with pipeline:
+        while not pipeline.finished:
+            item = pipeline.get()
+            if item is not None:
+                pipeline.shown(item)
+    print(f"  流水线: {pipeline.stats.report()}".replace("\n", "\n          "))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="视频特效流水线性能测试")
+    parser.add_argument("-n", "--frames", type=int, default=150, help="帧数")
+    parser.add_argument("--fps", type=float, default=30.0, help="模拟摄像头帧率")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="处理线程数")
+    parser.add_argument("-e", "--effect", choices=sorted(EFFECTS), default="edge", help="特效")
+    args = parser.parse_args(argv)
+    benchmark(args.frames, fps=args.fps, workers=args.workers, effect=args.effect)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import pygame
 import sys
 import math
 from appcomm.helper.font_helper import FontHelper
+from appcomm.helper.dirty_rect_helper import DirtyRectHelper
 
 # 初始化 pygame
 pygame.init()
@@ -45,7 +46,7 @@ class PulseBall:
             int(PURPLE[2] * brightness)
         )
 
-        pygame.draw.circle(surface, color, (self.x, int(y)), self.radius)
+        return pygame.draw.circle(surface, color, (self.x, int(y)), self.radius)
 
 # 创建一组脉冲小球，依次排开
 balls = []
@@ -54,26 +55,32 @@ spacing = 40
 for i in range(5):  # 5 个小球
     balls.append(PulseBall(start_x + i * spacing, delay=i * 5))
 
+# 背景和文字是静态的，只画一次
+background = pygame.Surface((width, height))
+background.fill(BLACK)
+# 显示文字
+rect = font.render("Pthon 加载中...", WHITE)
+rect.center = (width // 2, 60)
+font.blit_draw(background)
+
+# 脏矩形刷新：每帧只恢复、刷新小球画过的区域
+dirty = DirtyRectHelper(screen, background)
+
 frame = 0
 running = True
 while running:
-    screen.fill(BLACK)
-
-    # 显示文字
-    rect = font.render("Pthon 加载中...", WHITE)
-    rect.center = (width // 2, 60)
-    font.blit(screen)
+    dirty.begin()
 
     # 绘制小球动画
     for ball in balls:
-        ball.draw(screen, frame)
+        dirty.add(ball.draw(screen, frame))
 
     # 检查退出事件
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
 
-    pygame.display.flip()
+    pygame.display.update(dirty.end())
     clock.tick(60)
     frame += 1  # 每帧增加帧计数
 
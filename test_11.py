@@ -1,8 +1,7 @@
 import pygame
-import random
-import math
 import asyncio
 import platform
+from appcomm.helper.particle_helper import ParticleSystem, ParticleEmitter
 
 # 初始化 Pygame，设置窗口
 pygame.init()
@@ -34,25 +33,14 @@ trail_length = 20  # 尾迹长度
 trail_fade = 0.8  # 尾迹透明度衰减因子
 
 # 粒子效果参数
-particles = []  # 存储粒子
-class Particle:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.size = random.randint(2, 5)  # 粒子大小
-        self.color = (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))  # 随机颜色
-        self.speed_x = random.uniform(-3, 3)  # 随机水平速度
-        self.speed_y = random.uniform(-3, 3)  # 随机垂直速度
-        self.life = random.randint(20, 40)  # 粒子存活时间（帧）
-
-    def update(self):
-        self.x += self.speed_x
-        self.y += self.speed_y
-        self.life -= 1
-
-    def draw(self, surface):
-        if self.life > 0:
-            pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), self.size)
+particles = ParticleSystem(capacity=2000)  # 存储粒子
+particle_emitter = ParticleEmitter(
+    particles,
+    life=(20, 40),  # 粒子存活时间（帧）
+    size=(2, 5),  # 粒子大小
+    color=((100, 255), (100, 255), (100, 255)),  # 随机颜色
+    velocity=((-3, 3), (-3, 3))  # 随机水平、垂直速度
+)
 
 # 设置函数：初始化游戏环境
 def setup():
@@ -60,7 +48,7 @@ def setup():
 
 # 更新函数：处理游戏逻辑
 def update_loop():
-    global trail_positions, particles
+    global trail_positions
 
     # 处理事件
     for event in pygame.event.get():
@@ -85,8 +73,7 @@ def update_loop():
 
     # 碰撞时生成粒子
     if collision:
-        for _ in range(10):  # 生成 10 个粒子
-            particles.append(Particle(ball['x'], ball['y']))
+        particle_emitter.emit(ball['x'], ball['y'], 10)  # 生成 10 个粒子
 
     # 更新尾迹
     trail_positions.append((ball['x'], ball['y']))
@@ -123,10 +110,8 @@ def update_loop():
     pygame.draw.circle(screen, ball['color'], (int(ball['x']), int(ball['y'])), ball['radius'])
 
     # 更新和绘制粒子
-    particles = [p for p in particles if p.life > 0]  # 移除死亡粒子
-    for particle in particles:
-        particle.update()
-        particle.draw(screen)
+    particles.update()  # 死亡粒子的槽位自动回收
+    particles.draw(screen)
 
     # 更新屏幕
     pygame.display.flip()
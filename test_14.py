@@ -1,6 +1,6 @@
 import pygame
-import random
 import math
+from appcomm.helper.particle_helper import ParticleSystem, ParticleEmitter
 
 # 初始化 pygame
 pygame.init()
@@ -13,47 +13,17 @@ pygame.display.set_caption("粒子喷泉 - 五彩视觉盛宴")
 # 设置时钟，控制帧率
 clock = pygame.time.Clock()
 
-# 粒子类定义
-class Particle:
-    def __init__(self, x, y):
-        # 初始位置为中心点
-        self.x = x
-        self.y = y
-        
-        # 随机方向（用角度+三角函数控制方向）
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(2, 5)
-        self.vx = math.cos(angle) * speed
-        self.vy = math.sin(angle) * speed
-
-        # 粒子的颜色是随机的
-        self.color = (
-            random.randint(100, 255),
-            random.randint(100, 255),
-            random.randint(100, 255)
-        )
-
-        # 粒子的生命值
-        self.life = 100
-
-    def update(self):
-        # 更新位置
-        self.x += self.vx
-        self.y += self.vy
-
-        # 重力效果
-        self.vy += 0.05  # 模拟向下的加速度
-
-        # 生命值减少
-        self.life -= 1
-
-    def draw(self, surface):
-        if self.life > 0:
-            radius = max(1, self.life // 10)  # 根据生命值动态调整大小
-            pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), radius)
-
-# 粒子容器
-particles = []
+# 粒子容器：重力效果为每帧向下的加速度
+particles = ParticleSystem(capacity=2000, gravity=(0, 0.05))
+# 随机方向（用角度+三角函数控制方向），颜色随机，生命值 100
+particle_emitter = ParticleEmitter(
+    particles,
+    life=100,
+    size=10,  # 半径 = life // 10，随生命值缩小
+    color=((100, 255), (100, 255), (100, 255)),
+    speed=(2, 5),
+    angle=(0, 2 * math.pi)
+)
 
 # 主循环
 running = True
@@ -65,18 +35,11 @@ while running:
             running = False
 
     # 每一帧添加新粒子
-    for _ in range(10):  # 每帧发射 10 个粒子
-        particle = Particle(WIDTH // 2, HEIGHT // 2)
-        particles.append(particle)
-
-    # 更新和绘制粒子
-    for particle in particles[:]:  # 遍历粒子列表
-        particle.update()
-        particle.draw(screen)
+    particle_emitter.emit(WIDTH // 2, HEIGHT // 2, 10)  # 每帧发射 10 个粒子
 
-        # 如果生命结束，则从列表中移除
-        if particle.life <= 0:
-            particles.remove(particle)
+    # 更新和绘制粒子，生命结束的粒子槽位自动回收
+    particles.update()
+    particles.draw(screen, shrink=True)  # 根据生命值动态调整大小
 
     # 刷新屏幕
     pygame.display.flip()
@@ -26,7 +26,7 @@ WHITE = (255, 255, 255)
 
 # 轨迹粒子类
 class Particle:
-    def __init__(self, x, y):
+    def __init__(self, x, y, color=None):
         # 粒子位置和速度
         self.x = x
         self.y = y
@@ -37,18 +37,21 @@ class Particle:
         self.size = random.randint(5, 15)
         self.alpha = 255  # 透明度
         
-        # 随机选择一种颜色
-        color_type = random.choice(["彩虹", "蓝色", "紫色", "绿色", "黄色"])
-        if color_type == "彩虹":
-            self.color = (random.randint(150, 255), random.randint(150, 255), random.randint(150, 255))
-        elif color_type == "蓝色":
-            self.color = (random.randint(100, 255), random.randint(100, 200), 255)
-        elif color_type == "紫色":
-            self.color = (random.randint(150, 255), random.randint(100, 200), random.randint(200, 255))
-        elif color_type == "绿色":
-            self.color = (random.randint(100, 200), random.randint(200, 255), random.randint(100, 200))
-        elif color_type == "黄色":
-            self.color = (255, random.randint(200, 255), random.randint(100, 200))
+        if color is not None:
+            self.color = color
+        else:
+            # 随机选择一种颜色
+            color_type = random.choice(["彩虹", "蓝色", "紫色", "绿色", "黄色"])
+            if color_type == "彩虹":
+                self.color = (random.randint(150, 255), random.randint(150, 255), random.randint(150, 255))
+            elif color_type == "蓝色":
+                self.color = (random.randint(100, 255), random.randint(100, 200), 255)
+            elif color_type == "紫色":
+                self.color = (random.randint(150, 255), random.randint(100, 200), random.randint(200, 255))
+            elif color_type == "绿色":
+                self.color = (random.randint(100, 200), random.randint(200, 255), random.randint(100, 200))
+            elif color_type == "黄色":
+                self.color = (255, random.randint(200, 255), random.randint(100, 200))
         
         # 创建粒子表面并设置颜色和透明度
         self.surface = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
@@ -130,16 +133,7 @@ def main():
             
             # 创建粒子
             if random.random() < 0.5:
-                p = Particle(mouse_x, mouse_y)
-                p.color = mouse_color
-                p.surface.fill((0, 0, 0, 0))
-                pygame.draw.circle(p.surface, p.color, (p.size, p.size), p.size)
-                p.glow_surface.fill((0, 0, 0, 0))
-                for i in range(10):
-                    radius = p.size * 2 - i * 2
-                    alpha = 100 - i * 10
-                    pygame.draw.circle(p.glow_surface, (*p.color[:3], alpha), (p.size * 2, p.size * 2), radius)
-                particles.append(p)
+                particles.append(Particle(mouse_x, mouse_y, mouse_color))
         elif effect_mode == 2:  # 彩虹渐变
             # 彩虹颜色计算
             rainbow_angle += 0.05
@@ -149,16 +143,7 @@ def main():
             
             # 创建粒子
             if random.random() < 0.5:
-                p = Particle(mouse_x, mouse_y)
-                p.color = (int(r), int(g), int(b))
-                p.surface.fill((0, 0, 0, 0))
-                pygame.draw.circle(p.surface, p.color, (p.size, p.size), p.size)
-                p.glow_surface.fill((0, 0, 0, 0))
-                for i in range(10):
-                    radius = p.size * 2 - i * 2
-                    alpha = 100 - i * 10
-                    pygame.draw.circle(p.glow_surface, (*p.color[:3], alpha), (p.size * 2, p.size * 2), radius)
-                particles.append(p)
+                particles.append(Particle(mouse_x, mouse_y, (int(r), int(g), int(b))))
         
         # 更新粒子
         particles = [p for p in particles if p.update()]
@@ -3,6 +3,8 @@ import math
 import time
 import random
 import sys
+from appcomm.helper.particle_helper import ParticleSystem, ParticleEmitter
+from appcomm.helper.dirty_rect_helper import DirtyRectHelper
 
 # 初始化pygame
 pygame.init()
@@ -49,39 +51,127 @@ CLOCK_STYLES = [
      "minute_color": (50, 150, 50), "second_color": YELLOW, "tick_color": (100, 200, 100)}
 ]
 
-# 粒子类 - 用于时钟周围的装饰效果
-class Particle:
-    def __init__(self, x, y, color, clock_radius):
-        self.x = x
-        self.y = y
-        self.color = color
-        self.radius = random.randint(1, 3)
-        self.speed = random.uniform(0.5, 2)
-        self.angle = random.uniform(0, 2 * math.pi)
-        self.clock_radius = clock_radius
-        self.life = random.randint(30, 120)  # 粒子生命周期
-
-    def update(self):
-        # 粒子向外扩散
-        self.clock_radius += self.speed
-        self.x = WIDTH // 2 + self.clock_radius * math.cos(self.angle)
-        self.y = HEIGHT // 2 + self.clock_radius * math.sin(self.angle)
-        self.life -= 1
-        return self.life > 0
-
-    def draw(self, surface):
-        # 绘制粒子
-        pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), self.radius)
+# 粒子 - 用于时钟周围的装饰效果：从表盘边缘沿半径方向向外扩散
+def create_particle_emitter(particles, clock_radius):
+    return ParticleEmitter(
+        particles,
+        life=(30, 120),  # 粒子生命周期
+        size=(1, 3),
+        speed=(0.5, 2),
+        angle=(0, 2 * math.pi),
+        offset=clock_radius
+    )
+
+# 绘制表盘：外圈、刻度、数字、日期和信息面板，只在样式、开关或日期变化时重画
+def draw_face(style, show_date, show_info, year, month, day):
+    face = pygame.Surface((WIDTH, HEIGHT))
+    face.fill(style["bg_color"])
+
+    # 时钟中心位置
+    center_x, center_y = WIDTH // 2, HEIGHT // 2
+    clock_radius = min(WIDTH, HEIGHT) // 3
+
+    # 绘制时钟外圈
+    pygame.draw.circle(face, style["clock_color"], (center_x, center_y), clock_radius, 3)
+
+    # 绘制时钟刻度
+    for i in range(60):
+        angle = i * math.pi / 30
+        if i % 5 == 0:  # 小时刻度
+            length = clock_radius * 0.15
+            width = 5
+        else:  # 分钟刻度
+            length = clock_radius * 0.1
+            width = 2
+
+        start_x = center_x + (clock_radius - length) * math.sin(angle)
+        start_y = center_y - (clock_radius - length) * math.cos(angle)
+        end_x = center_x + clock_radius * math.sin(angle)
+        end_y = center_y - clock_radius * math.cos(angle)
+
+        pygame.draw.line(face, style["tick_color"], (start_x, start_y), (end_x, end_y), width)
+
+    # 绘制时钟数字
+    for i in range(12):
+        angle = i * math.pi / 6
+        number_x = center_x + (clock_radius * 0.8) * math.sin(angle)
+        number_y = center_y - (clock_radius * 0.8) * math.cos(angle)
+
+        number_text = str(i + 1 if i != 0 else 12)
+        text_surface = font.render(number_text, True, style["clock_color"])
+        text_rect = text_surface.get_rect(center=(number_x, number_y))
+        face.blit(text_surface, text_rect)
+
+    # 显示日期
+    if show_date:
+        date_text = f"{year}年{month}月{day}日"
+        date_surface = font.render(date_text, True, style["clock_color"])
+        date_rect = date_surface.get_rect(center=(center_x, center_y + clock_radius + 40))
+        face.blit(date_surface, date_rect)
+
+    # 显示信息面板
+    if show_info:
+        info_text = f"按空格键切换样式 | 当前: {style['name']}"
+        info_surface = small_font.render(info_text, True, style["clock_color"])
+        face.blit(info_surface, (20, 20))
+
+        controls_text = "S: 显示/隐藏秒针 | D: 显示/隐藏日期 | I: 显示/隐藏信息 | P: 粒子效果开关 | ESC: 退出"
+        controls_surface = small_font.render(controls_text, True, style["clock_color"])
+        face.blit(controls_surface, (20, HEIGHT - 40))
+    return face
+
+# 绘制指针和中心，返回画过的矩形
+def draw_hands(surface, style, hour, minute, second, show_seconds):
+    center_x, center_y = WIDTH // 2, HEIGHT // 2
+    clock_radius = min(WIDTH, HEIGHT) // 3
+    rects = []
+
+    # 计算指针角度
+    hour_angle = (hour + minute / 60) * math.pi / 6
+    minute_angle = (minute + second / 60) * math.pi / 30
+    second_angle = second * math.pi / 30
+
+    # 绘制时针
+    hour_length = clock_radius * 0.5
+    hour_x = center_x + hour_length * math.sin(hour_angle)
+    hour_y = center_y - hour_length * math.cos(hour_angle)
+    rects.append(pygame.draw.line(surface, style["hour_color"], (center_x, center_y), (hour_x, hour_y), 8))
+
+    # 绘制分针
+    minute_length = clock_radius * 0.7
+    minute_x = center_x + minute_length * math.sin(minute_angle)
+    minute_y = center_y - minute_length * math.cos(minute_angle)
+    rects.append(pygame.draw.line(surface, style["minute_color"], (center_x, center_y), (minute_x, minute_y), 5))
+
+    # 绘制秒针
+    if show_seconds:
+        second_length = clock_radius * 0.8
+        second_x = center_x + second_length * math.sin(second_angle)
+        second_y = center_y - second_length * math.cos(second_angle)
+        rects.append(pygame.draw.line(surface, style["second_color"],
+                                      (center_x, center_y), (second_x, second_y), 2))
+
+    # 绘制时钟中心
+    rects.append(pygame.draw.circle(surface, style["second_color"], (center_x, center_y), 8))
+    return rects
 
 # 主程序
 def main():
     clock = pygame.time.Clock()
-    particles = []  # 存储所有粒子
+    particles = ParticleSystem(capacity=1000)  # 存储所有粒子
+    particle_emitter = create_particle_emitter(particles, min(WIDTH, HEIGHT) // 3 * 0.9)
     current_style = 0  # 当前时钟样式索引
     show_seconds = True  # 是否显示秒针
     show_date = True  # 是否显示日期
     show_info = True  # 是否显示信息面板
     particle_enabled = True  # 是否启用粒子效果
+
+    # 脏矩形刷新：表盘和指针画在背景上，每秒最多重画一次；每帧只恢复、刷新粒子画过的区域
+    dirty = DirtyRectHelper(screen)
+    face = None
+    face_key = None
+    hands_key = None
+    hand_rects = []
     
     # 主循环
     running = True
@@ -112,113 +202,55 @@ def main():
                     show_info = not show_info
                 elif event.key == pygame.K_p:  # P键切换粒子效果
                     particle_enabled = not particle_enabled
-        
-        # 清屏
-        screen.fill(CLOCK_STYLES[current_style]["bg_color"])
+
+        style = CLOCK_STYLES[current_style]
+        # 样式、开关或日期变化时重画表盘，整屏刷新
+        key = (current_style, show_date, show_info, year, month, day)
+        if key != face_key:
+            face_key = key
+            face = draw_face(style, show_date, show_info, year, month, day)
+            hands_key = None
+
+        # 时间变化时在表盘副本上重画指针，只刷新新旧指针所在区域
+        key = (hour, minute, second, show_seconds)
+        changed = []
+        if key != hands_key:
+            background = face.copy()
+            rects = draw_hands(background, style, hour, minute, second, show_seconds)
+            if hands_key is None:
+                dirty.set_background(background)
+            else:
+                dirty.background = background
+                changed = hand_rects + rects
+            hands_key = key
+            hand_rects = rects
+
+        # 恢复上一帧粒子画过的区域
+        dirty.begin()
+        for rect in changed:
+            dirty.restore(rect)
         
         # 时钟中心位置
         center_x, center_y = WIDTH // 2, HEIGHT // 2
-        clock_radius = min(WIDTH, HEIGHT) // 3
-        
-        # 绘制时钟外圈
-        pygame.draw.circle(screen, CLOCK_STYLES[current_style]["clock_color"], 
-                          (center_x, center_y), clock_radius, 3)
-        
-        # 绘制时钟刻度
-        for i in range(60):
-            angle = i * math.pi / 30
-            if i % 5 == 0:  # 小时刻度
-                length = clock_radius * 0.15
-                width = 5
-            else:  # 分钟刻度
-                length = clock_radius * 0.1
-                width = 2
-                
-            start_x = center_x + (clock_radius - length) * math.sin(angle)
-            start_y = center_y - (clock_radius - length) * math.cos(angle)
-            end_x = center_x + clock_radius * math.sin(angle)
-            end_y = center_y - clock_radius * math.cos(angle)
-            
-            pygame.draw.line(screen, CLOCK_STYLES[current_style]["tick_color"],
-                            (start_x, start_y), (end_x, end_y), width)
-        
-        # 绘制时钟数字
-        for i in range(12):
-            angle = i * math.pi / 6
-            number_x = center_x + (clock_radius * 0.8) * math.sin(angle)
-            number_y = center_y - (clock_radius * 0.8) * math.cos(angle)
-            
-            number_text = str(i + 1 if i != 0 else 12)
-            text_surface = font.render(number_text, True, CLOCK_STYLES[current_style]["clock_color"])
-            text_rect = text_surface.get_rect(center=(number_x, number_y))
-            screen.blit(text_surface, text_rect)
-        
-        # 计算指针角度
-        hour_angle = (hour + minute / 60) * math.pi / 6
-        minute_angle = (minute + second / 60) * math.pi / 30
-        second_angle = second * math.pi / 30
-        
-        # 绘制时针
-        hour_length = clock_radius * 0.5
-        hour_x = center_x + hour_length * math.sin(hour_angle)
-        hour_y = center_y - hour_length * math.cos(hour_angle)
-        pygame.draw.line(screen, CLOCK_STYLES[current_style]["hour_color"],
-                        (center_x, center_y), (hour_x, hour_y), 8)
-        
-        # 绘制分针
-        minute_length = clock_radius * 0.7
-        minute_x = center_x + minute_length * math.sin(minute_angle)
-        minute_y = center_y - minute_length * math.cos(minute_angle)
-        pygame.draw.line(screen, CLOCK_STYLES[current_style]["minute_color"],
-                        (center_x, center_y), (minute_x, minute_y), 5)
-        
-        # 绘制秒针
-        if show_seconds:
-            second_length = clock_radius * 0.8
-            second_x = center_x + second_length * math.sin(second_angle)
-            second_y = center_y - second_length * math.cos(second_angle)
-            pygame.draw.line(screen, CLOCK_STYLES[current_style]["second_color"],
-                            (center_x, center_y), (second_x, second_y), 2)
-        
-        # 绘制时钟中心
-        pygame.draw.circle(screen, CLOCK_STYLES[current_style]["second_color"],
-                          (center_x, center_y), 8)
-        
-        # 显示日期
-        if show_date:
-            date_text = f"{year}年{month}月{day}日"
-            date_surface = font.render(date_text, True, CLOCK_STYLES[current_style]["clock_color"])
-            date_rect = date_surface.get_rect(center=(center_x, center_y + clock_radius + 40))
-            screen.blit(date_surface, date_rect)
         
         # 添加粒子效果
         if particle_enabled:
             # 每帧创建少量粒子
             if random.random() < 0.3:
                 color = random.choice([
-                    CLOCK_STYLES[current_style]["hour_color"],
-                    CLOCK_STYLES[current_style]["minute_color"],
-                    CLOCK_STYLES[current_style]["second_color"]
+                    style["hour_color"],
+                    style["minute_color"],
+                    style["second_color"]
                 ])
-                particles.append(Particle(center_x, center_y, color, clock_radius * 0.9))
+                particle_emitter.color = color
+                particle_emitter.emit(center_x, center_y)
             
             # 更新和绘制所有粒子
-            particles = [p for p in particles if p.update()]
-            for particle in particles:
-                particle.draw(screen)
-        
-        # 显示信息面板
-        if show_info:
-            info_text = f"按空格键切换样式 | 当前: {CLOCK_STYLES[current_style]['name']}"
-            info_surface = small_font.render(info_text, True, CLOCK_STYLES[current_style]["clock_color"])
-            screen.blit(info_surface, (20, 20))
-            
-            controls_text = "S: 显示/隐藏秒针 | D: 显示/隐藏日期 | I: 显示/隐藏信息 | P: 粒子效果开关 | ESC: 退出"
-            controls_surface = small_font.render(controls_text, True, CLOCK_STYLES[current_style]["clock_color"])
-            screen.blit(controls_surface, (20, HEIGHT - 40))
+            particles.update()
+            dirty.add_all(particles.draw(screen))
         
-        # 更新屏幕
-        pygame.display.flip()
+        # 只刷新变化的区域
+        pygame.display.update(dirty.end())
         
         # 控制帧率
         clock.tick(60)
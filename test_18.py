@@ -9,8 +9,9 @@
 # ----------------------------------------------------
 
 # 导入我们需要的库
+import numpy as np
 import pygame
-import random
+from appcomm.helper.particle_helper import ParticleSystem
 
 # --- 1. 初始化 Pygame 和设置 ---
 pygame.init()
@@ -36,68 +37,36 @@ FIRE_COLORS = [
 # 创建时钟对象
 clock = pygame.time.Clock()
 
-# --- 2. 创建火焰粒子类 (FlameParticle Class) ---
-class FlameParticle:
-    # 构造函数：当一个新火星被创建时调用
-    def __init__(self, x, y):
-        # 初始位置在火焰底部
-        self.x = x
-        self.y = y
-        
-        # 水平速度，用来模拟火焰的左右摇曳
-        self.vx = random.uniform(-0.8, 0.8)
-        # 垂直速度，负数代表向上移动
-        self.vy = random.uniform(-4, -2)
-        
-        # 初始大小
-        self.size = random.randint(15, 25)
-        
-        # 生命值：一个粒子能存在多久
-        # 我们让它和大小相关，大粒子活得久一点，飘得高一点
-        self.lifespan = self.size * 4
-        # 保存初始生命值，后面计算颜色时会用到
-        self.initial_lifespan = self.lifespan
-
-    # 更新粒子的状态
-    def update(self):
-        # 根据速度更新位置
-        self.x += self.vx
-        self.y += self.vy
-        
-        # 生命值不断减少
-        self.lifespan -= 1
-        
-        # 粒子随着上升，不断变小
-        if self.size > 0:
-            self.size -= 0.2
-
-    # 在屏幕上绘制粒子
-    def draw(self, surface):
-        # 只有当粒子还“活着”并且还看得见时才绘制
-        if self.lifespan > 0 and self.size > 0:
-            # --- 颜色变化的核心魔法 ---
-            # 1. 计算粒子生命还剩下百分之多少 (范围从 1.0 到 0.0)
-            life_percent = self.lifespan / self.initial_lifespan
-            
-            # 2. 根据生命百分比，我们想从 FIRE_COLORS 列表中选择一个颜色
-            # life_percent 从 1.0 降到 0.0，所以我们用 (1 - life_percent) 把它反过来
-            # (1 - life_percent) 会从 0.0 增长到 1.0
-            color_index = (1 - life_percent) * (len(FIRE_COLORS) - 1)
-            
-            # 3. 把它变成整数，作为列表的索引
-            color_index = min(int(color_index), len(FIRE_COLORS) - 1)
-            
-            # 4. 从我们的调色盘中获取最终颜色
-            final_color = FIRE_COLORS[color_index]
-
-            # 绘制一个圆形来代表火星粒子
-            pygame.draw.circle(surface, final_color, (int(self.x), int(self.y)), int(self.size))
+# --- 2. 火焰粒子系统 ---
+# 所有火星的位置、速度、生命和大小都存放在 ParticleSystem 的数组里，每帧一起更新
+particles = ParticleSystem(capacity=1000)
+rng = np.random.default_rng()
+FIRE_PALETTE = np.array(FIRE_COLORS, dtype=np.uint8)
 
 
-# --- 3. 主循环 ---
-# 创建一个列表来存放所有的火焰粒子
-particles = []
+# 创建 count 个新火星
+def spawn_flames(x, y, count):
+    # 让新粒子在火焰根部的一个小范围内随机出现
+    px = x + rng.integers(-20, 20, count, endpoint=True)
+    py = y + rng.integers(-10, 10, count, endpoint=True)
+    # 初始大小；生命值和大小相关，大粒子活得久一点，飘得高一点
+    size = rng.integers(15, 25, count, endpoint=True)
+    particles.spawn(px, py,
+                    rng.uniform(-0.8, 0.8, count),  # 水平速度，用来模拟火焰的左右摇曳
+                    rng.uniform(-4, -2, count),     # 垂直速度，负数代表向上移动
+                    size * 4, size, FIRE_COLORS[0])
+
+
+# --- 颜色变化的核心魔法 ---
+# 根据每个粒子生命还剩下百分之多少 (1.0 到 0.0)，从 FIRE_COLORS 调色盘中选择颜色：
+# (1 - 剩余比例) 从 0.0 增长到 1.0，乘以颜色数减一再取整，就是调色盘的索引
+def update_flame_colors():
+    alive = np.flatnonzero(particles.alive)
+    color_index = ((1 - particles.life_ratio(alive)) * (len(FIRE_COLORS) - 1)).astype(np.int32)
+    particles.color[alive] = FIRE_PALETTE[np.minimum(color_index, len(FIRE_COLORS) - 1)]
 
+
+# --- 3. 主循环 ---
 # 火焰的根部在屏幕底部中央
 fire_base_x = SCREEN_WIDTH // 2
 fire_base_y = SCREEN_HEIGHT - 50
@@ -111,25 +80,18 @@ while running:
 
     # --- b. 创建新的粒子 ---
     # 每一帧都创建一些新的粒子，来维持火焰的燃烧
-    # 调整 range() 里的数字可以控制火焰的大小
-    for _ in range(8):
-        # 让新粒子在火焰根部的一个小范围内随机出现
-        px = fire_base_x + random.randint(-20, 20)
-        py = fire_base_y + random.randint(-10, 10)
-        particles.append(FlameParticle(px, py))
+    # 调整这里的数字可以控制火焰的大小
+    spawn_flames(fire_base_x, fire_base_y, 8)
 
     # --- c. 更新和绘制 ---
     # 用背景色填充屏幕
     screen.fill(BACKGROUND_COLOR)
 
-    # 遍历列表的一个副本 (particles[:])，因为我们可能会在循环中删除元素
-    for p in particles[:]:
-        p.update() # 更新粒子的状态
-        p.draw(screen) # 绘制粒子
-        
-        # 如果粒子的生命结束了，就从列表中移除它
-        if p.lifespan <= 0:
-            particles.remove(p)
+    # 更新所有粒子的位置和生命，生命结束的粒子自动回收
+    particles.update()
+    update_flame_colors()
+    # 粒子随着上升不断变小：半径按剩余生命比例缩小
+    particles.draw(screen, shrink=True)
 
     # --- d. 刷新屏幕 ---
     pygame.display.flip()
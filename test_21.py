@@ -6,12 +6,14 @@ import platform
 from PIL import Image, ImageFilter
 import io
 import numpy as np
+from appcomm.helper.sprite_helper import sprite_cache
 
 # 初始化 Pygame，设置窗口
 pygame.init()
 WIDTH, HEIGHT = 800, 600
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("梦幻模糊图像特效")
+TITLE = "梦幻模糊图像特效"
+pygame.display.set_caption(TITLE)
 clock = pygame.time.Clock()
 FPS = 60
 
@@ -22,6 +24,7 @@ PINK = (255, 182, 193)
 
 # 粒子参数
 particles = []  # 存储粒子
+frame_count = 0  # 已绘制的帧数
 class Particle:
     def __init__(self, x, y):
         self.x = x
@@ -40,9 +43,8 @@ class Particle:
     def draw(self, surface):
         if self.life > 0:
             alpha = int(255 * (self.life / 60))  # 透明度随生命值减少
-            particle_surface = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
-            pygame.draw.circle(particle_surface, (*self.color, alpha), (self.size, self.size), self.size)
-            surface.blit(particle_surface, (int(self.x) - self.size, int(self.y) - self.size))
+            # 从共享缓存取预渲染的半透明圆形精灵，不再每帧新建 Surface
+            sprite_cache.blit_circle(surface, (self.x, self.y), self.size, self.color, alpha)
 
 # 生成示例图像（由于 Pyodide 不支持本地文件）
 def create_sample_image():
@@ -95,12 +97,13 @@ def setup():
 
 # 更新函数：处理游戏逻辑
 def update_loop():
-    global particles
+    global particles, frame_count
     current_time = pygame.time.get_ticks() / 1000  # 当前时间（秒）
 
     # 处理事件
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            print(sprite_cache.report())
             pygame.quit()
             return
 
@@ -140,6 +143,11 @@ def update_loop():
     # 更新屏幕
     pygame.display.flip()
 
+    # 每 30 帧在标题栏报告精灵缓存的命中率
+    frame_count += 1
+    if frame_count % 30 == 0:
+        pygame.display.set_caption(f"{TITLE} | {sprite_cache.report()}")
+
 # 主循环，适配 Pyodide
 async def main():
     setup()
@@ -1,7 +1,7 @@
 # 导入必要的库
 import cv2  # OpenCV 库，用于图像处理
-from PIL import Image, ImageFilter  # PIL 库，也称为 Pillow，用于图像处理
-import numpy as np  # 导入 NumPy 库，用于数组操作，OpenCV 图像本质上是 NumPy 数组
+import appcomm.utils.filter_util as filter_util
+from appcomm.utils.cache_util import effect_cache
 
 def 梦幻模糊(image_path, output_path, blur_radius=10):
     """
@@ -21,28 +21,23 @@ def 梦幻模糊(image_path, output_path, blur_radius=10):
         print(f"错误：无法读取图像文件 {image_path}。请检查路径和文件是否存在。")
         return
 
-    # 2. 将 OpenCV 的图像格式转换为 PIL 的图像格式 (BGR -> RGB)
-    img_pil = Image.fromarray(cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB))
+    def render(path):
+        # 2. 将 OpenCV 的图像格式 (BGR) 转换为滤镜使用的 RGB 数组
+        img_rgb = cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)
 
-    # 3. 应用高斯模糊
-    blurred_img = img_pil.filter(ImageFilter.GaussianBlur(radius=blur_radius))
+        # 3~5. 应用高斯模糊，再与 20% 的半透明白色覆盖层混合，增强梦幻感
+        combined_rgb = filter_util.dreamy_blur(img_rgb, blur_radius)
 
-    # 4. 创建一个覆盖层，用于增加亮度 (可选，用于增强梦幻感)
-    # PIL Image.new 接受模式、大小和颜色
-    # RGBA 模式允许透明度，(255, 255, 255, 50) 表示白色，透明度为 50 (0-255)
-    overlay = Image.new('RGBA', blurred_img.size, (255, 255, 255, 50))
+        # 6. 转换回 OpenCV 的 BGR 格式
+        img_cv_output = cv2.cvtColor(combined_rgb, cv2.COLOR_RGB2BGR)
 
-    # 5. 将覆盖层与模糊后的图像合并
-    # Image.blend(image1, image2, alpha) 根据 alpha 值混合两张图像
-    # alpha 值为 0.2 意味着 80% 的 blurred_img 和 20% 的 overlay
-    combined_img = Image.blend(blurred_img.convert('RGBA'), overlay, 0.2)
+        # 7. 保存图像
+        cv2.imwrite(path, img_cv_output)
 
-    # 6. 将图像从 PIL 格式转换回 OpenCV 格式
-    # PIL 图像需要先转换为 NumPy 数组，然后从 RGBA 转换为 BGR
-    img_cv_output = cv2.cvtColor(np.array(combined_img), cv2.COLOR_RGBA2BGR)
-
-    # 7. 保存图像
-    cv2.imwrite(output_path, img_cv_output)
+    # 相同输入、相同参数的结果直接从缓存取（APPCOMM_NO_CACHE=1 时关闭）
+    if effect_cache.fetch(output_path, image_path, "dreamy", {"blur_radius": blur_radius}, render,
+                          depends=(filter_util,)):
+        print(f"命中缓存: {output_path}")
 
     print(f"梦幻模糊效果已应用并保存到: {output_path}")
 
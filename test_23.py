@@ -1,7 +1,9 @@
+import sys
 import cv2
-import numpy as np
-import random
 from datetime import datetime
+from appcomm.utils import video_effect_util
+from appcomm.utils.video_effect_util import edge_effect
+from appcomm.utils.video_pipeline_util import FramePipeline, capture_reader
 
 class EdgeDetectionEffect:
     def __init__(self):
@@ -29,10 +31,6 @@ class EdgeDetectionEffect:
         # 创建控制面板
         self.create_control_panel()
         
-        # 帧率计算
-        self.prev_time = datetime.now()
-        self.fps = 0
-        
     def create_control_panel(self):
         """创建控制面板窗口"""
         cv2.namedWindow("控制面板", cv2.WINDOW_NORMAL)
@@ -68,119 +66,69 @@ class EdgeDetectionEffect:
         """更新是否显示原始画面"""
         self.show_original = bool(value)
         
-    def calculate_fps(self):
-        """计算帧率"""
-        current_time = datetime.now()
-        time_diff = (current_time - self.prev_time).total_seconds()
-        self.fps = 1.0 / time_diff if time_diff > 0 else 0
-        self.prev_time = current_time
-        
     def apply_edge_effect(self, frame):
         """应用边缘检测特效"""
-        # 转换为灰度图
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # 使用Canny算法进行边缘检测
-        edges = cv2.Canny(gray, self.threshold1, self.threshold2)
-        
-        # 根据特效模式处理边缘
-        if self.effect_mode == 0:  # 普通边缘
-            # 创建一个黑色背景，然后将白色边缘绘制在上面
-            edge_frame = np.zeros_like(frame)
-            edge_frame[edges > 0] = self.edge_color
-            
-        elif self.effect_mode == 1:  # 彩色边缘
-            # 将边缘检测结果扩展为三通道
-            edges_color = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
-            # 使用原始图像的颜色作为边缘颜色
-            edge_frame = cv2.bitwise_and(frame, edges_color)
-            
-        elif self.effect_mode == 2:  # 霓虹边缘
-            # 创建一个黑色背景
-            edge_frame = np.zeros_like(frame)
-            # 生成随机霓虹颜色
-            neon_color = (random.randint(150, 255), 
-                          random.randint(150, 255), 
-                          random.randint(150, 255))
-            # 将边缘绘制为霓虹颜色
-            edge_frame[edges > 0] = neon_color
-            
-            # 添加模糊效果增强霓虹感
-            edge_frame = cv2.GaussianBlur(edge_frame, (5, 5), 0)
-            
-        elif self.effect_mode == 3:  # 随机边缘
-            # 创建一个黑色背景
-            edge_frame = np.zeros_like(frame)
-            # 为每个边缘像素随机分配颜色
-            for i in range(edges.shape[0]):
-                for j in range(edges.shape[1]):
-                    if edges[i, j] > 0:
-                        edge_frame[i, j] = (random.randint(0, 255), 
-                                           random.randint(0, 255), 
-                                           random.randint(0, 255))
-        
-        # 如果需要显示原始画面，则将边缘叠加在原始画面上
-        if self.show_original:
-            result = cv2.addWeighted(frame, 0.7, edge_frame, 1.0, 0)
-        else:
-            result = edge_frame
-            
-        return result
+        return edge_effect(frame, self.effect_mode, self.threshold1, self.threshold2,
+                           self.show_original, self.edge_color)
         
     def run(self):
-        """运行特效程序主循环"""
-        frame_count = 0
-        while True:
-            # 读取一帧
-            ret, frame = self.cap.read()
-            if not ret:
-                print("无法获取帧，退出程序")
-                break
-                
-            # 计算帧率
-            if frame_count % 10 == 0:  # 每10帧计算一次，减少计算负担
-                self.calculate_fps()
-            frame_count += 1
-                
-            # 应用边缘检测特效
-            result = self.apply_edge_effect(frame)
-            
-            # 在画面上显示帧率
-            cv2.putText(result, f"FPS: {self.fps:.1f}", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                       
-            # 在画面上显示当前特效模式
-            mode_text = ["普通边缘", "彩色边缘", "霓虹边缘", "随机边缘"]
-            cv2.putText(result, f"特效模式: {mode_text[self.effect_mode]}", 
-                       (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                       
-            # 显示结果
-            cv2.imshow("边缘检测特效", result)
-            
-            # 处理键盘事件
-            key = cv2.waitKey(1) & 0xFF
-            
-            # 按 'q' 键退出
-            if key == ord('q'):
-                break
-                
-            # 按 's' 键保存当前画面
-            elif key == ord('s'):
-                filename = f"edge_effect_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                cv2.imwrite(filename, result)
-                print(f"已保存画面: {filename}")
+        """运行特效程序主循环：采集线程读帧，处理线程应用特效，主线程显示并处理按键"""
+        pipeline = FramePipeline(capture_reader(self.cap), self.apply_edge_effect)
+        mode_text = ["普通边缘", "彩色边缘", "霓虹边缘", "随机边缘"]
+        result = None
+        with pipeline:
+            while True:
+                item = pipeline.get()
+                if item is None:
+                    if pipeline.finished:
+                        print("无法获取帧，退出程序")
+                        break
+                    # 没有新画面时也要处理窗口事件和按键
+                    key = cv2.waitKey(1) & 0xFF
+                else:
+                    result = item.result
+                    
+                    # 在画面上显示实际帧率和各级耗时
+                    cv2.putText(result, pipeline.stats.overlay(), (10, 30),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                               
+                    # 在画面上显示当前特效模式
+                    cv2.putText(result, f"特效模式: {mode_text[self.effect_mode]}", 
+                               (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                               
+                    # 显示结果
+                    cv2.imshow("边缘检测特效", result)
+                    
+                    # 处理键盘事件
+                    key = cv2.waitKey(1) & 0xFF
+                    pipeline.shown(item)
                 
-            # 按数字键 0-3 切换特效模式
-            elif key >= ord('0') and key <= ord('3'):
-                self.effect_mode = key - ord('0')
-                cv2.setTrackbarPos("特效模式", "控制面板", self.effect_mode)
+                # 按 'q' 键退出
+                if key == ord('q'):
+                    break
+                    
+                # 按 's' 键保存当前画面
+                elif key == ord('s') and result is not None:
+                    filename = f"edge_effect_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+                    cv2.imwrite(filename, result)
+                    print(f"已保存画面: {filename}")
+                    
+                # 按数字键 0-3 切换特效模式
+                elif key >= ord('0') and key <= ord('3'):
+                    self.effect_mode = key - ord('0')
+                    cv2.setTrackbarPos("特效模式", "控制面板", self.effect_mode)
                 
         # 释放资源
+        print(pipeline.stats.report())
         self.cap.release()
         cv2.destroyAllWindows()
 
 # 主程序入口
 if __name__ == "__main__":
-    # 创建并运行边缘检测特效程序
-    effect = EdgeDetectionEffect()
-    effect.run()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        # 离线渲染视频文件，例如: python test_23.py input.mp4 output.mp4 -m 2 -p threshold1=80
+        video_effect_util.main(effect="edge")
+    else:
+        # 创建并运行边缘检测特效程序
+        effect = EdgeDetectionEffect()
+        effect.run()
\ No newline at end of file
@@ -1,8 +1,16 @@
 import cv2
 import numpy as np
-import random
 from datetime import datetime
 import os
+import sys
+import time
+from appcomm.utils import video_effect_util
+from appcomm.utils.palette_util import PaletteQuantizer
+from appcomm.utils.video_effect_util import sketch_effect
+from appcomm.utils.video_pipeline_util import FramePipeline, capture_reader
+
+# 图片模式下采集线程重复送出图片的帧率
+IMAGE_FPS = 30
 
 class SketchEffect:
     def __init__(self):
@@ -26,17 +34,19 @@ class SketchEffect:
         self.invert = False   # 是否反色
         self.show_original = False  # 是否显示原始画面
         
+        # 卡通素描的调色板：跨帧复用，画面颜色分布明显变化时才重新拟合
+        self.palette = PaletteQuantizer(num_colors=7)
+        
         # 图片文件相关
         self.image_path = None
         self.current_image = None
         
+        # 摄像头的读取函数（在采集线程中调用）
+        self.read_camera = capture_reader(self.cap) if self.use_camera else None
+        
         # 创建控制面板
         self.create_control_panel()
         
-        # 帧率计算
-        self.prev_time = datetime.now()
-        self.fps = 0
-        
     def create_control_panel(self):
         """创建控制面板窗口"""
         cv2.namedWindow("控制面板", cv2.WINDOW_NORMAL)
@@ -83,12 +93,22 @@ class SketchEffect:
         """更新是否反色"""
         self.invert = bool(value)
         
-    def calculate_fps(self):
-        """计算帧率"""
-        current_time = datetime.now()
-        time_diff = (current_time - self.prev_time).total_seconds()
-        self.fps = 1.0 / time_diff if time_diff > 0 else 0
-        self.prev_time = current_time
+    def read_frame(self):
+        """采集线程的读取函数：摄像头模式读一帧，图片模式按 IMAGE_FPS 的节奏送出图片副本"""
+        if self.use_camera:
+            ret, frame = self.read_camera()
+            if not ret:
+                print("无法获取摄像头帧，退出程序")
+            return ret, frame
+        time.sleep(1.0 / IMAGE_FPS)
+        if self.current_image is not None:
+            # 复制当前加载的图片
+            return True, self.current_image.copy()
+        # 如果没有加载图片，显示空白帧
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        cv2.putText(frame, "请按 'i' 键加载图片", (100, 240), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        return True, frame
         
     def load_image(self):
         """加载图片文件"""
@@ -110,183 +130,92 @@ class SketchEffect:
         
     def apply_sketch_effect(self, frame):
         """应用素描特效"""
-        # 确保帧不为空
-        if frame is None or frame.size == 0:
-            return None
-            
-        # 转换为灰度图
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # 应用高斯模糊减少噪点
-        blurred = cv2.GaussianBlur(gray, (self.blur_size, self.blur_size), 0)
-        
-        # 根据素描模式处理图像
-        if self.sketch_mode == 0:  # 铅笔素描
-            # 计算灰度图像的反转
-            if self.invert:
-                inverted_blurred = 255 - blurred
-            else:
-                inverted_blurred = blurred
-                
-            # 创建铅笔素描效果
-            sketch = cv2.divide(gray, inverted_blurred, scale=256.0)
-            
-            # 转换回BGR格式
-            sketch_bgr = cv2.cvtColor(sketch, cv2.COLOR_GRAY2BGR)
-            
-            # 调整边缘强度
-            if self.edge_strength < 255:
-                sketch_bgr = cv2.multiply(sketch_bgr, np.ones_like(sketch_bgr) * (self.edge_strength / 255.0), dtype=cv2.CV_8U)
-                
-            result = sketch_bgr
-            
-        elif self.sketch_mode == 1:  # 彩色素描
-            # 应用双边滤波保留边缘同时平滑颜色
-            color_sketch = cv2.bilateralFilter(frame, 9, 75, 75)
-            
-            # 创建边缘掩码
-            edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                         cv2.THRESH_BINARY_INV, 11, 2)
-            
-            # 将边缘掩码转换为三通道
-            edges = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
-            
-            # 合并彩色和平滑效果
-            result = cv2.bitwise_and(color_sketch, edges)
-            
-        elif self.sketch_mode == 2:  # 浮雕素描
-            # 创建浮雕核
-            kernel = np.array([[-2, -1, 0], [-1, 1, 1], [0, 1, 2]])
-            
-            # 应用浮雕效果
-            embossed = cv2.filter2D(gray, -1, kernel)
-            
-            # 调整亮度
-            embossed = cv2.add(embossed, 128)
-            
-            # 转换回BGR格式
-            result = cv2.cvtColor(embossed, cv2.COLOR_GRAY2BGR)
-            
-        elif self.sketch_mode == 3:  # 卡通素描
-            # 应用中值滤波减少噪点
-            median_filtered = cv2.medianBlur(frame, 7)
-            
-            # 创建边缘掩码
-            edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                         cv2.THRESH_BINARY_INV, 9, 2)
-            
-            # 应用颜色量化减少颜色数量，增强卡通效果
-            num_colors = 7
-            pixels = np.float32(median_filtered.reshape(-1, 3))
-            criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 200, 0.1)
-            _, labels, centers = cv2.kmeans(pixels, num_colors, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
-            centers = np.uint8(centers)
-            cartoon = centers[labels.flatten()].reshape(median_filtered.shape)
-            
-            # 将边缘掩码转换为三通道
-            edges = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
-            
-            # 合并卡通和平滑效果
-            result = cv2.bitwise_and(cartoon, edges)
-        
-        # 如果需要显示原始画面，则将素描效果叠加在原始画面上
-        if self.show_original and frame is not None:
-            # 调整透明度
-            alpha = 0.5
-            result = cv2.addWeighted(frame, alpha, result, 1 - alpha, 0)
-            
-        return result
+        return sketch_effect(frame, self.sketch_mode, self.blur_size, self.edge_strength,
+                             self.invert, self.show_original, self.palette)
         
     def run(self):
-        """运行特效程序主循环"""
-        frame_count = 0
-        while True:
-            # 获取当前帧
-            if self.use_camera:
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("无法获取摄像头帧，退出程序")
-                    break
-            else:
-                if self.current_image is not None:
-                    # 复制当前加载的图片
-                    frame = self.current_image.copy()
+        """运行特效程序主循环：采集线程读帧，处理线程应用特效，主线程显示并处理按键"""
+        pipeline = FramePipeline(self.read_frame, self.apply_sketch_effect)
+        mode_text = ["铅笔素描", "彩色素描", "浮雕素描", "卡通素描"]
+        result = None
+        with pipeline:
+            while True:
+                item = pipeline.get()
+                if item is None:
+                    if pipeline.finished:
+                        break
+                    # 没有新画面时也要处理窗口事件和按键
+                    key = cv2.waitKey(1) & 0xFF
                 else:
-                    # 如果没有加载图片，显示空白帧
-                    frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                    cv2.putText(frame, "请按 'i' 键加载图片", (100, 240), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            
-            # 计算帧率
-            if frame_count % 10 == 0 and self.use_camera:  # 只在使用摄像头时计算帧率
-                self.calculate_fps()
-            frame_count += 1
-                
-            # 应用素描特效
-            result = self.apply_sketch_effect(frame)
-            
-            # 在画面上显示信息
-            if result is not None:
-                # 显示帧率（仅当使用摄像头时）
-                if self.use_camera:
-                    cv2.putText(result, f"FPS: {self.fps:.1f}", (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                
-                # 显示当前使用模式
-                mode_text = ["铅笔素描", "彩色素描", "浮雕素描", "卡通素描"]
-                source_text = "摄像头" if self.use_camera else "图片"
-                cv2.putText(result, f"特效模式: {mode_text[self.sketch_mode]}", 
-                           (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                cv2.putText(result, f"来源: {source_text}", 
-                           (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                
-                # 显示结果
-                cv2.imshow("素描大师", result)
-            
-            # 处理键盘事件
-            key = cv2.waitKey(1) & 0xFF
-            
-            # 按 'q' 键退出
-            if key == ord('q'):
-                break
-                
-            # 按 's' 键保存当前画面
-            elif key == ord('s') and result is not None:
-                filename = f"sketch_effect_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                cv2.imwrite(filename, result)
-                print(f"已保存画面: {filename}")
+                    result = item.result
+                    
+                    # 在画面上显示信息
+                    if result is not None:
+                        # 显示实际帧率和各级耗时（仅当使用摄像头时）
+                        if self.use_camera:
+                            cv2.putText(result, pipeline.stats.overlay(), (10, 30),
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                        
+                        # 显示当前使用模式
+                        source_text = "摄像头" if self.use_camera else "图片"
+                        cv2.putText(result, f"特效模式: {mode_text[self.sketch_mode]}", 
+                                   (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                        cv2.putText(result, f"来源: {source_text}", 
+                                   (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                        
+                        # 显示结果
+                        cv2.imshow("素描大师", result)
+                    
+                    # 处理键盘事件
+                    key = cv2.waitKey(1) & 0xFF
+                    pipeline.shown(item)
                 
-            # 按数字键 0-3 切换特效模式
-            elif key >= ord('0') and key <= ord('3'):
-                self.sketch_mode = key - ord('0')
-                cv2.setTrackbarPos("特效模式", "控制面板", self.sketch_mode)
-                
-            # 按 'i' 键加载图片
-            elif key == ord('i'):
-                self.load_image()
-                
-            # 按 'c' 键切换使用摄像头/图片
-            elif key == ord('c'):
-                if self.use_camera:
-                    if self.current_image is not None:
-                        self.use_camera = False
-                        print("已切换到使用图片")
-                    else:
-                        print("请先加载图片")
-                else:
-                    if self.cap.isOpened():
-                        self.use_camera = True
-                        print("已切换到使用摄像头")
+                # 按 'q' 键退出
+                if key == ord('q'):
+                    break
+                    
+                # 按 's' 键保存当前画面
+                elif key == ord('s') and result is not None:
+                    filename = f"sketch_effect_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+                    cv2.imwrite(filename, result)
+                    print(f"已保存画面: {filename}")
+                    
+                # 按数字键 0-3 切换特效模式
+                elif key >= ord('0') and key <= ord('3'):
+                    self.sketch_mode = key - ord('0')
+                    cv2.setTrackbarPos("特效模式", "控制面板", self.sketch_mode)
+                    
+                # 按 'i' 键加载图片
+                elif key == ord('i'):
+                    self.load_image()
+                    
+                # 按 'c' 键切换使用摄像头/图片
+                elif key == ord('c'):
+                    if self.use_camera:
+                        if self.current_image is not None:
+                            self.use_camera = False
+                            print("已切换到使用图片")
+                        else:
+                            print("请先加载图片")
                     else:
-                        print("摄像头不可用")
+                        if self.cap.isOpened():
+                            self.use_camera = True
+                            print("已切换到使用摄像头")
+                        else:
+                            print("摄像头不可用")
         
         # 释放资源
+        print(pipeline.stats.report())
         if self.cap.isOpened():
             self.cap.release()
         cv2.destroyAllWindows()
 
 # 主程序入口
 if __name__ == "__main__":
-    # 创建并运行素描特效程序
-    effect = SketchEffect()
-    effect.run()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        # 离线渲染视频文件，例如: python test_24.py input.mp4 output.mp4 -m 3 -j 4
+        video_effect_util.main(effect="sketch")
+    else:
+        # 创建并运行素描特效程序
+        effect = SketchEffect()
+        effect.run()
\ No newline at end of file
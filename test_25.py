@@ -1,5 +1,9 @@
 # 导入Pillow库，用于图像处理
-from PIL import Image, ImageOps
+from PIL import Image
+import numpy as np
+import appcomm.utils.color_util as color_util
+import appcomm.utils.filter_util as filter_util
+from appcomm.utils.cache_util import effect_cache
 
 def create_color_invert(input_path, output_path, enhance_factor=1.0):
     """
@@ -9,24 +13,24 @@ def create_color_invert(input_path, output_path, enhance_factor=1.0):
         output_path: 输出反转效果的路径
         enhance_factor: 对比度增强因子，控制效果鲜艳度（建议0.5-2.0）
     """
-    # 打开输入图像
-    image = Image.open(input_path)
-    
-    # 确保图像是RGB模式（颜色反转需要RGB通道）
-    if image.mode != 'RGB':
-        image = image.convert('RGB')
-    
-    # 反转图像颜色，生成负片效果
-    inverted_image = ImageOps.invert(image)
-    
-    # 可选：增强对比度，使颜色反转效果更鲜艳
-    if enhance_factor != 1.0:
-        from PIL import ImageEnhance
-        enhancer = ImageEnhance.Contrast(inverted_image)
-        inverted_image = enhancer.enhance(enhance_factor)
-    
-    # 保存反转后的图像
-    inverted_image.save(output_path)
+    def render(path):
+        # 打开输入图像
+        image = Image.open(input_path)
+
+        # 确保图像是RGB模式（颜色反转需要RGB通道）
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        # 反转图像颜色，生成负片效果；enhance_factor != 1 时再增强对比度，使效果更鲜艳
+        inverted_image = Image.fromarray(filter_util.color_invert(np.asarray(image), enhance_factor))
+
+        # 保存反转后的图像
+        inverted_image.save(path)
+
+    # 相同输入、相同参数的结果直接从缓存取（APPCOMM_NO_CACHE=1 时关闭）
+    if effect_cache.fetch(output_path, input_path, "invert", {"enhance_factor": enhance_factor}, render,
+                          depends=(filter_util, color_util)):
+        print(f"命中缓存: {output_path}")
     print(f"颜色反转图像已保存到: {output_path}")
 
 # 示例用法
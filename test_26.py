@@ -1,5 +1,8 @@
 from PIL import Image  # 导入Pillow库的Image模块，用于处理图像
 import os  # 导入os模块，用于检查文件是否存在
+import numpy as np  # 导入NumPy，把图像当作数组整体处理
+import appcomm.utils.filter_util as filter_util
+from appcomm.utils.cache_util import effect_cache  # 特效输出缓存
 
 def apply_mosaic_filter(input_path, output_path, block_size=10):
     """
@@ -15,47 +18,24 @@ def apply_mosaic_filter(input_path, output_path, block_size=10):
         return
 
     try:
-        # 打开图像
-        img = Image.open(input_path)
-        # 获取图像的宽度和高度
-        width, height = img.size
-        # 确保图像是RGB模式（如果不是，转换为RGB）
-        img = img.convert("RGB")
-
-        # 创建一个新的空白图像，用于存储马赛克效果
-        mosaic_img = Image.new("RGB", (width, height))
-
-        # 遍历图像，按block_size大小的方块处理
-        for y in range(0, height, block_size):
-            for x in range(0, width, block_size):
-                # 定义当前方块的边界
-                box = (x, y, min(x + block_size, width), min(y + block_size, height))
-                # 截取当前方块区域
-                block = img.crop(box)
-                
-                # 计算方块内所有像素的平均颜色
-                pixels = block.getdata()  # 获取方块内所有像素的RGB值
-                r_total, g_total, b_total = 0, 0, 0
-                pixel_count = len(pixels)
-                
-                for pixel in pixels:
-                    r_total += pixel[0]  # 累加红色值
-                    g_total += pixel[1]  # 累加绿色值
-                    b_total += pixel[2]  # 累加蓝色值
-                
-                # 计算平均RGB值
-                avg_r = r_total // pixel_count
-                avg_g = g_total // pixel_count
-                avg_b = b_total // pixel_count
-                
-                # 用平均颜色填充整个方块
-                for i in range(x, min(x + block_size, width)):
-                    for j in range(y, min(y + block_size, height)):
-                        mosaic_img.putpixel((i, j), (avg_r, avg_g, avg_b))
-
-        # 保存处理后的图像
-        mosaic_img.save(output_path)
-        print(f"马赛克图像已保存到 {output_path}")
+        def render(path):
+            # 打开图像
+            img = Image.open(input_path)
+            # 确保图像是RGB模式（如果不是，转换为RGB）
+            img = img.convert("RGB")
+
+            # 把图像拆成 block_size 大小的方块，一次性求出每块的平均颜色并填满整块
+            # （边缘不足一块的方块只对实际像素求平均）
+            mosaic_img = Image.fromarray(filter_util.mosaic(np.asarray(img), block_size))
+
+            # 保存处理后的图像
+            mosaic_img.save(path)
+
+        # 相同输入、相同参数的结果直接从缓存取（APPCOMM_NO_CACHE=1 时关闭）
+        hit = effect_cache.fetch(output_path, input_path, "mosaic", {"block_size": block_size}, render,
+                                 depends=(filter_util,))
+        mosaic_img = Image.open(output_path)
+        print(f"马赛克图像已保存到 {output_path}" + ("（命中缓存）" if hit else ""))
         
         # 显示图像（可选，适合本地运行）
         mosaic_img.show()
@@ -1,5 +1,9 @@
-from PIL import Image, ImageFilter, ImageEnhance  # 导入Pillow库的模块，用于图像处理
+from PIL import Image  # 导入Pillow库的模块，用于图像处理
 import os  # 导入os模块，用于检查文件是否存在
+import numpy as np  # 导入NumPy，图像以数组形式交给滤镜
+import appcomm.utils.color_util as color_util
+import appcomm.utils.filter_util as filter_util
+from appcomm.utils.cache_util import effect_cache  # 特效输出缓存
 
 def apply_watercolor_effect(input_path, output_path, blur_radius=5, color_boost=1.5):
     """
@@ -16,33 +20,27 @@ def apply_watercolor_effect(input_path, output_path, blur_radius=5, color_boost=
         return
 
     try:
-        # 打开图像并转换为RGB模式
-        img = Image.open(input_path).convert("RGB")
+        def render(path):
+            # 打开图像并转换为RGB模式
+            img = Image.open(input_path).convert("RGB")
+            
+            # 水彩处理：
+            # 步骤1：应用高斯模糊，模拟水彩的柔和边缘
+            # 步骤2：增强颜色，增加水彩画的鲜艳感
+            # 步骤3：检测边缘并增强，模拟水彩画的轮廓线
+            # 步骤4：将边缘叠加回模糊图像，创造水彩效果
+            # 步骤5：增加整体亮度和对比度，增强水彩质感
+            img_final = Image.fromarray(filter_util.watercolor(np.asarray(img), blur_radius, color_boost))
+            
+            # 保存处理后的图像
+            img_final.save(path)
         
-        # 步骤1：应用高斯模糊，模拟水彩的柔和边缘
-        img_blurred = img.filter(ImageFilter.GaussianBlur(radius=blur_radius))
-        
-        # 步骤2：增强颜色，增加水彩画的鲜艳感
-        img_enhanced = ImageEnhance.Color(img_blurred).enhance(color_boost)
-        
-        # 步骤3：检测边缘，模拟水彩画的轮廓线
-        img_edges = img.filter(ImageFilter.FIND_EDGES)
-        # 将边缘图像转换为灰度并增强对比度
-        img_edges = img_edges.convert("L").filter(ImageFilter.EDGE_ENHANCE)
-        
-        # 步骤4：将边缘叠加回模糊图像，创造水彩效果
-        # 将边缘图像转换回RGB以便与原图混合
-        img_edges_rgb = img_edges.convert("RGB")
-        # 创建新图像，混合模糊图像和边缘
-        img_final = Image.blend(img_enhanced, img_edges_rgb, alpha=0.2)
-        
-        # 步骤5：增加整体亮度和对比度，增强水彩质感
-        img_final = ImageEnhance.Brightness(img_final).enhance(1.1)
-        img_final = ImageEnhance.Contrast(img_final).enhance(1.2)
-        
-        # 保存处理后的图像
-        img_final.save(output_path)
-        print(f"水彩画图像已保存到 {output_path}")
+        # 相同输入、相同参数的结果直接从缓存取（APPCOMM_NO_CACHE=1 时关闭）
+        hit = effect_cache.fetch(output_path, input_path, "watercolor",
+                                 {"blur_radius": blur_radius, "color_boost": color_boost}, render,
+                                 depends=(filter_util, color_util))
+        img_final = Image.open(output_path)
+        print(f"水彩画图像已保存到 {output_path}" + ("（命中缓存）" if hit else ""))
         
         # 显示图像（可选，适合本地运行）
         img_final.show()
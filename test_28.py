@@ -1,7 +1,17 @@
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk, ImageEnhance
+from PIL import Image, ImageTk
 import numpy as np
+from appcomm.utils.color_util import ColorTransform
+
+# 预览图（代理图）的最大尺寸，与显示区域一致
+PREVIEW_SIZE = (400, 400)
+# 滑块停止拖动多久后才重新计算预览（毫秒）
+PREVIEW_DELAY_MS = 60
+# 等待后台线程结果的轮询间隔（毫秒）
+PREVIEW_POLL_MS = 15
 
 class SepiaFilterApp:
     def __init__(self, root):
@@ -15,7 +25,8 @@ class SepiaFilterApp:
         self.font_config = ("SimHei", 12)
         
         # 初始化变量
-        self.original_img = None
+        self.source_img = None  # 原始分辨率图片，只在保存时处理
+        self.original_img = None  # 缩小到显示尺寸的代理图，预览都在它上面计算
         self.modified_img = None
         self.tk_original = None
         self.tk_modified = None
@@ -25,6 +36,13 @@ class SepiaFilterApp:
         self.contrast_factor = 1.2  # 对比度因子
         self.brightness_factor = 1.0  # 亮度因子
         
+        # 预览状态：滑块变化时用 root.after 去抖，计算放到后台线程，
+        # 结果通过队列交回主线程显示（Tk 只能在主线程操作）
+        self._preview_after = None  # 等待中的去抖任务
+        self._preview_busy = False  # 后台线程正在计算
+        self._preview_pending = False  # 计算期间参数又变了，结束后需要再算一次
+        self._preview_results = queue.Queue()
+        
         self.create_widgets()
         
     def create_widgets(self):
@@ -118,7 +136,7 @@ class SepiaFilterApp:
         self.modified_label.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # 底部信息
-        info_label = tk.Label(self.root, text="提示: 调整参数并点击应用棕褐色滤镜按钮来生成不同的复古效果", 
+        info_label = tk.Label(self.root, text="提示: 调整参数即可实时预览，保存时按原始分辨率生成", 
                              font=("SimHei", 10), bg="#f0f0f0", fg="#666666")
         info_label.pack(pady=5)
         
@@ -131,96 +149,112 @@ class SepiaFilterApp:
         
         if file_path:
             try:
-                self.original_img = Image.open(file_path).convert("RGB")
-                # 调整图片大小以适应显示区域
-                self.original_img.thumbnail((400, 400))
+                self.source_img = Image.open(file_path).convert("RGB")
+                # 缩小出代理图以适应显示区域，原图保留给保存使用
+                self.original_img = self.source_img.copy()
+                self.original_img.thumbnail(PREVIEW_SIZE)
                 self.tk_original = ImageTk.PhotoImage(self.original_img)
                 self.original_label.config(image=self.tk_original)
                 
-                # 重置修改后的图片
+                # 重置修改后的图片，立即生成第一张预览
                 self.modified_img = None
                 self.modified_label.config(image=None)
-                
-                messagebox.showinfo("成功", "图片加载成功！")
+                self.schedule_preview(0)
             except Exception as e:
                 messagebox.showerror("错误", f"加载图片失败: {str(e)}")
     
     def update_sepia_intensity(self, value):
         """更新棕褐色强度"""
         self.sepia_intensity = float(value) / 10.0
+        self.schedule_preview()
     
     def update_contrast(self, value):
         """更新对比度"""
         self.contrast_factor = float(value)
+        self.schedule_preview()
     
     def update_brightness(self, value):
         """更新亮度"""
         self.brightness_factor = float(value)
+        self.schedule_preview()
     
     def apply_sepia_filter(self):
-        """应用棕褐色滤镜"""
-        if self.original_img:
-            try:
-                # 应用棕褐色滤镜
-                self.modified_img = self.create_sepia_effect(
-                    self.original_img, 
-                    self.sepia_intensity,
-                    self.contrast_factor,
-                    self.brightness_factor
-                )
-                
+        """应用棕褐色滤镜（立即刷新预览）"""
+        self.schedule_preview(0)
+    
+    def schedule_preview(self, delay=PREVIEW_DELAY_MS):
+        """去抖：连续拖动滑块时只保留最后一次，停下 delay 毫秒后才开始计算"""
+        if self.original_img is None:
+            return
+        if self._preview_after is not None:
+            self.root.after_cancel(self._preview_after)
+        self._preview_after = self.root.after(delay, self._start_preview)
+    
+    def _start_preview(self):
+        """在后台线程中用当前参数处理代理图"""
+        self._preview_after = None
+        if self._preview_busy:
+            # 上一次还没算完，结束后再按最新参数算一次
+            self._preview_pending = True
+            return
+        self._preview_busy = True
+        self._preview_pending = False
+        params = (self.sepia_intensity, self.contrast_factor, self.brightness_factor)
+        threading.Thread(target=self._render_preview, args=(self.original_img, params), daemon=True).start()
+        self.root.after(PREVIEW_POLL_MS, self._poll_preview)
+    
+    def _render_preview(self, img, params):
+        """后台线程：只计算，不碰 Tk 组件"""
+        try:
+            self._preview_results.put((img, self.create_sepia_effect(img, *params), None))
+        except Exception as e:
+            self._preview_results.put((img, None, e))
+    
+    def _poll_preview(self):
+        """主线程：取回后台线程的结果并显示"""
+        try:
+            img, result, error = self._preview_results.get_nowait()
+        except queue.Empty:
+            self.root.after(PREVIEW_POLL_MS, self._poll_preview)
+            return
+        self._preview_busy = False
+        
+        # 计算期间又加载了新图片时丢弃旧结果
+        if img is self.original_img:
+            if error is not None:
+                messagebox.showerror("错误", f"应用棕褐色滤镜失败: {str(error)}")
+            else:
+                self.modified_img = result
                 self.tk_modified = ImageTk.PhotoImage(self.modified_img)
                 self.modified_label.config(image=self.tk_modified)
-                
-                messagebox.showinfo("成功", "棕褐色滤镜应用成功！")
-            except Exception as e:
-                messagebox.showerror("错误", f"应用棕褐色滤镜失败: {str(e)}")
+        if self._preview_pending:
+            self._start_preview()
     
     def create_sepia_effect(self, img, intensity, contrast, brightness):
         """创建棕褐色效果"""
-        # 复制原始图像
-        sepia_img = img.copy()
+        # 对比度、亮度、棕褐色矩阵和强度混合编译成一次遍历，不生成中间图像
+        transform = ColorTransform()
         
         # 调整对比度
         if contrast != 1.0:
-            enhancer = ImageEnhance.Contrast(sepia_img)
-            sepia_img = enhancer.enhance(contrast)
+            transform.contrast(contrast)
         
         # 调整亮度
         if brightness != 1.0:
-            enhancer = ImageEnhance.Brightness(sepia_img)
-            sepia_img = enhancer.enhance(brightness)
+            transform.brightness(brightness)
         
-        # 转换为RGB数组以便处理
-        pixels = np.array(sepia_img)
-        
-        # 应用棕褐色滤镜
-        # 棕褐色滤镜的转换公式
+        # 应用棕褐色滤镜，强度不足 1 时与原始图像混合
         # R' = 0.393R + 0.769G + 0.189B
         # G' = 0.349R + 0.686G + 0.168B
         # B' = 0.272R + 0.534G + 0.131B
-        r, g, b = pixels[:, :, 0], pixels[:, :, 1], pixels[:, :, 2]
-        
-        # 计算新的RGB值
-        new_r = np.clip(0.393 * r + 0.769 * g + 0.189 * b, 0, 255).astype(np.uint8)
-        new_g = np.clip(0.349 * r + 0.686 * g + 0.168 * b, 0, 255).astype(np.uint8)
-        new_b = np.clip(0.272 * r + 0.534 * g + 0.131 * b, 0, 255).astype(np.uint8)
-        
-        # 创建棕褐色图像
-        sepia_pixels = np.dstack((new_r, new_g, new_b))
-        sepia_result = Image.fromarray(sepia_pixels)
-        
-        # 根据强度混合原始图像和棕褐色图像
-        if intensity < 1.0:
-            sepia_img = Image.blend(img, sepia_result, intensity)
-        else:
-            sepia_img = sepia_result
+        transform.sepia(intensity, source=True)
         
-        return sepia_img
+        pixels = np.asarray(img.convert("RGB"))
+        return Image.fromarray(transform.apply(pixels))
     
     def save_image(self):
-        """保存修改后的图片"""
-        if self.modified_img:
+        """按原始分辨率重新生成并保存"""
+        if self.source_img:
             try:
                 file_path = filedialog.asksaveasfilename(
                     title="保存图片",
@@ -229,7 +263,18 @@ class SepiaFilterApp:
                 )
                 
                 if file_path:
-                    self.modified_img.save(file_path)
+                    self.root.config(cursor="watch")
+                    self.root.update_idletasks()
+                    try:
+                        full_img = self.create_sepia_effect(
+                            self.source_img,
+                            self.sepia_intensity,
+                            self.contrast_factor,
+                            self.brightness_factor
+                        )
+                    finally:
+                        self.root.config(cursor="")
+                    full_img.save(file_path)
                     messagebox.showinfo("成功", f"图片已保存至: {file_path}")
             except Exception as e:
                 messagebox.showerror("错误", f"保存图片失败: {str(e)}")
@@ -1,7 +1,11 @@
 import cv2
+from appcomm.utils import cartoon_util
+from appcomm.utils.cache_util import effect_cache  # 特效输出缓存
+from appcomm.utils.cartoon_util import cartoonize
 
 # 读取图像
-image = cv2.imread("images/katong.png")  # 替换为你的图片路径
+input_path = "images/katong.png"  # 替换为你的图片路径
+image = cv2.imread(input_path)
 if image is None:
     print("图像读取失败，请检查路径")
     exit()
@@ -9,40 +13,31 @@ if image is None:
 # 调整图像大小（可选）
 image = cv2.resize(image, (600, 400))
 
-# 第一步：应用双边滤波，模糊颜色但保留边缘
-# d是像素邻域的直径，sigmaColor和sigmaSpace是滤波强度
-color_image = cv2.bilateralFilter(image, d=9, sigmaColor=300, sigmaSpace=300)
+# 改为 True 使用金字塔快速版（缩小一半做双边滤波，轮廓线仍在原分辨率上计算），大图时快 3 倍以上
+FAST = False
 
-# 第二步：提取边缘线条
-# 将图像转为灰度
-gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+# 卡通化的输出与输入图片、参数一起缓存，重复运行直接取结果（APPCOMM_NO_CACHE=1 时关闭）
+def render(path):
+    # 双边滤波模糊颜色但保留边缘（d是像素邻域的直径，sigmaColor和sigmaSpace是滤波强度），
+    # 中值滤波去噪后用自适应阈值得到轮廓，再将轮廓线叠加到双边滤波图像上，形成卡通效果
+    cartoon = cartoonize(image, fast=FAST, d=9, sigma_color=300, sigma_space=300,
+                         median_ksize=7, block_size=9, c=2)
 
-# 使用中值滤波去噪
-blurred = cv2.medianBlur(gray, 7)
+    # 保存结果
+    cv2.imwrite(path, cartoon)
 
-# 使用自适应阈值得到轮廓
-edges = cv2.adaptiveThreshold(
-    blurred,
-    255,
-    cv2.ADAPTIVE_THRESH_MEAN_C,
-    cv2.THRESH_BINARY,
-    blockSize=9,
-    C=2
-)
 
-# 第三步：将边缘图转换为彩色（和原图一样的3通道）
-edges_colored = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
-
-# 第四步：将边缘线叠加到双边滤波图像上，形成卡通效果
-cartoon = cv2.bitwise_and(color_image, edges_colored)
+output_path = "out/cartoon_output.jpg"
+hit = effect_cache.fetch(output_path, input_path, "cartoon", {"size": (600, 400), "fast": FAST}, render,
+                         depends=(cartoon_util,))
+if hit:
+    print(f"命中缓存: {output_path}")
+cartoon = cv2.imread(output_path)
 
 # 显示图像
 cv2.imshow("原图", image)
 cv2.imshow("卡通人物效果", cartoon)
 
-# 保存结果（可选）
-cv2.imwrite("out/cartoon_output.jpg", cartoon)
-
 # 等待按键退出
 cv2.waitKey(0)
 cv2.destroyAllWindows()
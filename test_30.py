@@ -1,8 +1,9 @@
-from PIL import Image  # 导入Pillow库的Image模块，用于图像处理
 import os  # 导入os模块，用于处理文件和目录
 import glob  # 导入glob模块，用于查找帧图像文件
+from appcomm.utils import gif_util  # 流式GIF生成
+from appcomm.utils.cache_util import effect_cache  # 特效输出缓存
 
-def create_gif(input_folder, output_path, frame_duration=100, resize_width=200):
+def create_gif(input_folder, output_path, frame_duration=100, resize_width=200, dedupe=0):
     """
     将文件夹中的帧图像拼接成循环GIF动画
     参数:
@@ -10,6 +11,7 @@ def create_gif(input_folder, output_path, frame_duration=100, resize_width=200):
         output_path: 输出GIF文件的路径
         frame_duration: 每帧显示时间（毫秒），控制动画速度
         resize_width: 调整帧图像的宽度（像素），保持宽高比
+        dedupe: 合并相邻相同帧的阈值（平均每通道差值），0 只合并完全相同的帧，None 不合并
     """
     # 检查输入文件夹是否存在
     if not os.path.exists(input_folder):
@@ -26,37 +28,23 @@ def create_gif(input_folder, output_path, frame_duration=100, resize_width=200):
             print(f"错误：文件夹 {input_folder} 中没有找到jpg或png图像！")
             return
         
-        # 存储处理后的帧
-        frames = []
-        
-        # 打开并处理每张图像
-        for image_path in image_files:
-            # 打开图像并转换为RGB模式（GIF需要RGB）
-            img = Image.open(image_path).convert("RGB")
-            
-            # 调整图像大小，保持宽高比
-            original_width, original_height = img.size
-            aspect_ratio = original_height / original_width
-            new_height = int(resize_width * aspect_ratio)
-            img = img.resize((resize_width, new_height), Image.Resampling.LANCZOS)
-            
-            # 添加到帧列表
-            frames.append(img)
-        
-        # 检查是否有有效帧
-        if not frames:
-            print("错误：没有成功加载任何帧图像！")
-            return
-        
-        # 保存GIF动画
-        # 第一帧作为基础，其他帧附加，设置循环播放
-        frames[0].save(
-            output_path,
-            save_all=True,          # 保存所有帧
-            append_images=frames[1:],  # 附加后续帧
-            duration=frame_duration,   # 每帧显示时间（毫秒）
-            loop=0                  # 0表示无限循环
-        )
+        def render(path):
+            # 多进程解码、缩放并按全局调色板量化，按顺序逐帧写入文件，内存不随帧数增长
+            # 相同的相邻帧合并为一帧，显示时间累加；dedupe 大于 0 时近似相同的帧也合并
+            result = gif_util.build_gif(
+                image_files,
+                path,
+                frame_duration=frame_duration,  # 每帧显示时间（毫秒）
+                resize_width=resize_width,      # 宽度，高度按第一帧的宽高比计算
+                loop=0,                         # 0表示无限循环
+                dedupe=dedupe
+            )
+            print(f"共 {result['frames']} 帧，写出 {result['written']} 帧")
+
+        # 这些帧的内容和参数都没变时直接从缓存取（APPCOMM_NO_CACHE=1 时关闭）
+        params = {"frame_duration": frame_duration, "resize_width": resize_width, "dedupe": dedupe}
+        if effect_cache.fetch(output_path, image_files, "gif", params, render, depends=(gif_util,)):
+            print(f"命中缓存: {output_path}")
         
         print(f"GIF动画已保存到 {output_path}")
         
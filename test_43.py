@@ -3,6 +3,7 @@ import random
 import math
 import asyncio
 import platform
+from appcomm.helper.sprite_helper import sprite_cache
 
 # 初始化Pygame
 pygame.init()
@@ -11,7 +12,8 @@ pygame.init()
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("烟雾弥漫动画")
+TITLE = "烟雾弥漫动画"
+pygame.display.set_caption(TITLE)
 
 # 定义颜色
 BLACK = (0, 0, 0)
@@ -45,12 +47,8 @@ class SmokeParticle:
 
     def draw(self, surface):
         """在屏幕上绘制粒子（支持透明度）"""
-        # 创建一个临时的表面以支持透明度
-        temp_surface = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
-        # 绘制圆形粒子
-        pygame.draw.circle(temp_surface, self.color + (self.alpha,), (self.radius, self.radius), self.radius)
-        # 将临时表面绘制到主屏幕
-        surface.blit(temp_surface, (int(self.x - self.radius), int(self.y - self.radius)))
+        # 从共享缓存取预渲染的半透明圆形精灵，直接绘制到主屏幕
+        sprite_cache.blit_circle(surface, (self.x, self.y), self.radius, self.color, self.alpha)
 
 # 全局变量
 particles = []  # 存储所有烟雾粒子
@@ -64,6 +62,7 @@ def setup():
 async def update_loop():
     """主更新循环，处理粒子生成、更新和绘制"""
     running = True
+    frame_count = 0
     while running:
         # 处理退出事件
         for event in pygame.event.get():
@@ -88,10 +87,16 @@ async def update_loop():
         
         # 更新显示
         pygame.display.flip()
+
+        # 每 30 帧在标题栏报告精灵缓存的命中率
+        frame_count += 1
+        if frame_count % 30 == 0:
+            pygame.display.set_caption(f"{TITLE} | {sprite_cache.report()}")
         
         # 控制帧率
         clock.tick(FPS)
         await asyncio.sleep(1.0 / FPS)
+    print(sprite_cache.report())
 
 # 主程序，适配Pyodide环境
 if platform.system() == "Emscripten":
@@ -16,6 +16,7 @@
 
 import pygame
 import math # 导入数学库，用于计算颜色等
+from appcomm.helper.sprite_helper import sprite_cache # 预渲染精灵缓存
 
 # --- 第一步: 初始化 Pygame 和创建窗口 ---
 
@@ -31,7 +32,8 @@ SCREEN_HEIGHT = 600
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 
 # 设置窗口的标题
-pygame.display.set_caption("涟漪效应 - 点击鼠标创造水波纹")
+TITLE = "涟漪效应 - 点击鼠标创造水波纹"
+pygame.display.set_caption(TITLE)
 
 # 定义一些常用的颜色 (使用 RGB 颜色模式)
 BLACK = (0, 0, 0)         # 背景色：黑色
@@ -80,24 +82,10 @@ class Ripple:
         # max(0, ...) 确保 alpha 不会变成负数。
         alpha = max(0, 255 - self.age * 2)
 
-        # Pygame 画圆时不支持直接设置透明度，所以我们创建一个临时的 "表面" (Surface)
-        # 这个表面的大小刚好能容纳我们的圆环。
-        # SRCALPHA 标志让这个表面支持 "alpha通道"（即透明度）。
-        ripple_surface = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
-
-        # 在这个临时的表面上画一个圆。
-        # 参数分别是：画在哪里，颜色(R, G, B, Alpha)，圆心，半径，线宽。
-        pygame.draw.circle(
-            ripple_surface,
-            (self.color[0], self.color[1], self.color[2], alpha), # 颜色加上了透明度
-            (self.radius, self.radius), # 圆心在这个临时表面的中心
-            self.radius,
-            self.width
-        )
-
-        # 最后，把这个画好了带透明圆环的临时表面，"贴" 到我们的主屏幕 (surface) 上。
-        # 我们需要计算好粘贴的左上角位置，以确保圆环的中心在我们想要的地方。
-        surface.blit(ripple_surface, (self.x - self.radius, self.y - self.radius))
+        # Pygame 画圆时不支持直接设置透明度，所以需要一个带 alpha 通道的临时 "表面" (Surface)。
+        # 每帧都新建表面太浪费，这里从精灵缓存里取：同样的 (半径, 颜色, 透明度, 线宽)
+        # 只会画一次，之后直接复用，"贴" 到主屏幕上时圆环中心就是 (x, y)。
+        sprite_cache.blit_circle(surface, (self.x, self.y), self.radius, self.color, alpha, self.width)
 
 # --- 第三步: 游戏主循环 ---
 
@@ -109,6 +97,7 @@ clock = pygame.time.Clock()
 
 # running 变量用来控制主循环是否继续运行
 running = True
+frame_count = 0  # 已绘制的帧数
 
 # 这是程序的核心部分，一个 "while" 循环。
 # 只要 running 是 True，这个循环就会一直执行下去。
@@ -153,6 +142,11 @@ while running:
     # 当所有东西都画好后，调用这个函数来把 "幕后" 的画布更新到屏幕上，让玩家看到。
     pygame.display.flip()
 
+    # 每 30 帧在标题栏报告精灵缓存的命中率
+    frame_count += 1
+    if frame_count % 30 == 0:
+        pygame.display.set_caption(f"{TITLE} | {sprite_cache.report()}")
+
     # --- 3.5: 控制帧率 ---
     # clock.tick(60) 会让循环每秒最多运行 60 次。
     # 这可以防止程序运行得太快，并使得动画在不同性能的电脑上看起来速度一致。
@@ -162,4 +156,5 @@ while running:
 
 # 当 `running` 变为 `False`，循环结束，程序会执行到这里。
 # 调用 quit() 函数来卸载 Pygame 模块，清理资源。
+print(sprite_cache.report())
 pygame.quit()
\ No newline at end of file
@@ -6,14 +6,16 @@ import math
 import appcomm
 import appcomm.helper
 import appcomm.helper.font_helper
+import appcomm.helper.fractal_tile_helper as fractal_tile_helper
+import appcomm.utils.fractal_util as fractal_util
 
 # 初始化Pygame
 pygame.init()
 
 # 设置屏幕尺寸
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("曼德布罗特分形幻想")
+# 窗口在 setup() 中创建，分块渲染的子进程导入本模块时不会再打开窗口
+screen = None
 
 # 定义颜色
 BLACK = (0, 0, 0)
@@ -30,7 +32,17 @@ move_speed = 0.1  # 平移速度
 FPS = 30
 clock = pygame.time.Clock()
 
+# 粗预览：视图变化后立即显示，分块渲染完成前垫底
+renderer = fractal_util.ProgressiveMandelbrot(WIDTH, HEIGHT, levels=(8, 4))
+# 多进程分块渲染 + 分块缓存（Pyodide 不支持多进程，退化为主进程逐块渲染）
+tiles = fractal_tile_helper.FractalTileHelper(
+    WIDTH, HEIGHT, zoom_base=1 + zoom_speed,
+    workers=0 if platform.system() == "Emscripten" else None)
+
 def setup():
+    global screen
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("曼德布罗特分形幻想")
     # 设置背景颜色
     screen.fill(BLACK)
 
@@ -49,14 +61,15 @@ def mandelbrot(c, max_iter):
 
 def draw_mandelbrot(zoom, x_offset, y_offset):
     # 绘制曼德布罗特分形
-    for x in range(WIDTH):
-        for y in range(HEIGHT):
-            # 将屏幕坐标映射到复平面
-            real = (x - WIDTH / 2) / (0.5 * zoom * WIDTH) + x_offset
-            imag = (y - HEIGHT / 2) / (0.5 * zoom * HEIGHT) + y_offset
-            c = complex(real, imag)  # 复数c
-            color = mandelbrot(c, max_iterations)  # 计算颜色
-            screen.set_at((x, y), color)  # 设置像素颜色
+    # 提交当前视图缺失的分块，并收取已完成的分块
+    tiles.request(zoom, x_offset, y_offset, max_iterations)
+    tiles.poll()
+    # 整帧数组化计算粗预览，一次性写入屏幕，替代逐像素 set_at
+    renderer.reset(zoom, x_offset, y_offset, max_iterations)
+    renderer.step(0.5 / FPS)
+    pygame.surfarray.blit_array(screen, renderer.buffer)
+    # 已完成的分块逐块覆盖到预览之上
+    tiles.blit(screen)
 
 def update_loop():
     global zoom, x_offset, y_offset, max_iterations
@@ -64,6 +77,7 @@ def update_loop():
     # 处理事件
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            tiles.close()
             pygame.quit()
             return
         if event.type == pygame.KEYDOWN:
@@ -4,6 +4,8 @@ import random
 import asyncio
 import platform
 import sys
+import appcomm.utils.ray_util as ray_util
+import appcomm.helper.ray_pipeline_helper as ray_pipeline_helper
 
 # 初始化Pygame，准备绘图环境
 try:
@@ -12,16 +14,13 @@ except Exception as e:
     print(f"Pygame初始化失败: {e}")
     sys.exit(1)
 
-# 设置窗口大小和渲染分辨率（降低分辨率以提高性能）
+# 设置窗口大小和渲染分辨率（批量光线投射，可以直接全分辨率渲染）
 WIDTH, HEIGHT = 800, 600
-RENDER_WIDTH, RENDER_HEIGHT = 200, 150  # 降低渲染分辨率
-try:
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    render_surface = pygame.Surface((RENDER_WIDTH, RENDER_HEIGHT))  # 创建渲染表面
-    pygame.display.set_caption("简易光线追踪特效（优化版）")
-except Exception as e:
-    print(f"窗口创建失败: {e}")
-    sys.exit(1)
+RENDER_WIDTH, RENDER_HEIGHT = 800, 600
+TITLE = "简易光线追踪特效（优化版）"
+# 窗口在 setup() 中创建，渲染子进程导入本模块时不会再打开窗口
+screen = None
+render_surface = None
 
 # 定义颜色（RGB格式）
 WHITE = (255, 255, 255)
@@ -63,6 +62,13 @@ class Sphere:
         t = (-b - math.sqrt(discriminant)) / (2.0 * a)
         return t if t > 0 else None
 
+# 平面类（无限大平面，用作地面等）
+class Plane:
+    def __init__(self, point, normal, color):
+        self.point = point
+        self.normal = normal
+        self.color = color
+
 # 光源类
 class Light:
     def __init__(self, position, intensity):
@@ -73,17 +79,46 @@ class Light:
 camera = Vector3(0, 0, -5)
 sphere = Sphere(Vector3(0, 0, 0), 1, RED)
 light = Light(Vector3(2, 2, -5), 1.0)
+# 场景容器：球体由 BVH 加速求交，地面平面可以接收球体的阴影
+scene = ray_util.Scene(
+    spheres=[sphere],
+    planes=[Plane(Vector3(0, -1, 0), Vector3(0, 1, 0), (120, 120, 120))]
+)
 
 # 帧率设置
 FPS = 30
 clock = pygame.time.Clock()
 
+# 分块并行 + 帧流水线渲染器（Pyodide 不支持多进程，退化为主进程按时间预算渲染）
+pipeline = None
+frame_count = 0
+
 def setup():
+    global screen, render_surface, pipeline
+    try:
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        render_surface = pygame.Surface((RENDER_WIDTH, RENDER_HEIGHT))  # 创建渲染表面
+        pygame.display.set_caption(TITLE)
+    except Exception as e:
+        print(f"窗口创建失败: {e}")
+        sys.exit(1)
+    pipeline = ray_pipeline_helper.RayPipelineHelper(
+        RENDER_WIDTH, RENDER_HEIGHT, scene,
+        workers=0 if platform.system() == "Emscripten" else None)
     # 清空渲染表面
     render_surface.fill(BLACK)
     screen.fill(BLACK)
 
+def update_light(time):
+    # 光源绕相机前方做圆周运动
+    light.position = Vector3(
+        2 * math.cos(time),
+        2 * math.sin(time),
+        -5
+    )
+
 def trace_ray(x, y, time):
+    # 单像素光线追踪（逐像素参考实现，主循环使用 ray_util 批量渲染）
     # 将渲染表面坐标转换为3D光线方向
     aspect_ratio = RENDER_WIDTH / RENDER_HEIGHT
     px = (2 * (x + 0.5) / RENDER_WIDTH - 1) * aspect_ratio
@@ -102,11 +137,7 @@ def trace_ray(x, y, time):
         camera.z + t * ray_dir.z
     )
     normal = (hit_point - sphere.center).normalize()
-    light.position = Vector3(
-        2 * math.cos(time),
-        2 * math.sin(time),
-        -5
-    )
+    update_light(time)
     light_dir = (light.position - hit_point).normalize()
     diffuse = max(0, normal.dot(light_dir)) * light.intensity
     color = (
@@ -117,23 +148,38 @@ def trace_ray(x, y, time):
     return color
 
 def update_loop(time):
+    # 返回本次是否提交了新的一帧（提交后 time 才前进）
+    global frame_count
+    submitted = False
     try:
-        # 清空渲染表面
-        render_surface.fill(BLACK)
-
-        # 逐像素光线追踪（低分辨率）
-        for y in range(RENDER_HEIGHT):
-            for x in range(RENDER_WIDTH):
-                color = trace_ray(x, y, time)
-                render_surface.set_at((x, y), color)
-
-        # 放大渲染表面到全屏
-        screen.blit(pygame.transform.scale(render_surface, (WIDTH, HEIGHT)), (0, 0))
+        # 流水线未满时提交下一帧，光源位置由 time 计算
+        if pipeline.can_submit():
+            update_light(time)
+            pipeline.submit(camera, light.position, light.intensity)
+            submitted = True
+
+        # 只收取已完成的分块，不等待子进程；帧未完成时保持上一帧画面
+        image = pipeline.poll(0.5 / FPS)
+        if image is None:
+            return submitted
+        pygame.surfarray.blit_array(render_surface, image)
+
+        # 渲染表面与窗口同尺寸时直接绘制，否则放大到全屏
+        if (RENDER_WIDTH, RENDER_HEIGHT) == (WIDTH, HEIGHT):
+            screen.blit(render_surface, (0, 0))
+        else:
+            screen.blit(pygame.transform.scale(render_surface, (WIDTH, HEIGHT)), (0, 0))
 
         # 更新屏幕
         pygame.display.flip()
+
+        # 每 30 帧在标题栏报告分块耗时和核心利用率
+        frame_count += 1
+        if frame_count % 30 == 0:
+            pygame.display.set_caption(f"{TITLE} | {pipeline.report()}")
     except Exception as e:
         print(f"渲染失败: {e}")
+    return submitted
 
 async def main():
     setup()
@@ -143,11 +189,12 @@ async def main():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+                pipeline.close()
                 pygame.quit()
                 return
 
-        update_loop(time)
-        time += 0.1
+        if update_loop(time):
+            time += 0.1
         clock.tick(FPS)
         await asyncio.sleep(1.0 / FPS)
 
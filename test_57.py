@@ -3,6 +3,7 @@ import math
 import random
 import asyncio
 import platform
+from appcomm.helper.overlay_helper import OverlayLayer
 
 # 初始化Pygame，准备绘图环境
 try:
@@ -101,9 +102,7 @@ class Cube:
         angle_x = time * 0.3
         self.rotated_vertices = [v.rotate(angle_y, angle_x) for v in self.vertices]
 
-    def draw(self, surface):
-        # 创建临时表面支持透明度
-        temp_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    def draw(self, overlay):
         # 绘制立方体边
         for edge in self.edges:
             point1 = self.rotated_vertices[edge[0]].project()
@@ -111,13 +110,11 @@ class Cube:
             # 动态透明度，模拟AR光晕
             alpha = int(255 * (0.7 + 0.3 * math.sin(pygame.time.get_ticks() * 0.005)))
             color = self.color + (alpha,)
-            pygame.draw.line(temp_surface, color, point1, point2, 2)
+            overlay.line(color, point1, point2, 2)
         # 绘制顶点
         for vertex in self.rotated_vertices:
             x, y = vertex.project()
-            pygame.draw.circle(temp_surface, YELLOW, (x, y), 4)
-        # 将临时表面叠加到主屏幕
-        surface.blit(temp_surface, (0, 0))
+            overlay.circle(YELLOW, (x, y), 4)
 
 # 存储虚拟物体
 cubes = []
@@ -132,8 +129,10 @@ def setup():
     # 初始化一个虚拟立方体
     cubes.append(Cube(x=0, y=0, z=0, size=1.0))
     # 创建背景
-    global background
+    global background, overlay
     background = create_background()
+    # 所有立方体共用的透明叠加层
+    overlay = OverlayLayer((WIDTH, HEIGHT))
 
 def update_loop(time):
     try:
@@ -152,10 +151,12 @@ def update_loop(time):
         # 绘制背景
         screen.blit(background, (0, 0))
 
-        # 更新并绘制虚拟立方体
+        # 更新并绘制虚拟立方体，全部画进叠加层后一次性叠加到屏幕
+        overlay.begin()
         for cube in cubes:
             cube.update(time)
-            cube.draw(screen)
+            cube.draw(overlay)
+        overlay.composite(screen)
 
         # 更新屏幕
         pygame.display.flip()
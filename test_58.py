@@ -3,6 +3,7 @@ import math
 import random
 import asyncio
 import platform
+from appcomm.helper.overlay_helper import OverlayLayer
 
 # 初始化Pygame，准备绘图环境
 try:
@@ -49,14 +50,9 @@ class TouchRipple:
         # 透明度随半径增加而降低，模拟消散
         self.alpha = max(0, int(255 * (1 - self.radius / self.max_radius)))
 
-    def draw(self, surface):
-        # 创建临时表面支持透明度
-        temp_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    def draw(self, overlay):
         # 绘制波纹圆环
-        pygame.draw.circle(temp_surface, self.color + (self.alpha,), 
-                          (int(self.x), int(self.y)), int(self.radius), 3)
-        # 将临时表面叠加到主屏幕
-        surface.blit(temp_surface, (0, 0))
+        overlay.circle(self.color + (self.alpha,), (int(self.x), int(self.y)), int(self.radius), 3)
 
 # 粒子类，模拟触摸点产生的粒子效果
 class TouchParticle:
@@ -77,14 +73,9 @@ class TouchParticle:
         self.life -= 1
         self.alpha = max(0, int(255 * (self.life / 60)))
 
-    def draw(self, surface):
-        # 创建临时表面支持透明度
-        temp_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+    def draw(self, overlay):
         # 绘制粒子
-        pygame.draw.circle(temp_surface, self.color + (self.alpha,), 
-                          (int(self.x), int(self.y)), 5)
-        # 将临时表面叠加到主屏幕
-        surface.blit(temp_surface, (0, 0))
+        overlay.circle(self.color + (self.alpha,), (int(self.x), int(self.y)), 5)
 
 # 存储波纹和粒子的列表
 ripples = []
@@ -94,6 +85,9 @@ particles = []
 FPS = 60
 clock = pygame.time.Clock()
 
+# 波纹和粒子共用的透明叠加层，跨帧复用
+overlay = OverlayLayer((WIDTH, HEIGHT))
+
 def setup():
     # 清空波纹和粒子列表
     ripples.clear()
@@ -127,10 +121,11 @@ def update_loop():
         # 清空屏幕
         screen.fill(BLACK)
 
-        # 更新并绘制波纹
+        # 更新并绘制波纹（画进叠加层）
+        overlay.begin()
         for ripple in ripples[:]:
             ripple.update()
-            ripple.draw(screen)
+            ripple.draw(overlay)
             # 移除达到最大半径的波纹
             if ripple.radius >= ripple.max_radius:
                 ripples.remove(ripple)
@@ -138,11 +133,14 @@ def update_loop():
         # 更新并绘制粒子
         for particle in particles[:]:
             particle.update()
-            particle.draw(screen)
+            particle.draw(overlay)
             # 移除生命周期结束的粒子
             if particle.life <= 0:
                 particles.remove(particle)
 
+        # 只把本帧画过的区域叠加到屏幕一次
+        overlay.composite(screen)
+
         # 更新屏幕
         pygame.display.flip()
         return True